@@ -0,0 +1,152 @@
+"""
+데이터 생성기 공용 유틸리티
+━━━━━━━━━━━━━━━━━━━━━━━━━━
+generate_events.py / generate_transactions.py가 공유하는 헬퍼입니다.
+- UUID v4 / 짧은 hex ID를 NumPy 배열 단위로 생성 (uuid.uuid4() 반복 호출 대체)
+- 시드 고정 UUID (random 모듈 기반) — 같은 시드면 ID까지 재현
+- 샤드별 시드 파생 (워커 수와 무관하게 동일한 결과)
+- 일자 파티션 Parquet writer (Hive 스타일 디렉터리, 저카디널리티 컬럼 dictionary 인코딩)
+"""
+
+import json
+import random
+import shutil
+import uuid
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+EVENT_SCHEMA_PATH = Path(__file__).parent.parent / "01_log_design" / "event_schema.json"
+
+# 0~255 → 2자리 hex 문자열 조회 테이블
+_HEX_TABLE = np.array([f"{i:02x}" for i in range(256)], dtype="S2")
+
+
+def _hex_bytes(raw: np.ndarray) -> np.ndarray:
+    """(n, k) uint8 배열 → (n, 2k) ASCII hex 바이트 배열"""
+    n, k = raw.shape
+    return _HEX_TABLE[raw].view(np.uint8).reshape(n, 2 * k)
+
+
+def uuid4_array(rng: np.random.Generator, n: int) -> np.ndarray:
+    """UUID v4 문자열 n개를 한 번에 생성 (str(uuid.uuid4())와 동일한 형식)"""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    hexed = _hex_bytes(raw)
+
+    out = np.full((n, 36), ord("-"), dtype=np.uint8)
+    out[:, 0:8] = hexed[:, 0:8]
+    out[:, 9:13] = hexed[:, 8:12]
+    out[:, 14:18] = hexed[:, 12:16]
+    out[:, 19:23] = hexed[:, 16:20]
+    out[:, 24:36] = hexed[:, 20:32]
+    return out.view("S36").ravel().astype(str).astype(object)
+
+
+def hex_id_array(rng: np.random.Generator, n: int, prefix: str, nbytes: int = 4) -> np.ndarray:
+    """prefix + 랜덤 hex ID n개 생성 (예: f"sess_{uuid.uuid4().hex[:8]}" 대체)"""
+    raw = rng.integers(0, 256, size=(n, nbytes), dtype=np.uint8)
+    hexed = _hex_bytes(raw).view(f"S{2 * nbytes}").ravel().astype(str)
+    return np.char.add(prefix, hexed).astype(object)
+
+
+def seeded_uuid4(rnd=random) -> str:
+    """random 모듈(또는 random.Random 인스턴스) 기반 UUID v4 — 시드로 재현 가능"""
+    return str(uuid.UUID(int=rnd.getrandbits(128), version=4))
+
+
+def seeded_hex8(rnd=random) -> str:
+    """uuid.uuid4().hex[:8] 대체 (시드로 재현 가능한 8자리 hex)"""
+    return f"{rnd.getrandbits(32):08x}"
+
+
+def shard_seed(master_seed: int, shard_id: int) -> int:
+    """마스터 시드 + 샤드 번호로 샤드 시드를 결정적으로 파생"""
+    return int(np.random.SeedSequence([master_seed, shard_id]).generate_state(1)[0])
+
+
+def load_event_schema() -> dict:
+    """01_log_design/event_schema.json (JSON Schema) 로드"""
+    with open(EVENT_SCHEMA_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def json_type(spec: dict) -> str:
+    """JSON Schema 필드 정의의 (null이 아닌) 기본 타입"""
+    if isinstance(spec["type"], list):
+        return next(t for t in spec["type"] if t != "null")
+    return spec["type"]
+
+
+def load_property_types() -> dict[str, str]:
+    """event_schema.json의 event_properties 정의 → {속성명: JSON 타입} (정의 순서 유지)"""
+    props = load_event_schema()["properties"]["event_properties"]["properties"]
+    return {name: json_type(spec) for name, spec in props.items()}
+
+
+class PartitionedParquetWriter:
+    """
+    <root>/<partition_col>=<값>/part-N.parquet 형태로 기록하는 Parquet writer
+
+    입력이 파티션 순서대로(시간순) 들어온다고 가정하고, 새 파티션 값이 나오면 이전 파티션
+    파일을 닫습니다. 따라서 스트리밍 입력에서도 열린 파일은 항상 하나뿐입니다.
+    이미 닫힌 파티션이 다시 나오면 같은 디렉터리에 다음 part 파일을 만듭니다.
+    """
+
+    def __init__(self, root: Path, partition_col: str, dictionary_cols: list[str]):
+        self.root = root
+        self.partition_col = partition_col
+        self.dictionary_cols = dictionary_cols
+        self.rows = 0
+        self._writers = {}
+        self._parts = Counter()
+        # 이전 실행의 파티션이 섞이지 않도록 데이터셋 전체 교체
+        if root.exists():
+            shutil.rmtree(root)
+        root.mkdir(parents=True)
+
+    def write(self, table: pa.Table):
+        values = table.column(self.partition_col)
+        for value in pc.unique(values).to_pylist():
+            part = table.filter(pc.equal(values, value)).drop_columns([self.partition_col])
+            writer = self._writers.get(value)
+            if writer is None:
+                self._close_writers()
+                part_dir = self.root / f"{self.partition_col}={value}"
+                part_dir.mkdir(exist_ok=True)
+                writer = pq.ParquetWriter(
+                    part_dir / f"part-{self._parts[value]}.parquet",
+                    part.schema,
+                    compression="zstd",
+                    use_dictionary=self.dictionary_cols,
+                )
+                self._parts[value] += 1
+                self._writers[value] = writer
+            writer.write_table(part)
+            self.rows += part.num_rows
+
+    def _close_writers(self):
+        for writer in self._writers.values():
+            writer.close()
+        self._writers = {}
+
+    def close(self):
+        self._close_writers()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def dir_size_mb(path: Path) -> float:
+    """디렉터리(또는 파일) 전체 크기 (MB)"""
+    if path.is_file():
+        return path.stat().st_size / 1024 / 1024
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / 1024 / 1024
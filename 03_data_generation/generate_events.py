@@ -5,21 +5,42 @@ QuickPay 이벤트 로그 생성기
 - 90일치 데이터 (약 200만 이벤트)
 - 사용자 행동 패턴 반영 (시간대별 활동량, 요일 효과)
 - 퍼널 전환율 반영 (가입→인증→첫 송금)
+
+사용법:
+  python 03_data_generation/generate_events.py                 # 기본 (Python 엔진)
+  python 03_data_generation/generate_events.py --engine numpy  # 벡터화 엔진 (대용량)
+  python 03_data_generation/generate_events.py --engine numpy --stream  # 메모리 상한 고정 스트리밍
+  python 03_data_generation/generate_events.py --engine numpy --workers 8  # 샤드 병렬 생성
+  python 03_data_generation/generate_events.py --engine numpy --format parquet  # 일자 파티션 Parquet
 """
 
-import json
-import uuid
+import argparse
+import tempfile
 import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 
 import pandas as pd
+import duckdb
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
 from faker import Faker
 
+from gen_utils import (
+    PartitionedParquetWriter, dir_size_mb, hex_id_array, load_property_types,
+    seeded_hex8, seeded_uuid4, shard_seed, uuid4_array,
+)
+
+SEED = 42
+
 fake = Faker("ko_KR")
-random.seed(42)
-np.random.seed(42)
+random.seed(SEED)
+np.random.seed(SEED)
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # 설정
@@ -56,6 +77,42 @@ SCREENS = [
 
 MERCHANT_CATEGORIES = ["cafe", "restaurant", "convenience_store", "grocery", "clothing", "transport"]
 
+# 이벤트별 event_properties 키 (CSV의 prop_* 컬럼 / 벡터화 엔진의 JSON 복원에 사용)
+EVENT_PROPERTIES = {
+    "auth_signup_started": ["device_type", "referrer"],
+    "auth_signup_submitted": ["signup_method", "step", "total_steps"],
+    "auth_signup_completed": [
+        "signup_method", "referrer", "referral_code", "marketing_channel", "step", "total_steps",
+    ],
+    "auth_identity_verified": ["verification_type"],
+    "auth_login_completed": ["login_method"],
+    "screen_viewed": ["screen_name", "screen_class", "previous_screen", "referrer", "load_time_ms"],
+    "screen_exited": ["screen_name", "duration_ms"],
+    "payment_transfer_started": [],
+    "payment_transfer_amount_entered": ["amount"],
+    "payment_transfer_confirmed": ["amount", "recipient_type"],
+    "payment_transfer_completed": [
+        "amount", "currency", "transfer_type", "recipient_type", "fee", "bank_code",
+        "is_first_transfer", "error_code", "error_message", "latency_ms",
+    ],
+    "payment_transfer_failed": ["error_code", "error_type", "error_message"],
+    "payment_qr_scanned": ["merchant_id"],
+    "payment_qr_completed": [
+        "amount", "merchant_id", "merchant_name", "merchant_category",
+        "payment_method", "discount_amount", "point_earned",
+    ],
+    "payment_charge_completed": ["amount", "charge_method", "bank_code", "is_auto_charge", "balance_after"],
+    "screen_banner_clicked": ["banner_id", "position"],
+    "system_push_received": ["push_type", "campaign_id"],
+    "system_push_clicked": ["push_type", "campaign_id"],
+}
+
+BASE_COLUMNS = [
+    "event_id", "event_name", "event_timestamp", "received_at", "user_id", "session_id",
+    "device_id", "platform", "app_version", "os_version", "device_model",
+]
+PROPERTY_KEYS = list(dict.fromkeys(k for keys in EVENT_PROPERTIES.values() for k in keys))
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # 사용자 프로필 생성
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -84,8 +141,8 @@ def generate_users(n: int) -> list[dict]:
         activity_level = min(1.0, np.random.pareto(1.5) * 0.1)
         
         users.append({
-            "user_id": f"usr_{uuid.uuid4().hex[:8]}",
-            "device_id": f"dev_{uuid.uuid4().hex[:8]}",
+            "user_id": f"usr_{seeded_hex8()}",
+            "device_id": f"dev_{seeded_hex8()}",
             "platform": platform,
             "device_model": device_model,
             "os_version": os_version,
@@ -104,12 +161,12 @@ def make_event(user: dict, event_name: str, ts: datetime, properties: dict) -> d
     """공통 스키마 + 이벤트별 속성을 조합하여 이벤트 생성"""
     received_delay = random.uniform(0.1, 2.0)  # 서버 수신 지연(초)
     return {
-        "event_id": str(uuid.uuid4()),
+        "event_id": seeded_uuid4(),
         "event_name": event_name,
         "event_timestamp": ts.isoformat() + "Z",
         "received_at": (ts + timedelta(seconds=received_delay)).isoformat() + "Z",
         "user_id": user["user_id"],
-        "session_id": f"sess_{uuid.uuid4().hex[:8]}",
+        "session_id": f"sess_{seeded_hex8()}",
         "device_id": user["device_id"],
         "platform": user["platform"],
         "app_version": user["app_version"],
@@ -183,7 +240,7 @@ def generate_daily_events(user: dict, date: datetime) -> list[dict]:
     if random.random() > user["activity_level"] * weekday_boost:
         return events
     
-    session_id = f"sess_{uuid.uuid4().hex[:8]}"
+    session_id = f"sess_{seeded_hex8()}"
     ts = random_time_in_day(date)
     
     # 로그인
@@ -318,12 +375,742 @@ def generate_daily_events(user: dict, date: datetime) -> list[dict]:
     return events
 
 
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# NumPy 벡터화 엔진
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 위 Python 엔진과 동일한 전환율·HOUR_WEIGHTS·요일 효과를 사용하되,
+# 사용자 × 일자 전체의 활동 여부·세션 수·퍼널 분기·금액·시각을 배열 단위로 한 번에 뽑습니다.
+# (난수 호출 순서가 달라 같은 시드라도 개별 값은 다르지만, 분포는 동일합니다)
+US_PER_SEC = 1_000_000
+US_PER_MIN = 60 * US_PER_SEC
+US_PER_DAY = 24 * 60 * US_PER_MIN
+START_US = np.datetime64(START_DATE, "us").astype(np.int64)
+HOUR_PROBS = np.array(HOUR_WEIGHTS) / sum(HOUR_WEIGHTS)
+COMPANY_POOL_SIZE = 1_000  # fake.company() 호출을 대신할 상호명 풀 크기
+
+
+@lru_cache(maxsize=1)
+def _company_pool() -> np.ndarray:
+    """시드 고정된 Faker로 상호명 풀을 프로세스당 한 번만 생성"""
+    local_fake = Faker("ko_KR")
+    local_fake.seed_instance(SEED)
+    return np.array([local_fake.company() for _ in range(COMPANY_POOL_SIZE)], dtype=object)
+
+
+def _choice(rng: np.random.Generator, options: list, n: int) -> np.ndarray:
+    """random.choice(options)의 배열 버전 (중복 원소로 가중치를 표현하는 기존 관례 유지)"""
+    return np.array(options, dtype=object)[rng.integers(0, len(options), n)]
+
+
+def _padded_ids(prefix, numbers: np.ndarray, width: int = 3) -> np.ndarray:
+    """f"{prefix}{n:03d}" 형식 ID 배열 (prefix는 문자열 또는 문자열 배열)"""
+    if len(numbers) == 0:
+        return np.empty(0, dtype=object)
+    return np.char.add(np.asarray(prefix, dtype=str), np.char.zfill(numbers.astype(str), width)).astype(object)
+
+
+def _random_offsets_in_day(rng: np.random.Generator, n: int) -> np.ndarray:
+    """random_time_in_day의 배열 버전: 자정 기준 오프셋(μs)"""
+    hour = rng.choice(24, size=n, p=HOUR_PROBS)
+    minute = rng.integers(0, 60, n)
+    second = rng.integers(0, 60, n)
+    ms = rng.integers(0, 1000, n)
+    return (hour * 3600 + minute * 60 + second) * US_PER_SEC + ms * 1000
+
+
+def _format_ts(ts_us: np.ndarray) -> np.ndarray:
+    """μs 정수 배열 → ISO 8601 문자열 (Z 접미사)"""
+    iso = np.datetime_as_string(ts_us.astype("datetime64[us]"), unit="us")
+    return np.char.add(iso, "Z").astype(object)
+
+
+class _EventBatch:
+    """이벤트 블록(같은 event_name의 배열 묶음)을 모아 하나의 DataFrame으로 조립"""
+
+    def __init__(self, users: list[dict], rng: np.random.Generator):
+        self.rng = rng
+        self.users = {
+            col: np.array([u[col] for u in users], dtype=object)
+            for col in ["user_id", "device_id", "platform", "app_version", "os_version",
+                        "device_model", "signup_method"]
+        }
+        self.signup_day = np.array([(u["signup_date"] - START_DATE).days for u in users])
+        self.activity_level = np.array([u["activity_level"] for u in users])
+        self.blocks = []
+
+    def emit(self, event_name: str, user_idx: np.ndarray, ts_us: np.ndarray, props: dict | None = None):
+        if len(user_idx):
+            self.blocks.append((event_name, user_idx, ts_us, props or {}))
+
+    def to_frame(self) -> pd.DataFrame:
+        """블록 결합 → 시간순 정렬 → 공통 스키마 + prop_* 컬럼 DataFrame"""
+        sizes = [len(b[1]) for b in self.blocks]
+        n = sum(sizes)
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+        names = np.empty(n, dtype=object)
+        user_idx = np.empty(n, dtype=np.int64)
+        ts = np.empty(n, dtype=np.int64)
+        prop_values = {}
+        for (name, uidx, block_ts, props), start, end in zip(self.blocks, offsets[:-1], offsets[1:]):
+            names[start:end] = name
+            user_idx[start:end] = uidx
+            ts[start:end] = block_ts
+            for key, value in props.items():
+                prop_values.setdefault(key, []).append((start, end, value))
+
+        order = np.argsort(ts, kind="stable")
+        received = ts + (self.rng.uniform(0.1, 2.0, n) * US_PER_SEC).astype(np.int64)  # 서버 수신 지연
+        columns = {
+            "event_id": uuid4_array(self.rng, n),
+            "event_name": names[order],
+            "event_timestamp": _format_ts(ts[order]),
+            "received_at": _format_ts(received[order]),
+            "user_id": self.users["user_id"][user_idx[order]],
+            "session_id": hex_id_array(self.rng, n, "sess_"),
+            "device_id": self.users["device_id"][user_idx[order]],
+            "platform": self.users["platform"][user_idx[order]],
+            "app_version": self.users["app_version"][user_idx[order]],
+            "os_version": self.users["os_version"][user_idx[order]],
+            "device_model": self.users["device_model"][user_idx[order]],
+        }
+        for key in PROPERTY_KEYS:
+            if key in prop_values:
+                columns[f"prop_{key}"] = _assemble_property(prop_values[key], n)[order]
+        return pd.DataFrame(columns)
+
+
+def _assemble_property(parts: list[tuple], n: int) -> pd.api.extensions.ExtensionArray:
+    """블록별 속성 값을 전체 길이 배열로 합침 (값이 없는 행은 NA)"""
+    sample = next((v for _, _, v in parts if v is not None), None)
+    if isinstance(sample, np.ndarray):
+        sample = sample[0] if len(sample) else None
+    if isinstance(sample, (bool, np.bool_)):
+        values, na_value, make = np.zeros(n, dtype=bool), False, pd.arrays.BooleanArray
+    elif isinstance(sample, (int, np.integer)):
+        values, na_value, make = np.zeros(n, dtype=np.int64), 0, pd.arrays.IntegerArray
+    else:
+        values = np.full(n, None, dtype=object)
+        for start, end, value in parts:
+            values[start:end] = value
+        return pd.array(values, dtype=object)
+
+    mask = np.ones(n, dtype=bool)
+    for start, end, value in parts:
+        if value is None:
+            continue
+        if isinstance(value, np.ndarray) and value.dtype == object:
+            missing = pd.isna(value)
+            values[start:end] = np.where(missing, na_value, value)
+            mask[start:end] = missing
+        else:
+            values[start:end] = value
+            mask[start:end] = False
+    return make(values, mask)
+
+
+def _emit_signup_events(batch: _EventBatch, user_idx: np.ndarray):
+    """회원가입 퍼널 이벤트 (generate_signup_events의 배열 버전)"""
+    rng, users = batch.rng, batch.users
+    ts = START_US + batch.signup_day[user_idx] * US_PER_DAY + _random_offsets_in_day(rng, len(user_idx))
+
+    # 가입 시작 (100%)
+    batch.emit("auth_signup_started", user_idx, ts, {
+        "device_type": users["platform"][user_idx],
+        "referrer": _choice(rng, ["organic", "friend_invite", "instagram", "youtube", "search", None], len(user_idx)),
+    })
+
+    # 가입 제출 (85%)
+    keep = rng.random(len(user_idx)) < 0.85
+    user_idx, ts = user_idx[keep], ts[keep] + rng.integers(1, 6, keep.sum()) * US_PER_MIN
+    batch.emit("auth_signup_submitted", user_idx, ts, {
+        "signup_method": users["signup_method"][user_idx],
+        "step": 3,
+        "total_steps": 5,
+    })
+
+    # 가입 완료 (90% of submitted)
+    keep = rng.random(len(user_idx)) < 0.90
+    user_idx, ts = user_idx[keep], ts[keep] + rng.integers(1, 4, keep.sum()) * US_PER_MIN
+    n = len(user_idx)
+    referral_code = np.char.add("REF", rng.integers(1000, 10000, n).astype(str)).astype(object)
+    referral_code[rng.random(n) >= 0.3] = None
+    batch.emit("auth_signup_completed", user_idx, ts, {
+        "signup_method": users["signup_method"][user_idx],
+        "referrer": _choice(rng, ["organic", "friend_invite", "instagram", None], n),
+        "referral_code": referral_code,
+        "marketing_channel": _choice(rng, ["instagram", "youtube", "search", "organic"], n),
+        "step": 5,
+        "total_steps": 5,
+    })
+
+    # 본인인증 (80% of completed)
+    keep = rng.random(n) < 0.80
+    user_idx, ts = user_idx[keep], ts[keep] + rng.integers(2, 11, keep.sum()) * US_PER_MIN
+    batch.emit("auth_identity_verified", user_idx, ts, {
+        "verification_type": _choice(rng, ["phone_sms", "phone_sms", "bank_account", "pass_cert"], len(user_idx)),
+    })
+
+
+def _emit_daily_events(batch: _EventBatch, day_start: int, day_end: int):
+    """일간 활동 이벤트 (generate_daily_events의 배열 버전)"""
+    rng = batch.rng
+    days = np.arange(day_start, day_end)
+
+    # 활동 여부: 가입일 이후 & activity_level × 요일 효과(주말 1.2배)
+    weekday = (START_DATE.weekday() + days) % 7
+    weekday_boost = np.where(weekday >= 5, 1.2, 1.0)
+    eligible = batch.signup_day[:, None] <= days[None, :]
+    active = eligible & (
+        rng.random((len(batch.signup_day), len(days))) <= batch.activity_level[:, None] * weekday_boost[None, :]
+    )
+    user_idx, day_idx = np.nonzero(active)
+    day_us = START_US + days[day_idx] * US_PER_DAY
+    num_sessions = len(user_idx)
+    ts = day_us + _random_offsets_in_day(rng, num_sessions)
+
+    # 로그인
+    batch.emit("auth_login_completed", user_idx, ts, {
+        "login_method": _choice(rng, ["biometric", "biometric", "pin", "password"], num_sessions),
+    })
+
+    # 화면 조회 (세션당 2~8개) — 세션별 누적합으로 조회 시각 계산
+    num_screens = rng.integers(2, 9, num_sessions)
+    screen_session = np.repeat(np.arange(num_sessions), num_screens)
+    first = np.cumsum(num_screens) - num_screens
+    steps = rng.integers(10, 121, len(screen_session)) * US_PER_SEC
+    elapsed = np.cumsum(steps)
+    elapsed -= (elapsed[first] - steps[first])[screen_session]
+    screen_ts = ts[screen_session] + elapsed
+
+    screen_idx = rng.integers(0, len(SCREENS), len(screen_session))
+    screens = np.array(SCREENS, dtype=object)[screen_idx]
+    screen_classes = np.array(
+        [f"{s.title().replace('_', '')}ViewController" for s in SCREENS], dtype=object
+    )[screen_idx]
+    previous = np.empty(len(screens), dtype=object)
+    previous[1:] = screens[:-1]
+    previous[first] = None
+    screen_users = user_idx[screen_session]
+    batch.emit("screen_viewed", screen_users, screen_ts, {
+        "screen_name": screens,
+        "screen_class": screen_classes,
+        "previous_screen": previous,
+        "referrer": None,
+        "load_time_ms": rng.integers(80, 501, len(screens)),
+    })
+
+    # 화면 이탈
+    duration = rng.integers(3000, 60001, len(screens))
+    batch.emit("screen_exited", screen_users, screen_ts + duration * 1000, {
+        "screen_name": screens,
+        "duration_ms": duration,
+    })
+    ts = screen_ts[first + num_screens - 1]
+
+    # 송금 (40% 확률)
+    sel = np.nonzero(rng.random(num_sessions) < 0.40)[0]
+    n, uidx = len(sel), user_idx[sel]
+    t = ts[sel] + rng.integers(1, 6, n) * US_PER_MIN
+    amount = rng.choice([10000, 30000, 50000, 100000, 200000, 500000], n)
+    batch.emit("payment_transfer_started", uidx, t)
+
+    t = t + rng.integers(5, 31, n) * US_PER_SEC
+    batch.emit("payment_transfer_amount_entered", uidx, t, {"amount": amount})
+
+    t = t + rng.integers(3, 16, n) * US_PER_SEC
+    batch.emit("payment_transfer_confirmed", uidx, t, {
+        "amount": amount,
+        "recipient_type": _choice(rng, ["contact", "contact", "account", "qr"], n),
+    })
+
+    # 성공 (95%) vs 실패 (5%)
+    t = t + rng.integers(200, 2001, n) * 1000
+    ok = rng.random(n) < 0.95
+    m = ok.sum()
+    batch.emit("payment_transfer_completed", uidx[ok], t[ok], {
+        "amount": amount[ok],
+        "currency": "KRW",
+        "transfer_type": _choice(rng, ["instant", "instant", "scheduled"], m),
+        "recipient_type": _choice(rng, ["contact", "account"], m),
+        "fee": rng.choice([0, 0, 0, 0, 500], m),  # 대부분 무료
+        "bank_code": _choice(rng, ["088", "004", "003", "011", "020"], m),
+        "is_first_transfer": False,
+        "error_code": None,
+        "error_message": None,
+        "latency_ms": rng.integers(150, 801, m),
+    })
+    errors = np.array([
+        ("TRF_TIMEOUT_001", "network", "송금 처리 시간 초과"),
+        ("TRF_LIMIT_002", "business", "일일 한도 초과"),
+        ("TRF_BANK_003", "external", "수취 은행 점검 중"),
+    ], dtype=object)[rng.integers(0, 3, n - m)]
+    batch.emit("payment_transfer_failed", uidx[~ok], t[~ok], {
+        "error_code": errors[:, 0],
+        "error_type": errors[:, 1],
+        "error_message": errors[:, 2],
+    })
+    ts[sel] = t
+
+    # QR 결제 (20% 확률)
+    sel = np.nonzero(rng.random(num_sessions) < 0.20)[0]
+    n, uidx = len(sel), user_idx[sel]
+    t = ts[sel] + rng.integers(10, 121, n) * US_PER_MIN
+    qr_amount = rng.choice([3500, 4500, 5000, 6500, 12000, 15000, 25000], n)
+    category = _choice(rng, MERCHANT_CATEGORIES, n)
+    merchant_id = _padded_ids(
+        np.char.add(np.char.add("mrc_", category.astype(str)), "_"), rng.integers(1, 101, n)
+    )
+    batch.emit("payment_qr_scanned", uidx, t, {"merchant_id": merchant_id})
+
+    t = t + rng.integers(2, 11, n) * US_PER_SEC
+    discount = rng.choice([0, 0, 500, 1000], n)
+    discount[rng.random(n) >= 0.3] = 0
+    merchant_name = np.char.add(
+        np.char.add(_company_pool()[rng.integers(0, COMPANY_POOL_SIZE, n)].astype(str), " "),
+        _choice(rng, ["강남점", "역삼점", "판교점", "성수점"], n).astype(str),
+    ).astype(object)
+    batch.emit("payment_qr_completed", uidx, t, {
+        "amount": qr_amount,
+        "merchant_id": merchant_id,
+        "merchant_name": merchant_name,
+        "merchant_category": category,
+        "payment_method": _choice(rng, ["balance", "balance", "card", "point"], n),
+        "discount_amount": discount,
+        "point_earned": (qr_amount * 0.01).astype(np.int64),
+    })
+    ts[sel] = t
+
+    # 충전 (15% 확률)
+    sel = np.nonzero(rng.random(num_sessions) < 0.15)[0]
+    n = len(sel)
+    t = ts[sel] + rng.integers(1, 31, n) * US_PER_MIN
+    charge_amount = rng.choice([10000, 30000, 50000, 100000, 200000], n)
+    batch.emit("payment_charge_completed", user_idx[sel], t, {
+        "amount": charge_amount,
+        "charge_method": _choice(rng, ["bank_transfer", "bank_transfer", "card"], n),
+        "bank_code": _choice(rng, ["088", "004", "003"], n),
+        "is_auto_charge": rng.random(n) < 0.2,
+        "balance_after": charge_amount + rng.integers(0, 500001, n),
+    })
+    ts[sel] = t
+
+    # 배너 클릭 (10% 확률)
+    sel = np.nonzero(rng.random(num_sessions) < 0.10)[0]
+    n = len(sel)
+    t = ts[sel] + rng.integers(1, 11, n) * US_PER_MIN
+    batch.emit("screen_banner_clicked", user_idx[sel], t, {
+        "banner_id": _padded_ids("bnr_", rng.integers(1, 21, n)),
+        "position": rng.integers(1, 6, n),
+    })
+    ts[sel] = t
+
+    # 푸시 (30% 확률) — 세션과 무관한 시각
+    sel = np.nonzero(rng.random(num_sessions) < 0.30)[0]
+    n, uidx = len(sel), user_idx[sel]
+    push_ts = day_us[sel] + _random_offsets_in_day(rng, n)
+    batch.emit("system_push_received", uidx, push_ts, {
+        "push_type": _choice(rng, ["marketing", "transactional", "reminder"], n),
+        "campaign_id": _padded_ids("camp_", rng.integers(1, 51, n)),
+    })
+    # 클릭 (40% CTR)
+    clicked = rng.random(n) < 0.40
+    m = clicked.sum()
+    batch.emit("system_push_clicked", uidx[clicked], push_ts[clicked] + rng.integers(1, 61, m) * US_PER_MIN, {
+        "push_type": _choice(rng, ["marketing", "transactional", "reminder"], m),
+        "campaign_id": _padded_ids("camp_", rng.integers(1, 51, m)),
+    })
+
+
+def generate_events_numpy(users: list[dict], rng: np.random.Generator,
+                          day_start: int = 0, day_end: int = DAYS) -> pd.DataFrame:
+    """
+    NumPy 벡터화 엔진으로 [day_start, day_end) 구간의 이벤트를 생성
+
+    Returns:
+        events.csv와 같은 형태(공통 컬럼 + prop_* 컬럼)의 시간순 정렬 DataFrame
+    """
+    batch = _EventBatch(users, rng)
+    signup_in_range = (batch.signup_day >= day_start) & (batch.signup_day < day_end)
+    _emit_signup_events(batch, np.nonzero(signup_in_range)[0])
+    _emit_daily_events(batch, day_start, day_end)
+    return batch.to_frame()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# Parquet (Arrow) 변환
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 저카디널리티 컬럼은 dictionary 인코딩, 타임스탬프는 UTC naive timestamp[us],
+# event_properties는 event_schema.json 기준 typed struct로 저장합니다.
+DICTIONARY_COLUMNS = ["event_name", "platform", "app_version", "os_version", "device_model"]
+TIMESTAMP_COLUMNS = ["event_timestamp", "received_at"]
+PROPERTY_TYPES = load_property_types()
+_ARROW_TYPES = {"string": pa.string(), "integer": pa.int64(), "boolean": pa.bool_()}
+PROPERTIES_STRUCT = pa.struct([(k, _ARROW_TYPES[t]) for k, t in PROPERTY_TYPES.items()])
+EVENTS_ARROW_SCHEMA = pa.schema(
+    [
+        (c, pa.dictionary(pa.int32(), pa.string()) if c in DICTIONARY_COLUMNS
+         else pa.timestamp("us") if c in TIMESTAMP_COLUMNS
+         else pa.string())
+        for c in BASE_COLUMNS
+    ]
+    + [("event_properties", PROPERTIES_STRUCT), ("event_date", pa.string())]
+)
+
+def _finalize_arrow(table: pa.Table) -> pa.Table:
+    """ISO 8601 문자열 타임스탬프 → timestamp[us], event_date 파티션 컬럼 추가, 최종 스키마로 캐스팅"""
+    raw_ts = table.column("event_timestamp")
+    for col in TIMESTAMP_COLUMNS:
+        parsed = pc.cast(pc.utf8_rtrim(table.column(col), characters="Z"), pa.timestamp("us"))
+        table = table.set_column(table.schema.get_field_index(col), col, parsed)
+    table = table.append_column("event_date", pc.utf8_slice_codeunits(raw_ts, 0, 10))
+    return table.cast(EVENTS_ARROW_SCHEMA)
+
+
+# events.csv와 같은 flat 스키마 (prop_* 컬럼은 event_schema.json 타입) — CSV / JSON 기록과 Parquet 변환의 공통 입력
+FLAT_EVENTS_SCHEMA = pa.schema(
+    [(c, pa.string()) for c in BASE_COLUMNS]
+    + [(f"prop_{k}", _ARROW_TYPES[PROPERTY_TYPES[k]]) for k in PROPERTY_KEYS]
+)
+
+
+def frame_to_flat_arrow(events_df: pd.DataFrame) -> pa.Table:
+    """벡터화 엔진의 flat DataFrame → flat Arrow Table (해당 속성을 가진 이벤트가 없는 prop_* 컬럼은 NULL)"""
+    return pa.table([
+        pa.array(events_df[field.name], type=field.type) if field.name in events_df.columns
+        else pa.nulls(len(events_df), type=field.type)
+        for field in FLAT_EVENTS_SCHEMA
+    ], schema=FLAT_EVENTS_SCHEMA)
+
+
+def events_to_flat_arrow(events: list[dict]) -> pa.Table:
+    """events.json 형식 레코드 → flat Arrow Table (event_properties를 prop_* 컬럼으로)"""
+    rows = []
+    for e in events:
+        row = {c: e[c] for c in BASE_COLUMNS}
+        row.update({f"prop_{k}": v for k, v in e["event_properties"].items()})
+        rows.append(row)
+    return pa.Table.from_pylist(rows, schema=FLAT_EVENTS_SCHEMA)
+
+
+def flat_to_arrow(flat: pa.Table) -> pa.Table:
+    """flat Arrow Table → Parquet용 Arrow Table (prop_* 컬럼을 typed struct로 묶음)"""
+    columns = {c: flat.column(c) for c in BASE_COLUMNS}
+    columns["event_properties"] = pa.StructArray.from_arrays(
+        [flat.column(f"prop_{k}").combine_chunks() for k in PROPERTY_TYPES], fields=list(PROPERTIES_STRUCT)
+    )
+    return _finalize_arrow(pa.table(columns))
+
+
+def count_events(flat: pa.Table) -> Counter:
+    """event_name별 건수"""
+    counts = pc.value_counts(flat.column("event_name")).to_pylist()
+    return Counter({c["values"]: c["counts"] for c in counts})
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# events.json / events.csv 기록 (Arrow → 파일)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 이벤트를 dict로 되돌리지 않고 flat Arrow 배치를 그대로 씁니다.
+#   - events.csv: pyarrow.csv (문자열 값은 따옴표로 감싸짐, NULL은 빈 칸)
+#   - events.json: DuckDB to_json으로 이벤트별 JSON 문자열을 만든 뒤 배열로 감쌈 (1줄 1이벤트)
+#     event_properties에는 EVENT_PROPERTIES 기준 해당 이벤트의 키만 넣습니다.
+def _event_json_sql() -> str:
+    cases = "\n".join(
+        f"WHEN '{name}' THEN to_json(struct_pack("
+        + ", ".join(f'"{k}" := prop_{k}' for k in keys)
+        + "))"
+        for name, keys in EVENT_PROPERTIES.items() if keys
+    )
+    fields = ", ".join(f'"{c}" := {c}' for c in BASE_COLUMNS)
+    return f"""
+        SELECT to_json(struct_pack(
+            {fields},
+            event_properties := CASE event_name {cases} ELSE '{{}}'::JSON END
+        )) AS event_json
+        FROM batch
+    """
+
+
+EVENT_JSON_SQL = _event_json_sql()
+JSON_BATCH_ROWS = 100_000  # to_json 한 번에 변환할 행 수
+
+
+class EventFileWriter:
+    """
+    flat Arrow 배치를 받아 events.json(배열, 1줄 1이벤트) + events.csv를 이어서 기록
+
+    사용법:
+        with EventFileWriter(OUTPUT_DIR) as writer:
+            writer.write(flat_table)   # 시간순으로 여러 번 호출 가능
+    """
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.count = 0
+
+    def __enter__(self):
+        self._con = duckdb.connect()
+        self._json = open(self.output_dir / "events.json", "w", encoding="utf-8")
+        self._json.write("[")
+        self._csv = pa_csv.CSVWriter(str(self.output_dir / "events.csv"), FLAT_EVENTS_SCHEMA)
+        return self
+
+    def write(self, flat: pa.Table):
+        flat = flat.select(FLAT_EVENTS_SCHEMA.names)
+        self._csv.write_table(flat)
+        for start in range(0, flat.num_rows, JSON_BATCH_ROWS):
+            self._con.register("batch", flat.slice(start, JSON_BATCH_ROWS))
+            lines = self._con.execute(EVENT_JSON_SQL).fetch_arrow_table().column("event_json").to_pylist()
+            if lines:
+                self._json.write(("\n  " if self.count == 0 else ",\n  ") + ",\n  ".join(lines))
+                self.count += len(lines)
+
+    def __exit__(self, *exc):
+        self._csv.close()
+        self._json.write("\n]\n")
+        self._json.close()
+        self._con.close()
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 스트리밍 모드 (메모리 상한 고정)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 사용자를 USER_SHARD_SIZE 단위 샤드로 나누고, 샤드마다 하루씩 생성해 곧바로
+# 시간순 정렬된 run 파일(Arrow IPC, flat 스키마 + 정렬키 _ts)에 배치 단위로 기록합니다.
+# 모든 이벤트는 발생일 자정 이후이므로, d일 생성 직후 d+1일 자정 이전 이벤트는 확정 → flush.
+# 마지막에 샤드별 run을 _ts 컬럼 기준으로 k-way merge하여 전체 시간순 events.json / events.csv를 한 번에 씁니다.
+# 메모리 사용량은 (샤드 크기 × 1일치 + run별 배치 1개)로, 생성 일수와 무관합니다.
+USER_SHARD_SIZE = 1_000
+MAX_OPEN_RUNS = 128  # 한 번에 merge할 run 파일 수 (초과 시 다단계 merge)
+PARQUET_BATCH_ROWS = 100_000  # 스트리밍 Parquet / 파일 기록 배치 크기
+RUN_SCHEMA = FLAT_EVENTS_SCHEMA.append(pa.field("_ts", pa.int64()))  # _ts: event_timestamp(μs)
+
+
+def _generate_shard_day(shard_users: list[dict], day_offset: int, engine: str,
+                        rng: np.random.Generator) -> pa.Table:
+    """샤드 사용자들의 하루치 이벤트 (가입 이벤트 포함) — flat Arrow Table"""
+    if engine == "numpy":
+        return frame_to_flat_arrow(generate_events_numpy(shard_users, rng, day_offset, day_offset + 1))
+
+    date = START_DATE + timedelta(days=day_offset)
+    events = []
+    for user in shard_users:
+        if user["signup_date"] == date:
+            events.extend(generate_signup_events(user))
+        if date >= user["signup_date"]:
+            events.extend(generate_daily_events(user, date))
+    return events_to_flat_arrow(events)
+
+
+def _sort_by_ts(table: pa.Table) -> pa.Table:
+    """_ts 기준 안정 정렬 (같은 시각이면 기존 순서 유지)"""
+    return table.take(pc.sort_indices(table, sort_keys=[("_ts", "ascending")]))
+
+
+def _with_sort_key(flat: pa.Table) -> pa.Table:
+    """flat Table + _ts(event_timestamp의 μs 정수) 컬럼 → _ts 기준 정렬"""
+    ts = pc.cast(pc.utf8_rtrim(flat.column("event_timestamp"), characters="Z"), pa.timestamp("us"))
+    return _sort_by_ts(flat.append_column("_ts", pc.cast(ts, pa.int64())))
+
+
+def write_shard_run(shard_users: list[dict], shard_id: int, run_path: Path,
+                    engine: str, seed: int) -> Path:
+    """샤드 하나를 하루 단위로 생성하여 시간순 정렬된 run 파일(Arrow IPC)로 기록"""
+    s = shard_seed(seed, shard_id)
+    random.seed(s)
+    np.random.seed(s % 2**32)
+    fake.seed_instance(s)
+    rng = np.random.default_rng(s)
+
+    pending = RUN_SCHEMA.empty_table()  # 다음 날 자정 이후로 넘어간 이벤트 (spill)
+    with pa.OSFile(str(run_path), "wb") as sink, pa.ipc.new_file(sink, RUN_SCHEMA) as writer:
+        for day_offset in range(DAYS):
+            day = _with_sort_key(_generate_shard_day(shard_users, day_offset, engine, rng))
+            pending = _sort_by_ts(pa.concat_tables([pending, day]))
+
+            watermark = START_US + (day_offset + 1) * US_PER_DAY
+            cut = int(np.searchsorted(pending.column("_ts").to_numpy(), watermark, side="left"))
+            if cut:
+                writer.write_table(pending.slice(0, cut))
+            pending = pending.slice(cut)
+        if pending.num_rows:
+            writer.write_table(pending)
+    return run_path
+
+
+class _RunCursor:
+    """run 파일 하나를 배치 단위로 읽으며 아직 내보내지 않은 구간을 보관"""
+
+    def __init__(self, path: Path):
+        self._source = pa.memory_map(str(path))
+        self._reader = pa.ipc.open_file(self._source)
+        self._next = 0
+        self.current = None
+        self._advance()
+
+    def _advance(self):
+        while self._next < self._reader.num_record_batches:
+            batch = self._reader.get_batch(self._next)
+            self._next += 1
+            if batch.num_rows:
+                self.current = pa.Table.from_batches([batch])
+                return
+        self.current = None
+
+    @property
+    def last_ts(self) -> int:
+        return self.current.column("_ts")[-1].as_py()
+
+    def take_until(self, bound: int) -> pa.Table:
+        """_ts <= bound인 앞부분을 떼어 반환 (현재 배치를 다 쓰면 다음 배치로)"""
+        cut = int(np.searchsorted(self.current.column("_ts").to_numpy(), bound, side="right"))
+        head, self.current = self.current.slice(0, cut), self.current.slice(cut)
+        if self.current.num_rows == 0:
+            self._advance()
+        return head
+
+    def close(self):
+        self._source.close()
+
+
+def _iter_merged_tables(run_paths: list[Path]):
+    """
+    run 파일들을 _ts 기준으로 k-way merge하여 시간순 Table 조각을 반환
+
+    매 단계에서 열린 run들의 현재 배치 마지막 _ts 중 최솟값(bound)까지는 모든 run에서 확정이므로,
+    각 run에서 bound 이하 구간만 떼어 합친 뒤 안정 정렬합니다 (같은 시각은 run 순서 → 결과가 결정적).
+    """
+    cursors = [_RunCursor(p) for p in run_paths]
+    try:
+        while True:
+            live = [c for c in cursors if c.current is not None]
+            if not live:
+                return
+            bound = min(c.last_ts for c in live)
+            yield _sort_by_ts(pa.concat_tables([c.take_until(bound) for c in live]))
+    finally:
+        for c in cursors:
+            c.close()
+
+
+def _iter_batched(tables, batch_rows: int = PARQUET_BATCH_ROWS):
+    """merge 조각을 batch_rows 이상 단위로 모아서 반환 (작은 Parquet row group / 잦은 기록 방지)"""
+    buffer, rows = [], 0
+    for table in tables:
+        buffer.append(table)
+        rows += table.num_rows
+        if rows >= batch_rows:
+            yield pa.concat_tables(buffer)
+            buffer, rows = [], 0
+    if buffer:
+        yield pa.concat_tables(buffer)
+
+
+def _merge_runs(run_paths: list[Path], work_dir: Path) -> list[Path]:
+    """run 수가 MAX_OPEN_RUNS 이하가 될 때까지 중간 merge"""
+    level = 0
+    while len(run_paths) > MAX_OPEN_RUNS:
+        merged = []
+        for i in range(0, len(run_paths), MAX_OPEN_RUNS):
+            group = run_paths[i:i + MAX_OPEN_RUNS]
+            out_path = work_dir / f"merge_{level}_{i // MAX_OPEN_RUNS:05d}.arrow"
+            with pa.OSFile(str(out_path), "wb") as sink, pa.ipc.new_file(sink, RUN_SCHEMA) as writer:
+                for table in _iter_batched(_iter_merged_tables(group)):
+                    writer.write_table(table)
+            for p in group:
+                p.unlink()
+            merged.append(out_path)
+        run_paths, level = merged, level + 1
+    return run_paths
+
+
+def write_merged_outputs(run_paths: list[Path], work_dir: Path, fmt: str = "csv") -> Counter:
+    """k-way merge 결과를 events.json(배열, 1줄 1이벤트) + events.csv 또는 Parquet 파티션으로 기록"""
+    counts = Counter()
+    merged = _iter_batched(_iter_merged_tables(_merge_runs(run_paths, work_dir)))
+
+    if fmt == "parquet":
+        with PartitionedParquetWriter(OUTPUT_DIR / "events", "event_date", DICTIONARY_COLUMNS) as writer:
+            for table in merged:
+                counts += count_events(table)
+                writer.write(flat_to_arrow(table))
+        return counts
+
+    with EventFileWriter(OUTPUT_DIR) as writer:
+        for table in merged:
+            counts += count_events(table)
+            writer.write(table)
+    return counts
+
+
+def generate_streaming(users: list[dict], engine: str, seed: int, shard_size: int,
+                       workers: int = 1, fmt: str = "csv") -> Counter:
+    """
+    샤드별 run 생성 → k-way merge (메모리 상한 = 워커 수 × 샤드 1일치)
+
+    샤드 경계와 시드는 shard_size로만 정해지므로 workers 수와 무관하게 결과가 동일합니다.
+    """
+    shards = [users[i:i + shard_size] for i in range(0, len(users), shard_size)]
+    with tempfile.TemporaryDirectory(dir=OUTPUT_DIR, prefix="_runs_") as tmp:
+        work_dir = Path(tmp)
+        run_paths = [work_dir / f"shard_{shard_id:05d}.arrow" for shard_id in range(len(shards))]
+
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(write_shard_run, shard_users, shard_id, run_paths[shard_id], engine, seed)
+                    for shard_id, shard_users in enumerate(shards)
+                ]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    future.result()
+                    print(f"   🧩 shard {done}/{len(shards)} 완료")
+        else:
+            for shard_id, shard_users in enumerate(shards):
+                write_shard_run(shard_users, shard_id, run_paths[shard_id], engine, seed)
+                print(f"   🧩 shard {shard_id + 1}/{len(shards)} 완료")
+
+        return write_merged_outputs(run_paths, work_dir, fmt)
+
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # 메인 실행
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="QuickPay 이벤트 로그 생성기")
+    parser.add_argument(
+        "--engine", choices=["python", "numpy"], default="python",
+        help="python: 이벤트 단위 루프 (기본), numpy: 사용자 × 일자 배열 단위 벡터화 생성",
+    )
+    parser.add_argument(
+        "--format", choices=["csv", "parquet"], default="csv",
+        help="csv: events.json + events.csv (기본), parquet: data/events/event_date=YYYY-MM-DD/ 파티션",
+    )
+    parser.add_argument("--seed", type=int, default=SEED, help="마스터 시드 (사용자 프로필, 이벤트 엔진, 스트리밍 샤드 시드 모두 이 값에서 파생)")
+    parser.add_argument(
+        "--stream", action="store_true",
+        help="샤드 × 일 단위로 생성해 즉시 기록 후 k-way merge (전체 데이터를 메모리에 올리지 않음)",
+    )
+    parser.add_argument("--shard-size", type=int, default=USER_SHARD_SIZE, help="스트리밍 샤드당 사용자 수")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="샤드를 병렬 생성할 프로세스 수 (2 이상이면 스트리밍 모드로 동작, 결과는 워커 수와 무관)",
+    )
+    args = parser.parse_args()
+    if args.workers > 1:
+        args.stream = True
+    return args
+
+
 def main():
+    args = parse_args()
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
+    # 사용자 프로필 / Python 엔진은 모듈 전역 난수를 쓰므로 --seed로 다시 시드 (기본값은 SEED와 동일)
+    random.seed(args.seed)
+    np.random.seed(args.seed % 2**32)
+    fake.seed_instance(args.seed)
+    
     print("🔧 사용자 프로필 생성 중...")
     users = generate_users(NUM_USERS)
     
@@ -340,44 +1127,52 @@ def main():
     print(f"   ✅ {len(users):,}명 사용자 생성 → data/users.csv")
     
     # 이벤트 생성
-    print("📊 이벤트 로그 생성 중...")
-    all_events = []
-    
-    for user in users:
-        # 가입 이벤트
-        all_events.extend(generate_signup_events(user))
+    if args.stream:
+        print(f"📊 이벤트 로그 스트리밍 생성 중... "
+              f"(engine={args.engine}, shard={args.shard_size}명, workers={args.workers})")
+        event_counts = generate_streaming(
+            users, args.engine, args.seed, args.shard_size, args.workers, args.format
+        )
+    else:
+        print(f"📊 이벤트 로그 생성 중... (engine={args.engine})")
+        if args.engine == "numpy":
+            # 벡터화 엔진은 이미 flatten + 시간순 정렬된 DataFrame을 반환
+            events_df = generate_events_numpy(users, np.random.default_rng(args.seed))
+            flat = frame_to_flat_arrow(events_df)
+        else:
+            all_events = []
+            
+            for user in users:
+                # 가입 이벤트
+                all_events.extend(generate_signup_events(user))
+                
+                # 일간 이벤트 (가입일 이후)
+                for day_offset in range(DAYS):
+                    date = START_DATE + timedelta(days=day_offset)
+                    if date >= user["signup_date"]:
+                        all_events.extend(generate_daily_events(user, date))
+            
+            # 시간순 정렬
+            all_events.sort(key=lambda x: x["event_timestamp"])
+            flat = events_to_flat_arrow(all_events)
+        event_counts = count_events(flat)
         
-        # 일간 이벤트 (가입일 이후)
-        for day_offset in range(DAYS):
-            date = START_DATE + timedelta(days=day_offset)
-            if date >= user["signup_date"]:
-                all_events.extend(generate_daily_events(user, date))
-    
-    # 시간순 정렬
-    all_events.sort(key=lambda x: x["event_timestamp"])
-    
-    # JSON 저장
-    with open(OUTPUT_DIR / "events.json", "w", encoding="utf-8") as f:
-        json.dump(all_events, f, ensure_ascii=False, indent=2)
-    
-    # CSV 저장 (Tableau / 분석용 - event_properties를 flatten)
-    flat_events = []
-    for e in all_events:
-        flat = {k: v for k, v in e.items() if k != "event_properties"}
-        flat.update({f"prop_{k}": v for k, v in e["event_properties"].items()})
-        flat_events.append(flat)
-    
-    events_df = pd.DataFrame(flat_events)
-    events_df.to_csv(OUTPUT_DIR / "events.csv", index=False)
+        if args.format == "parquet":
+            # 일자 파티션 Parquet (event_properties는 typed struct)
+            with PartitionedParquetWriter(OUTPUT_DIR / "events", "event_date", DICTIONARY_COLUMNS) as writer:
+                writer.write(flat_to_arrow(flat))
+        else:
+            # events.json + events.csv (Tableau / 분석용 - event_properties를 prop_* 컬럼으로)
+            with EventFileWriter(OUTPUT_DIR) as writer:
+                writer.write(flat)
     
-    print(f"   ✅ {len(all_events):,}개 이벤트 생성")
-    print(f"   📁 data/events.json ({Path(OUTPUT_DIR / 'events.json').stat().st_size / 1024 / 1024:.1f} MB)")
-    print(f"   📁 data/events.csv ({Path(OUTPUT_DIR / 'events.csv').stat().st_size / 1024 / 1024:.1f} MB)")
+    print(f"   ✅ {sum(event_counts.values()):,}개 이벤트 생성")
+    for name in (["events/"] if args.format == "parquet" else ["events.json", "events.csv"]):
+        print(f"   📁 data/{name} ({dir_size_mb(OUTPUT_DIR / name):.1f} MB)")
     
     # 이벤트별 통계
-    event_counts = events_df["event_name"].value_counts()
     print("\n📈 이벤트별 건수:")
-    for name, count in event_counts.head(15).items():
+    for name, count in event_counts.most_common(15):
         print(f"   {name}: {count:,}")
 
 
@@ -5,18 +5,27 @@ QuickPay 거래 데이터 생성기
 - 이벤트 로그와 연동되는 거래 레코드
 - 송금, QR결제, 충전, 출금 거래 포함
 - 수수료, 상태, 정산 정보 포함
+
+사용법:
+  python 03_data_generation/generate_transactions.py
+  python 03_data_generation/generate_transactions.py --workers 8  # 일자 단위 병렬 생성
+  python 03_data_generation/generate_transactions.py --format parquet  # 일자 파티션 Parquet
 """
 
-import uuid
-import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
 
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from gen_utils import PartitionedParquetWriter, dir_size_mb, shard_seed, uuid4_array
 
-random.seed(42)
-np.random.seed(42)
+SEED = 42
 
 OUTPUT_DIR = Path(__file__).parent.parent / "data"
 NUM_DAYS = 90
@@ -47,96 +56,232 @@ BANK_CODES = {
 }
 
 
-def generate_transactions() -> pd.DataFrame:
-    """거래 데이터 생성"""
+HOUR_WEIGHTS = [2,1,1,1,1,2, 3,5,7,8,7,6, 8,7,6,5,5,6, 7,6,5,4,3,2]
+MERCHANT_PREFIXES = ["cafe", "restaurant", "convenience_store", "grocery"]
+MERCHANT_CATEGORIES = ["cafe", "restaurant", "convenience_store", "grocery", "clothing"]
+MERCHANT_NUMBERS = 100  # 가맹점 ID 번호 범위 (mrc_<prefix>_001 ~ _100)
+# 가맹점 ID / 오류 코드는 값의 종류가 한정되어 있으므로 범주를 미리 만들고 행에는 코드만 보관
+MERCHANT_IDS = [f"mrc_{prefix}_{i:03d}" for prefix in MERCHANT_PREFIXES for i in range(1, MERCHANT_NUMBERS + 1)]
+ERROR_CODES = [f"ERR_{i}" for i in range(100, 1000)]
+CHARGE_AMOUNTS = [10000, 30000, 50000, 100000, 200000, 500000]
+WITHDRAW_AMOUNTS = [10000, 50000, 100000, 200000, 500000]
+
+
+def _probs(weights: dict | list) -> np.ndarray:
+    values = np.array(list(weights.values()) if isinstance(weights, dict) else weights, dtype=float)
+    return values / values.sum()
+
+
+def _choice_codes(rng: np.random.Generator, weights: dict, n: int) -> tuple[np.ndarray, dict]:
+    """random.choices(keys, weights)의 배열 버전 → (코드 배열, {키: 코드})
+
+    object 문자열 배열끼리 비교하면 느리므로 조건 판별은 정수 코드로 하고,
+    문자열 컬럼은 마지막에 코드로 한 번만 조회합니다.
+    """
+    codes = rng.choice(len(weights), size=n, p=_probs(weights))
+    return codes, {key: i for i, key in enumerate(weights)}
+
+
+def _categorical(codes: np.ndarray, dtype: pd.CategoricalDtype) -> pd.Categorical:
+    """정수 코드 → pandas Categorical (코드 -1은 NULL)
+
+    저카디널리티 문자열 컬럼은 행마다 문자열 객체를 만들지 않고 코드 배열 + 범주 목록만 보관합니다.
+    CSV에는 문자열 값으로 기록되고, Arrow 변환 시에는 dictionary 배열로 그대로 넘어갑니다.
+    """
+    return pd.Categorical.from_codes(codes, dtype=dtype)
+
+
+# 범주 검증(유일성 확인)이 일자마다 반복되지 않도록 dtype은 한 번만 생성
+TX_TYPE_DTYPE = pd.CategoricalDtype(list(TRANSACTION_TYPES))
+STATUS_DTYPE = pd.CategoricalDtype(list(STATUS_PROBS))
+CURRENCY_DTYPE = pd.CategoricalDtype(["KRW"])
+BANK_CODE_DTYPE = pd.CategoricalDtype(list(BANK_CODES))
+BANK_NAME_DTYPE = pd.CategoricalDtype(list(BANK_CODES.values()))
+ERROR_CODE_DTYPE = pd.CategoricalDtype(ERROR_CODES)
+MERCHANT_ID_DTYPE = pd.CategoricalDtype(MERCHANT_IDS)
+MERCHANT_CATEGORY_DTYPE = pd.CategoricalDtype(MERCHANT_CATEGORIES)
+
+
+def _lognormal_amount(rng: np.random.Generator, n: int, mean: float, sigma: float,
+                      upper: int, decimals: int) -> np.ndarray:
+    """로그정규 금액 → [1천, upper] 클램핑 → 10^-decimals 단위 반올림"""
+    amount = rng.lognormal(mean=mean, sigma=sigma, size=n).astype(np.int64)
+    return np.round(np.clip(amount, 1000, upper), decimals)
+
+
+def _codes_where(mask: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """mask 위치만 codes로 채우고 나머지는 -1 (nullable Categorical 컬럼의 NULL)"""
+    out = np.full(len(mask), -1, dtype=np.int64)
+    out[mask] = codes
+    return out
+
+
+def generate_day_transactions(day_offset: int, user_ids: pd.Index | list[str], seed: int = SEED) -> pd.DataFrame:
+    """
+    하루치 거래 생성
+
+    일자별 시드(마스터 시드 + day_offset)로 독립된 난수 상태를 사용하므로,
+    어느 프로세스에서 어떤 순서로 실행해도 같은 결과가 나옵니다.
+    거래 유형·상태·금액·시각 등은 하루치를 한 번에 배열로 뽑아 컬럼 단위로 조립합니다.
+    """
+    rng = np.random.default_rng(shard_seed(seed, day_offset))
+    date = START_DATE + timedelta(days=day_offset)
+    
+    # 일간 거래 수 (성장 트렌드 + 요일 효과)
+    base_txns = 3000 + int(day_offset * 30)  # 일간 3000 → 5700
+    weekday_factor = 1.15 if date.weekday() >= 5 else 1.0
+    n = int(base_txns * weekday_factor * rng.uniform(0.85, 1.15))
+    
+    tx_type, type_code = _choice_codes(rng, TRANSACTION_TYPES, n)
+    status, status_code = _choice_codes(rng, STATUS_PROBS, n)
+    is_transfer = tx_type == type_code["transfer"]
+    is_qr = tx_type == type_code["qr_payment"]
+    is_charge = tx_type == type_code["charge"]
+    is_withdraw = tx_type == type_code["withdraw"]
+    is_completed = status == status_code["completed"]
+    is_failed = status == status_code["failed"]
+    
+    # 금액 분포 (거래 유형별) — 유형별 부분집합만 추출해 채움
+    amount = np.zeros(n, dtype=np.int64)
+    fee = np.zeros(n, dtype=np.int64)
+    amount[is_transfer] = _lognormal_amount(rng, is_transfer.sum(), 10.5, 1.2, 5_000_000, -3)  # 1천 ~ 500만, 천원 단위
+    amount[is_qr] = _lognormal_amount(rng, is_qr.sum(), 8.8, 0.8, 500_000, -2)
+    amount[is_charge] = rng.choice(CHARGE_AMOUNTS, size=is_charge.sum())
+    amount[is_withdraw] = rng.choice(WITHDRAW_AMOUNTS, size=is_withdraw.sum())
+    # 송금 10만원 이상 20%, 출금 1/3 확률로 500원 수수료
+    fee_prob = np.where(is_transfer & (amount >= 100000), 0.2, np.where(is_withdraw, 1 / 3, 0.0))
+    fee[rng.random(n) < fee_prob] = 500
+    
+    # 거래 시각 (초 단위)
+    # 다른 속성은 시각과 독립이므로 시각 배열만 정렬해도 분포는 같고,
+    # 일자 순서대로 이어 붙이면 전체가 시간순이 됨
+    seconds = np.sort(
+        rng.choice(24, size=n, p=_probs(HOUR_WEIGHTS)) * 3600
+        + rng.integers(0, 60, n) * 60
+        + rng.integers(0, 60, n)
+    )
+    created_at = np.datetime64(date, "s") + seconds.astype("timedelta64[s]")
+    completed_at = np.where(
+        is_completed,
+        created_at + rng.integers(1, 6, n).astype("timedelta64[s]"),
+        np.datetime64("NaT", "s"),
+    )
+    
+    bank_idx = rng.integers(0, len(BANK_CODES), n)
+    # QR 결제 / 실패 거래에만 존재하는 컬럼은 해당 행 수만큼만 코드 생성 (나머지 행은 NULL)
+    n_qr, n_failed = is_qr.sum(), is_failed.sum()
+    merchant_prefix = rng.integers(0, len(MERCHANT_PREFIXES), n_qr)
+    merchant_id = merchant_prefix * MERCHANT_NUMBERS + rng.integers(0, MERCHANT_NUMBERS, n_qr)
+    error_code = rng.integers(0, len(ERROR_CODES), n_failed)
+    
+    # 문자열 컬럼은 transaction_id(고유값)만 실제 문자열이고, 나머지는 코드 + 범주(Categorical)
+    return pd.DataFrame({
+        "transaction_id": uuid4_array(rng, n),
+        "user_id": _categorical(rng.integers(0, len(user_ids), n), pd.CategoricalDtype(user_ids)),
+        "transaction_type": _categorical(tx_type, TX_TYPE_DTYPE),
+        "amount": amount,
+        "fee": fee,
+        "currency": _categorical(np.zeros(n, dtype=np.int64), CURRENCY_DTYPE),
+        "status": _categorical(status, STATUS_DTYPE),
+        "bank_code": _categorical(bank_idx, BANK_CODE_DTYPE),
+        "bank_name": _categorical(bank_idx, BANK_NAME_DTYPE),
+        "created_at": created_at,
+        "completed_at": completed_at,
+        "error_code": _categorical(_codes_where(is_failed, error_code), ERROR_CODE_DTYPE),
+        "merchant_id": _categorical(_codes_where(is_qr, merchant_id), MERCHANT_ID_DTYPE),
+        "merchant_category": _categorical(
+            _codes_where(is_qr, rng.integers(0, len(MERCHANT_CATEGORIES), n_qr)), MERCHANT_CATEGORY_DTYPE
+        ),
+    })
+
+
+def generate_transactions(workers: int = 1, seed: int = SEED) -> pd.DataFrame:
+    """거래 데이터 생성 (workers > 1이면 일자 단위로 프로세스 풀에 분산)"""
     # 사용자 로드
     users_df = pd.read_csv(OUTPUT_DIR / "users.csv")
-    user_ids = users_df["user_id"].tolist()
+    # Index는 유일성 검사 결과를 캐시하므로 일자마다 user_id 범주를 다시 검증하지 않음
+    user_ids = pd.Index(users_df["user_id"])
     
-    records = []
+    day_fn = partial(generate_day_transactions, user_ids=user_ids, seed=seed)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            daily_records = list(pool.map(day_fn, range(NUM_DAYS)))
+    else:
+        daily_records = [day_fn(day_offset) for day_offset in range(NUM_DAYS)]
     
-    for day_offset in range(NUM_DAYS):
-        date = START_DATE + timedelta(days=day_offset)
-        
-        # 일간 거래 수 (성장 트렌드 + 요일 효과)
-        base_txns = 3000 + int(day_offset * 30)  # 일간 3000 → 5700
-        weekday_factor = 1.15 if date.weekday() >= 5 else 1.0
-        daily_txns = int(base_txns * weekday_factor * random.uniform(0.85, 1.15))
-        
-        for _ in range(daily_txns):
-            tx_type = random.choices(
-                list(TRANSACTION_TYPES.keys()),
-                weights=list(TRANSACTION_TYPES.values())
-            )[0]
-            
-            status = random.choices(
-                list(STATUS_PROBS.keys()),
-                weights=list(STATUS_PROBS.values())
-            )[0]
-            
-            # 금액 분포 (거래 유형별)
-            if tx_type == "transfer":
-                amount = int(np.random.lognormal(mean=10.5, sigma=1.2))
-                amount = min(max(amount, 1000), 5_000_000)  # 1천 ~ 500만
-                amount = round(amount, -3)  # 천원 단위 반올림
-                fee = random.choice([0, 0, 0, 0, 500]) if amount >= 100000 else 0
-            elif tx_type == "qr_payment":
-                amount = int(np.random.lognormal(mean=8.8, sigma=0.8))
-                amount = min(max(amount, 1000), 500_000)
-                amount = round(amount, -2)
-                fee = 0
-            elif tx_type == "charge":
-                amount = random.choice([10000, 30000, 50000, 100000, 200000, 500000])
-                fee = 0
-            else:  # withdraw
-                amount = random.choice([10000, 50000, 100000, 200000, 500000])
-                fee = random.choice([0, 0, 500])
-            
-            hour = random.choices(range(24), weights=[
-                2,1,1,1,1,2, 3,5,7,8,7,6, 8,7,6,5,5,6, 7,6,5,4,3,2
-            ])[0]
-            ts = date.replace(
-                hour=hour,
-                minute=random.randint(0, 59),
-                second=random.randint(0, 59),
-            )
-            
-            bank_code = random.choice(list(BANK_CODES.keys()))
-            
-            record = {
-                "transaction_id": str(uuid.uuid4()),
-                "user_id": random.choice(user_ids),
-                "transaction_type": tx_type,
-                "amount": amount,
-                "fee": fee,
-                "currency": "KRW",
-                "status": status,
-                "bank_code": bank_code,
-                "bank_name": BANK_CODES[bank_code],
-                "created_at": ts.strftime("%Y-%m-%d %H:%M:%S"),
-                "completed_at": (ts + timedelta(seconds=random.randint(1, 5))).strftime("%Y-%m-%d %H:%M:%S") if status == "completed" else None,
-                "error_code": f"ERR_{random.randint(100,999)}" if status == "failed" else None,
-                "merchant_id": f"mrc_{random.choice(['cafe','restaurant','convenience_store','grocery'])}_{random.randint(1,100):03d}" if tx_type == "qr_payment" else None,
-                "merchant_category": random.choice(["cafe", "restaurant", "convenience_store", "grocery", "clothing"]) if tx_type == "qr_payment" else None,
-            }
-            records.append(record)
-    
-    df = pd.DataFrame(records)
-    df = df.sort_values("created_at").reset_index(drop=True)
-    return df
+    # 일자별 결과가 이미 시간순이므로 순서대로 이어 붙이기만 하면 됨
+    return pd.concat(daily_records, ignore_index=True)
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# Parquet (Arrow) 변환
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+DICTIONARY_COLUMNS = ["transaction_type", "currency", "status", "bank_code", "bank_name", "merchant_category"]
+TRANSACTIONS_ARROW_SCHEMA = pa.schema([
+    ("transaction_id", pa.string()),
+    ("user_id", pa.string()),
+    ("transaction_type", pa.dictionary(pa.int32(), pa.string())),
+    ("amount", pa.int64()),
+    ("fee", pa.int64()),
+    ("currency", pa.dictionary(pa.int32(), pa.string())),
+    ("status", pa.dictionary(pa.int32(), pa.string())),
+    ("bank_code", pa.dictionary(pa.int32(), pa.string())),
+    ("bank_name", pa.dictionary(pa.int32(), pa.string())),
+    ("created_at", pa.timestamp("s")),
+    ("completed_at", pa.timestamp("s")),
+    ("error_code", pa.string()),
+    ("merchant_id", pa.string()),
+    ("merchant_category", pa.dictionary(pa.int32(), pa.string())),
+    ("created_date", pa.string()),
+])
+
+
+def transactions_to_arrow(txn_df: pd.DataFrame) -> pa.Table:
+    """거래 DataFrame → Arrow Table (created_date 파티션 컬럼 포함)
+
+    Categorical 컬럼은 코드 + 범주 그대로 dictionary 배열이 되고, 스키마 캐스팅에서
+    인덱스 타입만 맞추거나(dictionary 컬럼) 문자열로 풀립니다(user_id / error_code / merchant_id).
+    """
+    columns = {}
+    for field in TRANSACTIONS_ARROW_SCHEMA:
+        if field.name == "created_date":
+            continue
+        columns[field.name] = pa.array(txn_df[field.name], from_pandas=True).cast(field.type)
+    columns["created_date"] = pc.strftime(columns["created_at"], "%Y-%m-%d")
+    return pa.table(columns).cast(TRANSACTIONS_ARROW_SCHEMA)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="QuickPay 거래 데이터 생성기")
+    parser.add_argument(
+        "--format", choices=["csv", "parquet"], default="csv",
+        help="csv: transactions.csv (기본), parquet: data/transactions/created_date=YYYY-MM-DD/ 파티션",
+    )
+    parser.add_argument("--seed", type=int, default=SEED, help="마스터 시드 (일자별 시드의 기준)")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="일자 단위 병렬 생성 프로세스 수 (결과는 워커 수와 무관하게 동일)",
+    )
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
     
-    print("💳 거래 데이터 생성 중...")
-    txn_df = generate_transactions()
+    print(f"💳 거래 데이터 생성 중... (workers={args.workers})")
+    txn_df = generate_transactions(workers=args.workers, seed=args.seed)
     
-    # CSV 저장
-    txn_df.to_csv(OUTPUT_DIR / "transactions.csv", index=False)
+    if args.format == "parquet":
+        out_name = "transactions/"
+        with PartitionedParquetWriter(OUTPUT_DIR / "transactions", "created_date", DICTIONARY_COLUMNS) as writer:
+            writer.write(transactions_to_arrow(txn_df))
+    else:
+        out_name = "transactions.csv"
+        txn_df.to_csv(OUTPUT_DIR / "transactions.csv", index=False)
     
     print(f"   ✅ {len(txn_df):,}건 거래 생성")
-    print(f"   📁 data/transactions.csv ({(OUTPUT_DIR / 'transactions.csv').stat().st_size / 1024 / 1024:.1f} MB)")
+    print(f"   📁 data/{out_name} ({dir_size_mb(OUTPUT_DIR / out_name):.1f} MB)")
     
     # 통계
     print("\n📈 거래 유형별 건수:")
@@ -3,25 +3,177 @@ QuickPay DB 적재 스크립트
 ━━━━━━━━━━━━━━━━━━━━━━━━
 CSV 데이터를 DuckDB(로컬 분석용)에 적재합니다.
 DuckDB는 설치 없이 SQL 분석이 가능하여 포트폴리오 시연에 최적화되어 있습니다.
+events 테이블은 01_log_design/event_schema.json에서 파생한 명시적 스키마(TIMESTAMP, ENUM,
+typed prop_* 컬럼)로 적재하므로 하위 쿼리에서 타입 변환(CAST)이 필요 없습니다.
+
+물리 정렬 (클러스터링):
+  - events는 (일자, event_name, user_id) 순으로 정렬해 INSERT → 행 그룹마다 일자 / 이벤트명 범위가 좁아져
+    단일 이벤트·단일 일자 필터가 DuckDB zone map(min/max)으로 대부분의 행 그룹을 건너뜀
+  - 증분 적재의 신규 배치도 같은 순서로 정렬해 append (배치가 시간순이므로 일자 순서 유지)
+  - --write-partitioned: 같은 순서로 일자별 Parquet(data/events_clustered/event_date=YYYY-MM-DD/)도 기록
+    (증분 적재 시에는 이번 배치가 걸친 일자 디렉터리만 다시 씀)
+
+적재 모드:
+  - 전체 적재 (기본): 테이블을 CREATE OR REPLACE로 재생성
+  - 증분 적재 (--incremental): 테이블별 high-water mark(load_watermarks) - --lookback-days 이후 데이터만 append
+    · Parquet은 lookback 시작 일자 이전 파티션을 아예 읽지 않음
+    · event_id / transaction_id / user_id 기준으로 대상 테이블 전체와 anti-join → 같은 날 재실행해도 멱등,
+      같은 키가 더 늦은 시각으로 재전송되어도 중복 적재되지 않음
+    · lookback보다 오래된 미적재 행은 건너뛰고 건수를 출력 (전체 적재로 반영)
+
+파생 테이블:
+  - user_activity_bitmap: 사용자별 "가입 후 N일째(KST) 로그인" 비트셋 (UBIGINT, bit N = day N, N < 64)
+    · dbt int_user_activity_bitmap과 같은 정의(KST 일자, 테스트 계정 제외) — 로더 쪽은 dbt 없이 원본 DB를 읽는 소비자용
+    · 증분 적재 시 이번 배치의 로그인만 계산해 기존 비트와 OR 병합 (재실행해도 결과 동일)
+    · 리텐션(D1~D30, day-N 히트맵)은 이 테이블(사용자 수만큼의 행)에서 비트 연산으로 계산
+  - user_keys / device_keys / session_keys / merchant_keys: 문자열 ID → 조밀한 INTEGER 대리 키
+    · 신규 ID만 뒤에 추가하고 전체 적재에서도 유지 → 한 번 부여된 키는 바뀌지 않음
+    · dbt 스테이징 모델이 이 매핑을 조인해 *_key 컬럼을 노출 → 하위 조인 / COUNT(DISTINCT)는 정수로 계산
+  - daily_active_rollup: 일자(KST) × platform × app_version별 활성 / 송금 사용자 키 집합
+    · dbt int_daily_active_rollup과 같은 정의 — 로더 쪽은 dbt 없이 원본 DB를 읽는 05_sql_queries용
+    · 7일 / 30일 롤링 고유 사용자 = 해당 기간 롤업 행의 집합을 합집합으로 병합 (events 스캔 없음)
+    · 증분 적재 시 이번 배치가 걸친 일자만 다시 집계해 교체
+
+사용법:
+  python 03_data_generation/load_to_db.py                   # CSV (events.csv, transactions.csv)
+  python 03_data_generation/load_to_db.py --format parquet  # 일자 파티션 Parquet (--format parquet으로 생성한 경우)
+  python 03_data_generation/load_to_db.py --format parquet --incremental  # 신규 파티션만 append
+  python 03_data_generation/load_to_db.py --write-partitioned              # + 정렬된 일자별 Parquet 기록
 """
 
+import argparse
+import csv
+import shutil
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import duckdb
 import pandas as pd
 
+from gen_utils import json_type, load_event_schema, load_property_types
+
 DATA_DIR = Path(__file__).parent.parent / "data"
 DB_PATH = DATA_DIR / "quickpay.duckdb"
+CLUSTERED_EVENTS_DIR = DATA_DIR / "events_clustered"
 
+# 테이블별 적재 설정
+#   key: 중복 제거 기준 컬럼, watermark: high-water mark 컬럼, partition: Parquet 파티션 컬럼,
+#   cluster: INSERT 시 물리 정렬 순서 (None이면 원천 순서)
+TABLES = {
+    "users": {"icon": "👤", "key": "user_id", "watermark": None, "partition": None, "cluster": None},
+    "events": {
+        "icon": "📊", "key": "event_id", "watermark": "event_timestamp", "partition": "event_date",
+        "cluster": "CAST(event_timestamp AS DATE), event_name, user_id",
+    },
+    "transactions": {
+        "icon": "💳", "key": "transaction_id", "watermark": "created_at", "partition": "created_date", "cluster": None,
+    },
+}
 
-def load_to_duckdb():
-    """CSV 데이터를 DuckDB에 적재"""
-    con = duckdb.connect(str(DB_PATH))
-    
-    # ━━━ 사용자 테이블 ━━━
-    print("👤 users 테이블 적재...")
-    con.execute("""
-        CREATE OR REPLACE TABLE users AS
+# 리텐션 활동 비트셋: 활동 기준 이벤트, 비트셋이 담는 가입 후 일수 (UBIGINT 64비트)
+ACTIVITY_EVENT = "auth_login_completed"
+# 파생 테이블의 활동 일자 / 제외 계정 — dbt stg_events와 같은 규칙 (event_date_kst, 테스트 계정 제외)
+EVENT_DATE_KST = "CAST(e.event_timestamp + INTERVAL 9 HOUR AS DATE)"
+TEST_USER_PATTERN = "usr_test%"
+ACTIVITY_WINDOW_DAYS = 64
+# 일간 롤업: 활성(로그인) / 송금(North Star) 기준 이벤트
+SENDER_EVENT = "payment_transfer_completed"
+# 증분 적재 지연 도착 여유: 워터마크보다 이만큼 앞부터 다시 읽음 (export_tableau_data.py와 같은 기본값)
+DEFAULT_LOOKBACK_DAYS = 2
+
+# 대리 키: <name>_keys(<name>_id → <name>_key) 매핑 테이블별 {원천 테이블: 자연 키 컬럼}
+SURROGATE_KEYS = {
+    "user": {"users": "user_id", "events": "user_id", "transactions": "user_id"},
+    "device": {"users": "device_id", "events": "device_id"},
+    "session": {"events": "session_id"},
+    "merchant": {"events": "prop_merchant_id", "transactions": "merchant_id"},
+}
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# events 스키마 (01_log_design/event_schema.json 기준)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 타입 추론(read_csv_auto) 대신 스키마로 컬럼 타입을 고정합니다.
+#   - format: date-time → TIMESTAMP (UTC)
+#   - enum → DuckDB ENUM (택소노미 밖의 값은 적재 시점에 실패)
+#   - event_properties.* → prop_* 컬럼 (string/integer/boolean)
+SQL_TYPES = {"string": "VARCHAR", "integer": "BIGINT", "boolean": "BOOLEAN"}
+
+
+def event_enum_types() -> dict[str, list[str]]:
+    """ENUM 타입명 → 허용 값 목록 (예: event_name_enum)"""
+    return {
+        f"{name}_enum": spec["enum"]
+        for name, spec in load_event_schema()["properties"].items()
+        if "enum" in spec
+    }
+
+
+def event_columns() -> list[tuple[str, str]]:
+    """events 테이블 컬럼 정의 [(컬럼명, DuckDB 타입)] — 스키마 정의 순서, prop_*는 뒤에"""
+    columns = []
+    for name, spec in load_event_schema()["properties"].items():
+        if name == "event_properties":
+            continue
+        if "enum" in spec:
+            columns.append((name, f"{name}_enum"))
+        elif spec.get("format") == "date-time":
+            columns.append((name, "TIMESTAMP"))
+        else:
+            columns.append((name, SQL_TYPES[json_type(spec)]))
+    columns += [(f"prop_{k}", SQL_TYPES[t]) for k, t in load_property_types().items()]
+    return columns
+
+
+def create_events_table(con: duckdb.DuckDBPyConnection):
+    """ENUM 타입 + events 테이블을 스키마 기준으로 (재)생성"""
+    con.execute("DROP TABLE IF EXISTS events")
+    for type_name, values in event_enum_types().items():
+        con.execute(f"DROP TYPE IF EXISTS {type_name}")
+        con.execute(f"CREATE TYPE {type_name} AS ENUM ({', '.join(repr(v) for v in values)})")
+    columns = ",\n            ".join(f"{name} {sql_type}" for name, sql_type in event_columns())
+    con.execute(f"""
+        CREATE TABLE events (
+            {columns}
+        )
+    """)
+
+
+def _csv_header(path: Path) -> set[str]:
+    """CSV 헤더 컬럼명 (pyarrow.csv로 쓴 파일처럼 헤더가 따옴표로 감싸진 경우 포함)"""
+    with open(path, encoding="utf-8", newline="") as f:
+        return set(next(csv.reader(f), []))
+
+
+def events_source(fmt: str) -> tuple[str, str]:
+    """
+    이벤트 원천 (SELECT 절, FROM 절) — 모든 컬럼을 스키마 타입으로 명시적 CAST
+
+    CSV는 all_varchar로 읽어 타입 추론(샘플링)을 건너뛰고,
+    Parquet은 event_properties struct를 prop_* 컬럼으로 펼칩니다.
+    원천에 없는 prop_* 컬럼(해당 속성을 가진 이벤트가 없는 경우)은 NULL로 채웁니다.
+    """
+    if fmt == "parquet":
+        def source_expr(name):
+            return f"event_properties.{name[len('prop_'):]}" if name.startswith("prop_") else name
+        source = "read_parquet(?, hive_partitioning = true)"
+    else:
+        header = _csv_header(DATA_DIR / "events.csv")
+        def source_expr(name):
+            return name if name in header else "NULL"
+        source = "read_csv(?, header = true, all_varchar = true)"
+
+    select = ",\n            ".join(
+        f"CAST({source_expr(name)} AS {sql_type}) AS {name}" for name, sql_type in event_columns()
+    )
+    return f"""
+            {select}""", source
+
+
+def source_query(table: str, fmt: str) -> str:
+    """테이블별 원천 SELECT 문 (파일 목록은 ? 파라미터로 바인딩)"""
+    if table == "users":
+        return """
         SELECT
             user_id,
             device_id,
@@ -32,23 +184,14 @@ def load_to_duckdb():
             DATE_PART('week', CAST(signup_date AS DATE)) as signup_week,
             DATE_TRUNC('month', CAST(signup_date AS DATE)) as signup_month
         FROM read_csv_auto(?)
-    """, [str(DATA_DIR / "users.csv")])
-    count = con.execute("SELECT COUNT(*) FROM users").fetchone()[0]
-    print(f"   ✅ {count:,}건")
-    
-    # ━━━ 이벤트 테이블 ━━━
-    print("📊 events 테이블 적재...")
-    con.execute("""
-        CREATE OR REPLACE TABLE events AS
-        SELECT * FROM read_csv_auto(?)
-    """, [str(DATA_DIR / "events.csv")])
-    count = con.execute("SELECT COUNT(*) FROM events").fetchone()[0]
-    print(f"   ✅ {count:,}건")
-    
-    # ━━━ 거래 테이블 ━━━
-    print("💳 transactions 테이블 적재...")
-    con.execute("""
-        CREATE OR REPLACE TABLE transactions AS
+    """
+    if table == "events":
+        select, source = events_source(fmt)
+        return f"""
+        SELECT {select} FROM {source}
+    """
+    txn_source = "read_parquet(?)" if fmt == "parquet" else "read_csv_auto(?)"
+    return f"""
         SELECT
             transaction_id,
             user_id,
@@ -64,22 +207,403 @@ def load_to_duckdb():
             error_code,
             merchant_id,
             merchant_category
-        FROM read_csv_auto(?)
-    """, [str(DATA_DIR / "transactions.csv")])
-    count = con.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
-    print(f"   ✅ {count:,}건")
-    
+        FROM {txn_source}
+    """
+
+
+def source_files(table: str, fmt: str, since: datetime | None = None) -> list[str]:
+    """
+    원천 파일 목록
+
+    Parquet은 <table>/<partition>=YYYY-MM-DD/ 디렉터리 단위로 나뉘어 있으므로,
+    since가 주어지면 그 날짜 이전 파티션은 목록에서 제외합니다 (파일을 열지도 않음).
+    """
+    partition = TABLES[table]["partition"]
+    if fmt != "parquet" or partition is None:
+        return [str(DATA_DIR / f"{table}.csv")]
+
+    files = []
+    for part_dir in sorted((DATA_DIR / table).glob(f"{partition}=*")):
+        part_date = part_dir.name.split("=", 1)[1]
+        if since is not None and part_date < since.strftime("%Y-%m-%d"):
+            continue
+        files.extend(str(p) for p in sorted(part_dir.glob("*.parquet")))
+    return files
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 워터마크 관리
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def ensure_watermark_table(con: duckdb.DuckDBPyConnection):
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS load_watermarks (
+            table_name VARCHAR PRIMARY KEY,
+            watermark TIMESTAMP,        -- 적재된 데이터의 최대 시각 (UTC)
+            row_count BIGINT,
+            loaded_at TIMESTAMP
+        )
+    """)
+
+
+def get_watermark(con: duckdb.DuckDBPyConnection, table: str) -> datetime | None:
+    row = con.execute(
+        "SELECT watermark FROM load_watermarks WHERE table_name = ?", [table]
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _lookback_start(watermark: datetime | None, lookback_days: int) -> datetime | None:
+    """증분 적재 / 파생 테이블 갱신의 재처리 시작 시각 (워터마크 - lookback_days)"""
+    return watermark - timedelta(days=lookback_days) if watermark else None
+
+
+def update_watermark(con: duckdb.DuckDBPyConnection, table: str):
+    """적재 후 테이블의 현재 최대 시각 / 건수로 워터마크 갱신"""
+    column = TABLES[table]["watermark"]
+    watermark_expr = f"MAX({column})" if column else "NULL"
+    con.execute(f"""
+        INSERT OR REPLACE INTO load_watermarks
+        SELECT ?, {watermark_expr}, COUNT(*), CAST(now() AS TIMESTAMP) FROM {table}
+    """, [table])
+
+
+def table_exists(con: duckdb.DuckDBPyConnection, table: str) -> bool:
+    return con.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [table]
+    ).fetchone()[0] > 0
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 적재
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def full_load(con: duckdb.DuckDBPyConnection, table: str, fmt: str) -> int:
+    """테이블 전체 재생성 (events는 명시적 DDL 후 INSERT)"""
+    if table == "events":
+        create_events_table(con)
+        con.execute(
+            f"INSERT INTO events SELECT * FROM ({source_query(table, fmt)}) ORDER BY {TABLES[table]['cluster']}",
+            [source_files(table, fmt)],
+        )
+    else:
+        con.execute(
+            f"CREATE OR REPLACE TABLE {table} AS {source_query(table, fmt)}",
+            [source_files(table, fmt)],
+        )
+    update_watermark(con, table)
+    return con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def incremental_load(con: duckdb.DuckDBPyConnection, table: str, fmt: str,
+                     lookback_days: int = DEFAULT_LOOKBACK_DAYS) -> tuple[int, int]:
+    """
+    워터마크 - lookback_days 이후 데이터만 append — (신규 적재 건수, lookback보다 오래되어 건너뛴 건수) 반환
+
+    워터마크 직전 시각의 행이 늦게 도착할 수 있으므로 lookback만큼 앞당긴 구간부터 다시 읽고,
+    이미 적재된 키는 대상 테이블 전체와의 anti-join으로 걸러냅니다
+    (같은 키가 더 늦은 시각으로 재전송되어도 중복 적재되지 않음).
+    lookback보다 오래된 미적재 행은 적재하지 않고 건수만 보고합니다 (전체 적재로 반영).
+    Parquet은 lookback 시작 일자 이전 파티션을 읽지 않으므로 그 파티션에 늦게 추가된 행은 건수에도 잡히지 않습니다.
+    """
+    if not table_exists(con, table):
+        return full_load(con, table, fmt), 0
+
+    spec = TABLES[table]
+    key, column, cluster = spec["key"], spec["watermark"], spec["cluster"]
+    watermark = get_watermark(con, table) if column else None
+    since = _lookback_start(watermark, lookback_days)
+    files = source_files(table, fmt, since=since)
+    if not files:
+        return 0, 0
+
+    # 원천을 한 번만 읽어 미적재 키만 임시 테이블로 → lookback 구간은 적재, 그 이전은 건수만 집계
+    con.execute(f"""
+        CREATE OR REPLACE TEMP TABLE _incoming AS
+        SELECT src.*
+        FROM ({source_query(table, fmt)}) src
+        WHERE NOT EXISTS (SELECT 1 FROM {table} t WHERE t.{key} = src.{key})
+    """, [files])
+    if since is None:
+        src_filter, params, too_old = "", [], 0
+    else:
+        src_filter, params = f"WHERE {column} >= ?", [since]
+        too_old = con.execute(f"SELECT COUNT(*) FROM _incoming WHERE {column} < ?", [since]).fetchone()[0]
+
+    before = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    con.execute(f"""
+        INSERT INTO {table}
+        SELECT *
+        FROM _incoming
+        {src_filter}
+        {f"ORDER BY {cluster}" if cluster else ""}
+    """, params)
+    con.execute("DROP TABLE _incoming")
+    update_watermark(con, table)
+    return con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] - before, too_old
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 파생 테이블: 사용자 활동 비트셋
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def update_activity_bitmap(con: duckdb.DuckDBPyConnection, since: datetime | None = None) -> int:
+    """
+    user_activity_bitmap 갱신 (since 이후 events만 반영, None이면 전체 재생성) — 비트셋 보유 사용자 수 반환
+
+    activity_bits의 N번째 비트 = 가입일 + N일(KST 일자)에 로그인했는지 여부입니다.
+    OR 병합이라 같은 구간을 여러 번 반영해도 결과가 같으므로, 워터마크 경계(>=)가 겹쳐도 안전합니다.
+
+    dbt int_user_activity_bitmap(user_key 기준)과 같은 비트셋입니다. 이 테이블은 dbt 없이 원본 DB를 읽는
+    소비자(05_sql_queries/retention_analysis.sql, Tableau 리텐션 내보내기)용으로 로더가 소유하고,
+    dbt 모델은 mart_retention용으로 stg_events에서 계산합니다. 일자 경계(KST)와 테스트 계정 제외를
+    같은 규칙으로 맞춰 두 테이블의 결과가 같으므로, 정의를 바꿀 때는 두 곳을 함께 바꿉니다.
+    """
+    if since is None:
+        con.execute("DROP TABLE IF EXISTS user_activity_bitmap")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS user_activity_bitmap (
+            user_id VARCHAR PRIMARY KEY,
+            signup_date DATE,
+            activity_bits UBIGINT,       -- bit N = 가입 후 N일째 활동
+            last_activity_date DATE
+        )
+    """)
+    con.execute(f"""
+        INSERT INTO user_activity_bitmap
+        SELECT
+            e.user_id,
+            CAST(u.signup_date AS DATE) AS signup_date,
+            BIT_OR(CAST(1 AS UBIGINT) << ({EVENT_DATE_KST} - CAST(u.signup_date AS DATE))),
+            MAX({EVENT_DATE_KST})
+        FROM events e
+        JOIN users u ON e.user_id = u.user_id
+        WHERE e.event_name = '{ACTIVITY_EVENT}'
+          AND e.user_id NOT LIKE '{TEST_USER_PATTERN}'
+          AND {EVENT_DATE_KST} - CAST(u.signup_date AS DATE) BETWEEN 0 AND {ACTIVITY_WINDOW_DAYS - 1}
+          {"AND e.event_timestamp >= ?" if since else ""}
+        GROUP BY 1, 2
+        ON CONFLICT (user_id) DO UPDATE SET
+            activity_bits = user_activity_bitmap.activity_bits | excluded.activity_bits,
+            last_activity_date = GREATEST(user_activity_bitmap.last_activity_date, excluded.last_activity_date)
+    """, [since] if since else [])
+    return con.execute("SELECT COUNT(*) FROM user_activity_bitmap").fetchone()[0]
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 파생 테이블: 대리 키 / 일간 활성 롤업
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def update_surrogate_keys(con: duckdb.DuckDBPyConnection, since: dict[str, datetime] | None = None) -> dict[str, int]:
+    """
+    대리 키 테이블(<name>_keys) 갱신 — 키 테이블별 전체 매핑 수 반환
+
+    원천에 처음 나온 자연 키만 기존 최대 키 뒤에 (자연 키 순으로) 추가합니다.
+    since({원천 테이블: 적재 전 워터마크})가 있으면 워터마크 컬럼이 있는 원천은 그 이후 행만 확인합니다
+    (users / 워터마크가 없는 원천은 항상 전체 확인).
+    매핑은 전체 적재에서도 지우지 않으므로 한 번 부여된 키는 바뀌지 않고,
+    키를 저장해 둔 하위 테이블(롤업, dbt 증분 모델)과 어긋나지 않습니다.
+    """
+    counts = {}
+    for name, sources in SURROGATE_KEYS.items():
+        table, id_col, key_col = f"{name}_keys", f"{name}_id", f"{name}_key"
+        con.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {id_col} VARCHAR PRIMARY KEY,
+                {key_col} INTEGER UNIQUE
+            )
+        """)
+        selects, params = [], []
+        for source, column in sources.items():
+            watermark = TABLES[source]["watermark"]
+            where = f"WHERE {column} IS NOT NULL"
+            if since and watermark and since.get(source):
+                where += f" AND {watermark} >= ?"
+                params.append(since[source])
+            selects.append(f"SELECT {column} AS id FROM {source} {where}")
+        con.execute(f"""
+            INSERT INTO {table}
+            SELECT
+                id,
+                (SELECT COALESCE(MAX({key_col}), 0) FROM {table})
+                    + CAST(ROW_NUMBER() OVER (ORDER BY id) AS INTEGER)
+            FROM ({" UNION ALL ".join(selects)}) src
+            WHERE id NOT IN (SELECT {id_col} FROM {table})
+            GROUP BY id
+        """, params)
+        counts[table] = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    return counts
+
+
+def update_daily_active_rollup(con: duckdb.DuckDBPyConnection, since: datetime | None = None) -> int:
+    """
+    daily_active_rollup 갱신 (since가 속한 KST 일자부터 다시 집계, None이면 전체 재생성) — 롤업 행 수 반환
+
+    하루의 집합은 그날 이벤트 전체로 다시 만들어 INSERT OR REPLACE하므로 일자 경계에 걸친 배치도 안전합니다.
+
+    dbt int_daily_active_rollup과 같은 롤업입니다. 이 테이블은 dbt 없이 원본 DB를 읽는
+    05_sql_queries/daily_active_users.sql(WAU / MAU)용으로 로더가 소유하고, dbt 모델은 mart_daily_kpi용으로
+    stg_events에서 계산합니다. activity_date(KST 일자)와 테스트 계정 제외를 같은 규칙으로 맞춰
+    두 쪽의 WAU / MAU가 같으므로, 정의를 바꿀 때는 두 곳을 함께 바꿉니다.
+    """
+    if since is None:
+        con.execute("DROP TABLE IF EXISTS daily_active_rollup")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS daily_active_rollup (
+            activity_date DATE,          -- KST 일자
+            platform VARCHAR,
+            app_version VARCHAR,
+            active_users INTEGER[],      -- 로그인 사용자 user_key (정렬)
+            senders INTEGER[],           -- 송금 완료 사용자 user_key (정렬)
+            PRIMARY KEY (activity_date, platform, app_version)
+        )
+    """)
+    con.execute(f"""
+        INSERT OR REPLACE INTO daily_active_rollup
+        SELECT
+            {EVENT_DATE_KST},
+            e.platform,
+            e.app_version,
+            COALESCE(
+                LIST_SORT(LIST(DISTINCT k.user_key) FILTER (WHERE e.event_name = '{ACTIVITY_EVENT}')),
+                CAST([] AS INTEGER[])
+            ),
+            COALESCE(
+                LIST_SORT(LIST(DISTINCT k.user_key) FILTER (WHERE e.event_name = '{SENDER_EVENT}')),
+                CAST([] AS INTEGER[])
+            )
+        FROM events e
+        JOIN user_keys k ON e.user_id = k.user_id
+        WHERE e.event_name IN ('{ACTIVITY_EVENT}', '{SENDER_EVENT}')
+          AND e.user_id NOT LIKE '{TEST_USER_PATTERN}'
+          -- since가 속한 KST 일자의 시작(UTC)부터 → 다시 집계하는 일자는 그날 이벤트 전체로 교체
+          {"AND e.event_timestamp >= CAST(CAST(CAST(? AS TIMESTAMP) + INTERVAL 9 HOUR AS DATE) AS TIMESTAMP) - INTERVAL 9 HOUR"
+           if since else ""}
+        GROUP BY 1, 2, 3
+    """, [since] if since else [])
+    return con.execute("SELECT COUNT(*) FROM daily_active_rollup").fetchone()[0]
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 정렬된 일자별 Parquet
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+def write_clustered_partitions(con: duckdb.DuckDBPyConnection, since: datetime | None = None) -> int:
+    """
+    events를 클러스터링 순서로 일자별 Parquet에 기록 (since가 속한 일자부터, None이면 전체) — 기록 행 수 반환
+
+    다시 쓰는 일자의 디렉터리는 먼저 지우므로 같은 일자를 여러 번 기록해도 파일이 중복되지 않습니다.
+    """
+    since_date = since.date() if since else None
+    if since_date is None and CLUSTERED_EVENTS_DIR.exists():
+        shutil.rmtree(CLUSTERED_EVENTS_DIR)
+    CLUSTERED_EVENTS_DIR.mkdir(parents=True, exist_ok=True)
+    if since_date:
+        for part_dir in CLUSTERED_EVENTS_DIR.glob("event_date=*"):
+            if part_dir.name.split("=", 1)[1] >= since_date.isoformat():
+                shutil.rmtree(part_dir)
+
+    where = f"WHERE event_timestamp >= CAST(DATE '{since_date}' AS TIMESTAMP)" if since_date else ""
+    return con.execute(f"""
+        COPY (
+            SELECT *, CAST(event_timestamp AS DATE) AS event_date
+            FROM events
+            {where}
+            ORDER BY {TABLES["events"]["cluster"]}
+        ) TO '{CLUSTERED_EVENTS_DIR}' (FORMAT PARQUET, PARTITION_BY (event_date), COMPRESSION ZSTD, OVERWRITE_OR_IGNORE)
+    """).fetchone()[0]
+
+
+def load_to_duckdb(fmt: str = "csv", incremental: bool = False, write_partitioned: bool = False,
+                   lookback_days: int = DEFAULT_LOOKBACK_DAYS):
+    """CSV/Parquet 데이터를 DuckDB에 적재"""
+    con = duckdb.connect(str(DB_PATH))
+    # 원천 타임스탬프는 UTC — 세션 시각(now() 등)도 UTC로 고정
+    con.execute("SET TimeZone = 'UTC'")
+    ensure_watermark_table(con)
+    # 비트셋 / 롤업은 이번 배치의 events만 반영하므로 적재 전 워터마크(- lookback)를 기억
+    # (lookback 구간에 늦게 들어온 행도 반영되도록 증분 적재와 같은 시작점 사용, 두 갱신 모두 재반영에 안전)
+    derived_ready = all(table_exists(con, t) for t in ("user_activity_bitmap", "daily_active_rollup"))
+    events_since = (
+        _lookback_start(get_watermark(con, "events"), lookback_days) if incremental and derived_ready else None
+    )
+    # 대리 키는 원천별 워터마크(- lookback) 이후 행에서만 신규 ID를 찾음
+    keys_since = (
+        {table: _lookback_start(get_watermark(con, table), lookback_days) for table in TABLES}
+        if incremental else None
+    )
+
+    for table, spec in TABLES.items():
+        if incremental:
+            watermark = get_watermark(con, table)
+            print(f"{spec['icon']} {table} 증분 적재... (watermark: {watermark or '-'})")
+            con.begin()
+            count, too_old = incremental_load(con, table, fmt, lookback_days)
+            con.commit()
+            print(f"   ✅ +{count:,}건")
+            if too_old:
+                print(f"   ⚠️  lookback({lookback_days}일)보다 오래된 미적재 행 {too_old:,}건 건너뜀 (전체 적재로 반영)")
+        else:
+            print(f"{spec['icon']} {table} 테이블 적재...")
+            count = full_load(con, table, fmt)
+            print(f"   ✅ {count:,}건")
+
+    print("🧮 user_activity_bitmap 갱신..." + (f" (events {events_since} 이후)" if events_since else " (전체)"))
+    con.begin()
+    count = update_activity_bitmap(con, events_since)
+    con.commit()
+    print(f"   ✅ {count:,}명")
+
+    print("🔑 대리 키 매핑 갱신...")
+    con.begin()
+    counts = update_surrogate_keys(con, keys_since)
+    con.commit()
+    print("   ✅ " + ", ".join(f"{table} {count:,}" for table, count in counts.items()))
+
+    print("🧮 daily_active_rollup 갱신...")
+    con.begin()
+    rollups = update_daily_active_rollup(con, events_since)
+    con.commit()
+    print(f"   ✅ {rollups:,}행")
+
+    if write_partitioned:
+        # 파티션이 아직 없으면 증분 적재라도 전체 기록
+        partitions_since = events_since if CLUSTERED_EVENTS_DIR.exists() else None
+        print("🗂️  정렬된 일자별 Parquet 기록..." + (f" ({partitions_since:%Y-%m-%d} 이후)" if partitions_since else " (전체)"))
+        rows = write_clustered_partitions(con, partitions_since)
+        print(f"   ✅ {rows:,}행 → {CLUSTERED_EVENTS_DIR}")
+
     # ━━━ 인덱스 및 통계 ━━━
     print("\n📋 테이블 요약:")
-    for table in ["users", "events", "transactions"]:
+    for table in TABLES:
         count = con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
         cols = con.execute(f"SELECT * FROM {table} LIMIT 0").description
-        print(f"   {table}: {count:,}건, {len(cols)}개 컬럼")
-    
+        watermark = get_watermark(con, table)
+        suffix = f", watermark {watermark}" if watermark else ""
+        print(f"   {table}: {count:,}건, {len(cols)}개 컬럼{suffix}")
+
     con.close()
     print(f"\n💾 DB 저장: {DB_PATH}")
     print(f"   크기: {DB_PATH.stat().st_size / 1024 / 1024:.1f} MB")
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="QuickPay DB 적재")
+    parser.add_argument(
+        "--format", choices=["csv", "parquet"], default="csv",
+        help="원천 데이터 형식 (생성기의 --format과 동일하게 지정)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="워터마크 이후 데이터만 append (키 기준 중복 제거, 재실행 멱등)",
+    )
+    parser.add_argument(
+        "--lookback-days", type=int, default=DEFAULT_LOOKBACK_DAYS,
+        help="증분 적재 시 워터마크보다 며칠 앞부터 다시 읽을지 (지연 도착 여유)",
+    )
+    parser.add_argument(
+        "--write-partitioned", action="store_true",
+        help="(일자, event_name, user_id) 순으로 정렬한 일자별 events Parquet도 기록 (data/events_clustered/)",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    load_to_duckdb()
+    args = parse_args()
+    load_to_duckdb(args.format, incremental=args.incremental, write_partitioned=args.write_partitioned,
+                   lookback_days=args.lookback_days)
@@ -0,0 +1,149 @@
+"""
+쿼리 결과 캐시 (적재 버전 기준)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+같은 집계를 하루에도 여러 번 실행하는 작업(볼륨 이상 탐지 DAG, 품질 검증, Tableau 내보내기)이
+결과를 공유하도록, 쿼리 결과를 Parquet 파일로 디스크에 보관합니다.
+
+캐시 키:
+  - 정규화한 SQL: 블록(/* */) / 줄(--) 주석 제거, 공백 압축, 대소문자 통일 (문자열 리터럴 / 따옴표 식별자는 그대로)
+    → 들여쓰기만 다른 같은 쿼리는 같은 키
+  - 데이터 버전 토큰: load_to_db.py가 적재마다 갱신하는 load_watermarks의
+    (테이블, watermark, row_count, loaded_at) → 적재가 한 번이라도 일어나면 키가 바뀌어 자동 무효화
+  - load_watermarks가 없는 DB(로더 외 경로로 만든 DB)는 버전을 알 수 없으므로 캐시하지 않고 그대로 실행
+
+저장 / 축출:
+  - 결과는 DuckDB COPY ... TO로 <키>.parquet(zstd)에 기록 (임시 파일 → rename이라 동시 실행에도 안전)
+  - 적중 시 파일 mtime을 갱신하고, 저장 후 전체 크기가 max_bytes를 넘으면 mtime이 오래된 것부터 삭제 (LRU)
+  - 무효화된(이전 버전) 항목은 다시 읽히지 않으므로 LRU 순서상 먼저 축출됨
+
+사용법:
+  from query_cache import QueryCache
+  table = QueryCache().fetch(con, "SELECT ...")                  # pyarrow.Table
+  table = QueryCache().fetch(con, "SELECT ...", sources=["events"])  # events 적재에만 무효화
+"""
+
+import hashlib
+import os
+import re
+import threading
+import uuid
+from pathlib import Path
+
+import duckdb
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+CACHE_DIR = DATA_DIR / "query_cache"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 문자열 리터럴('...') / 따옴표 식별자("...") / 블록 주석 / 줄 주석을 앞에서부터 한 번에 토큰화
+# → 주석 안의 따옴표나 리터럴 안의 "--", "/*"도 올바르게 구분됨
+_TOKENS = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|/\*.*?\*/|--[^\n]*""", re.DOTALL)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """캐시 키용 SQL 정규화: 블록 / 줄 주석 제거, 공백 압축, 소문자화, 끝의 세미콜론 제거 (따옴표 안은 그대로)"""
+    parts, code, pos = [], [], 0
+    for match in _TOKENS.finditer(sql):
+        token = match.group()
+        code.append(sql[pos:match.start()])
+        if token.startswith(("/*", "--")):
+            code.append(" ")
+        else:
+            parts += [_WHITESPACE.sub(" ", "".join(code)).lower(), token]
+            code = []
+        pos = match.end()
+    code.append(sql[pos:])
+    parts.append(_WHITESPACE.sub(" ", "".join(code)).lower())
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+class QueryCache:
+    """
+    정규화 SQL + 적재 버전 토큰을 키로 하는 Parquet 결과 캐시
+
+    여러 스레드(DuckDB 커서별)에서 같은 인스턴스를 써도 되도록 적중 / 미스 집계만 잠금으로 보호합니다.
+    """
+
+    def __init__(self, cache_dir: Path = CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def data_version(self, con: duckdb.DuckDBPyConnection, sources: list[str] | None = None) -> str | None:
+        """load_watermarks 기준 데이터 버전 토큰 (sources가 있으면 해당 테이블만, 테이블이 없으면 None)"""
+        where = f"WHERE table_name IN ({', '.join('?' for _ in sources)})" if sources else ""
+        try:
+            rows = con.execute(f"""
+                SELECT table_name, watermark, row_count, loaded_at
+                FROM load_watermarks
+                {where}
+                ORDER BY table_name
+            """, sources or []).fetchall()
+        except duckdb.CatalogException:
+            return None
+        return "|".join(",".join(str(value) for value in row) for row in rows) or None
+
+    def key(self, sql: str, version: str) -> str:
+        return hashlib.sha256(f"{normalize_sql(sql)}\0{version}".encode()).hexdigest()
+
+    def fetch(self, con: duckdb.DuckDBPyConnection, sql: str, sources: list[str] | None = None) -> pa.Table:
+        """
+        쿼리 결과를 pyarrow.Table로 반환 (같은 데이터 버전의 결과가 있으면 실행하지 않음)
+
+        sources: 결과가 의존하는 적재 테이블 목록 (None이면 load_watermarks 전체 → 어떤 적재든 무효화)
+        """
+        version = self.data_version(con, sources)
+        if version is None:
+            self._count(hit=False)
+            return con.execute(sql).fetch_arrow_table()
+
+        path = self.cache_dir / f"{self.key(sql, version)}.parquet"
+        try:
+            table = pq.read_table(path)
+            os.utime(path)  # LRU: 최근 사용 시각 갱신
+            self._count(hit=True)
+            return table
+        except FileNotFoundError:
+            pass
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp")
+        con.execute(f"COPY ({sql}) TO '{tmp_path}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+        os.replace(tmp_path, path)
+        self._count(hit=False)
+        self.evict()
+        return pq.read_table(path)
+
+    def evict(self) -> int:
+        """전체 크기가 max_bytes 이하가 될 때까지 가장 오래 쓰지 않은 항목부터 삭제 — 삭제한 파일 수 반환"""
+        entries = []
+        for path in self.cache_dir.glob("*.parquet"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # 다른 프로세스가 먼저 삭제
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def _count(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def summary(self) -> str:
+        return f"적중 {self.hits} / 미스 {self.misses}"
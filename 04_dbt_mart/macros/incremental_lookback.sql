@@ -0,0 +1,11 @@
+/*
+  incremental_lookback — 증분 모델 재계산 시작 일자
+  ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+  기존 모델({{ this }})의 최신 일자에서 lookback_days만큼 앞당긴 일자를 반환
+  → 지연 도착 데이터가 들어올 수 있는 최근 구간만 delete+insert로 다시 계산
+  (lookback보다 늦게 도착한 데이터는 dbt run --full-refresh로 반영)
+*/
+
+{% macro incremental_lookback_start(column, lookback_days=var('lookback_days')) %}
+    (SELECT CAST(MAX({{ column }}) - INTERVAL '{{ lookback_days }} days' AS DATE) FROM {{ this }})
+{% endmacro %}
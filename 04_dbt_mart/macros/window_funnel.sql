@@ -0,0 +1,53 @@
+/*
+  window_funnel — 순서형 퍼널 (사용자별 단계 도달 시각)
+  ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+  steps(이벤트명 목록) 순서대로, 이전 단계 도달 시각 이후의 첫 이벤트를 다음 단계 도달로 인정
+  1단계 시각 + window_days를 넘긴 단계와 그 이후 단계는 미도달(NULL)
+  (06_tableau_dashboard/funnel_engine.py와 같은 규칙)
+
+  결과 컬럼: user_col(기본 user_id, 정수 키면 user_key), step_1_at ... step_N_at, funnel_depth
+  단계 이벤트만 한 번 걸러 두고 단계마다 ASOF JOIN으로 전진하므로 원천 스캔은 1회
+*/
+
+{% macro window_funnel(relation, steps, window_days=var('funnel_window_days'), user_col='user_id', ts_col='event_timestamp_kst', event_col='event_name') %}
+    WITH funnel_events AS (
+        SELECT
+            {{ user_col }},
+            {{ ts_col }} AS event_ts,
+            CASE {{ event_col }}
+                {%- for step in steps %}
+                WHEN '{{ step }}' THEN {{ loop.index }}
+                {%- endfor %}
+            END AS step
+        FROM {{ relation }}
+        WHERE {{ event_col }} IN ({% for step in steps %}'{{ step }}'{{ ", " if not loop.last }}{% endfor %})
+    ),
+
+    step_1 AS (
+        SELECT {{ user_col }}, MIN(event_ts) AS step_1_at
+        FROM funnel_events
+        WHERE step = 1
+        GROUP BY 1
+    )
+    {%- for i in range(2, steps | length + 1) %},
+
+    step_{{ i }} AS (
+        SELECT
+            p.*,
+            -- 이전 단계가 NULL이면 ASOF JOIN이 임의의 이벤트와 짝지을 수 있으므로 다시 확인
+            CASE
+                WHEN e.event_ts >= p.step_{{ i - 1 }}_at
+                 AND e.event_ts <= p.step_1_at + INTERVAL '{{ window_days }} days'
+                THEN e.event_ts
+            END AS step_{{ i }}_at
+        FROM step_{{ i - 1 }} p
+        ASOF LEFT JOIN (SELECT {{ user_col }}, event_ts FROM funnel_events WHERE step = {{ i }}) e
+            ON p.{{ user_col }} = e.{{ user_col }} AND e.event_ts >= p.step_{{ i - 1 }}_at
+    )
+    {%- endfor %}
+
+    SELECT
+        *,
+        {% for i in range(1, steps | length + 1) %}(step_{{ i }}_at IS NOT NULL)::INTEGER{{ " + " if not loop.last }}{% endfor %} AS funnel_depth
+    FROM step_{{ steps | length }}
+{% endmacro %}
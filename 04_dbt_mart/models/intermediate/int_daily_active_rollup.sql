@@ -0,0 +1,44 @@
+/*
+  int_daily_active_rollup — 일간 활성 사용자 롤업 (일자 × 플랫폼 × 앱 버전)
+  ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+  행마다 그날 활성 사용자의 user_key 집합(정렬된 INTEGER 리스트)을 저장
+    - active_users: 로그인 완료 사용자 (DAU / WAU / MAU)
+    - senders: 송금 완료 사용자 (North Star: Weekly Active Senders)
+  집합은 합집합으로 병합되므로 임의 기간·세그먼트의 정확한 고유 사용자 수 =
+    LEN(LIST_DISTINCT(FLATTEN(LIST(active_users))))  -- 기간 내 롤업 행만 읽음, events 스캔 없음
+  증분: 최근 lookback_days 일자만 다시 집계해 activity_date 단위로 교체 (delete+insert)
+
+  같은 롤업을 load_to_db.py의 daily_active_rollup도 적재 시 갱신합니다.
+    - 이 모델: mart_daily_kpi(wau_7d / mau_30d / Weekly Active Senders)용 (dbt 계보·테스트 안에서 stg_events로 계산)
+    - 로더 테이블: dbt 없이 원본 DB를 읽는 05_sql_queries/daily_active_users.sql용
+  두 쪽 모두 activity_date = KST 일자(event_date_kst), 테스트 계정 제외로 규칙이 같아 결과가 일치하므로,
+  롤업 정의를 바꿀 때는 두 곳을 함께 바꿉니다.
+*/
+
+{{
+    config(
+        materialized='incremental',
+        unique_key='activity_date',
+        incremental_strategy='delete+insert'
+    )
+}}
+
+SELECT
+    e.event_date_kst AS activity_date,
+    e.platform,
+    e.app_version,
+    COALESCE(
+        LIST_SORT(LIST(DISTINCT e.user_key) FILTER (WHERE e.event_name = 'auth_login_completed')),
+        CAST([] AS INTEGER[])
+    ) AS active_users,
+    COALESCE(
+        LIST_SORT(LIST(DISTINCT e.user_key) FILTER (WHERE e.event_name = 'payment_transfer_completed')),
+        CAST([] AS INTEGER[])
+    ) AS senders
+FROM {{ ref('stg_events') }} e
+WHERE e.event_name IN ('auth_login_completed', 'payment_transfer_completed')
+{% if is_incremental() %}
+  AND e.event_date_kst >= {{ incremental_lookback_start('activity_date') }}
+{% endif %}
+GROUP BY 1, 2, 3
+ORDER BY 1, 2, 3
@@ -1,24 +1,36 @@
 /*
   int_daily_active_users — 일간 활성 사용자 집계
   ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-  DAU, 신규/복귀 사용자 구분, 플랫폼별 분리
+  DAU, 신규/복귀 사용자 구분, 플랫폼별 분리 (조인 / 집계 키는 정수 user_key)
+  증분: 최근 lookback_days 일자만 다시 집계해 activity_date 단위로 교체 (delete+insert)
 */
 
+{{
+    config(
+        materialized='incremental',
+        unique_key='activity_date',
+        incremental_strategy='delete+insert'
+    )
+}}
+
 WITH daily_logins AS (
     SELECT
         event_date_kst AS activity_date,
-        user_id,
+        user_key,
         platform,
         MIN(event_timestamp_kst) AS first_activity_at,
         COUNT(*) AS login_count
     FROM {{ ref('stg_events') }}
     WHERE event_name = 'auth_login_completed'
+    {% if is_incremental() %}
+      AND event_date_kst >= {{ incremental_lookback_start('activity_date') }}
+    {% endif %}
     GROUP BY 1, 2, 3
 ),
 
 user_signup AS (
     SELECT
-        user_id,
+        user_key,
         signup_date
     FROM {{ ref('stg_users') }}
 ),
@@ -26,7 +38,7 @@ user_signup AS (
 enriched AS (
     SELECT
         dl.activity_date,
-        dl.user_id,
+        dl.user_key,
         dl.platform,
         dl.login_count,
         us.signup_date,
@@ -35,12 +47,12 @@ enriched AS (
             ELSE 'returning'
         END AS user_type
     FROM daily_logins dl
-    LEFT JOIN user_signup us ON dl.user_id = us.user_id
+    LEFT JOIN user_signup us ON dl.user_key = us.user_key
 )
 
 SELECT
     activity_date,
-    user_id,
+    user_key,
     platform,
     user_type,
     login_count,
@@ -0,0 +1,50 @@
+/*
+  int_user_activity_bitmap — 사용자별 활동 일자 비트셋
+  ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+  activity_bits의 N번째 비트 = 가입 후 N일째(KST) 로그인 여부 (N < 64, UBIGINT)
+  리텐션(D1~D30, day-N 커브)은 사용자당 1행인 이 모델에서 비트 연산으로 계산
+  증분: 최근 lookback_days 로그인만 다시 집계해 기존 비트와 OR 병합 (user_key 단위 delete+insert)
+
+  같은 비트셋을 load_to_db.py의 user_activity_bitmap(user_id 기준)도 적재 시 갱신합니다.
+    - 이 모델: mart_retention / int_user_cohort용 (dbt 계보·테스트 안에서 stg_events로 계산)
+    - 로더 테이블: dbt 없이 원본 DB를 읽는 05_sql_queries/retention_analysis.sql, Tableau 리텐션 내보내기용
+  두 쪽 모두 KST 일자(event_date_kst)와 테스트 계정 제외 규칙이 같아 결과가 일치하므로,
+  비트 정의를 바꿀 때는 두 곳을 함께 바꿉니다.
+*/
+
+{{
+    config(
+        materialized='incremental',
+        unique_key='user_key',
+        incremental_strategy='delete+insert'
+    )
+}}
+
+WITH new_activity AS (
+    SELECT
+        e.user_key,
+        u.signup_date,
+        BIT_OR(CAST(1 AS UBIGINT) << (e.event_date_kst - u.signup_date)) AS activity_bits,
+        MAX(e.event_date_kst) AS last_activity_date
+    FROM {{ ref('stg_events') }} e
+    INNER JOIN {{ ref('stg_users') }} u ON e.user_key = u.user_key
+    WHERE e.event_name = 'auth_login_completed'
+      AND e.event_date_kst - u.signup_date BETWEEN 0 AND 63
+    {% if is_incremental() %}
+      AND e.event_date_kst >= {{ incremental_lookback_start('last_activity_date') }}
+    {% endif %}
+    GROUP BY 1, 2
+)
+
+{% if is_incremental() %}
+-- 기존 비트와 OR 병합 (같은 일자를 다시 반영해도 결과 동일)
+SELECT
+    n.user_key,
+    n.signup_date,
+    n.activity_bits | COALESCE(t.activity_bits, CAST(0 AS UBIGINT)) AS activity_bits,
+    GREATEST(n.last_activity_date, t.last_activity_date) AS last_activity_date
+FROM new_activity n
+LEFT JOIN {{ this }} t ON n.user_key = t.user_key
+{% else %}
+SELECT * FROM new_activity
+{% endif %}
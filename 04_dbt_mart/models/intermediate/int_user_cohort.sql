@@ -2,10 +2,19 @@
   int_user_cohort — 가입 코호트별 리텐션 분석용 중간 테이블
   ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
   가입 주차 기준으로 코호트를 나누고, N-day 재방문 여부를 플래그 처리
+  사용자당 1행: 활동 비트셋(int_user_activity_bitmap)의 N번째 비트로 플래그를 한 번에 계산
+  (활동 일자별로 행이 늘어나지 않으므로 mart_retention에서 사용자별 재집계 불필요)
 */
 
+{{
+    config(
+        materialized='table'
+    )
+}}
+
 WITH user_base AS (
     SELECT
+        user_key,
         user_id,
         signup_date,
         signup_week,
@@ -15,41 +24,31 @@ WITH user_base AS (
 ),
 
 user_activity AS (
-    SELECT DISTINCT
-        user_id,
-        event_date_kst AS activity_date
-    FROM {{ ref('stg_events') }}
-    WHERE event_name = 'auth_login_completed'
-),
-
-cohort_activity AS (
     SELECT
-        ub.user_id,
-        ub.signup_date,
-        ub.signup_week,
-        ub.signup_month,
-        ub.platform,
-        ua.activity_date,
-        ua.activity_date - ub.signup_date AS days_since_signup
-    FROM user_base ub
-    LEFT JOIN user_activity ua ON ub.user_id = ua.user_id
+        user_key,
+        activity_bits,
+        last_activity_date
+    FROM {{ ref('int_user_activity_bitmap') }}
 )
 
 SELECT
-    user_id,
-    signup_date,
-    signup_week,
-    signup_month,
-    platform,
-    activity_date,
-    days_since_signup,
+    ub.user_key,
+    ub.user_id,
+    ub.signup_date,
+    ub.signup_week,
+    ub.signup_month,
+    ub.platform,
+    ua.last_activity_date,
+    
+    -- 가입 후 30일 내 활동 일수 (day 0~30 비트 수)
+    COALESCE(BIT_COUNT(ua.activity_bits & CAST(2147483647 AS UBIGINT)), 0) AS active_days_30d,
     
     -- N-Day 리텐션 플래그
-    MAX(CASE WHEN days_since_signup = 1 THEN 1 ELSE 0 END) AS retained_d1,
-    MAX(CASE WHEN days_since_signup = 3 THEN 1 ELSE 0 END) AS retained_d3,
-    MAX(CASE WHEN days_since_signup = 7 THEN 1 ELSE 0 END) AS retained_d7,
-    MAX(CASE WHEN days_since_signup = 14 THEN 1 ELSE 0 END) AS retained_d14,
-    MAX(CASE WHEN days_since_signup = 30 THEN 1 ELSE 0 END) AS retained_d30
+    CAST(COALESCE((ua.activity_bits >> 1) & 1, 0) AS INTEGER) AS retained_d1,
+    CAST(COALESCE((ua.activity_bits >> 3) & 1, 0) AS INTEGER) AS retained_d3,
+    CAST(COALESCE((ua.activity_bits >> 7) & 1, 0) AS INTEGER) AS retained_d7,
+    CAST(COALESCE((ua.activity_bits >> 14) & 1, 0) AS INTEGER) AS retained_d14,
+    CAST(COALESCE((ua.activity_bits >> 30) & 1, 0) AS INTEGER) AS retained_d30
 
-FROM cohort_activity
-GROUP BY 1, 2, 3, 4, 5, 6, 7
+FROM user_base ub
+LEFT JOIN user_activity ua ON ub.user_key = ua.user_key
@@ -3,18 +3,36 @@
   ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
   Tableau 대시보드의 메인 데이터 소스
   DAU, MAU, 거래 건수, GMV, 수수료 매출 등 핵심 지표를 일자별 집계
+  증분: 최근 lookback_days 일자만 다시 계산해 date 단위로 교체 (delete+insert)
+       7일/30일 롤링 지표는 int_daily_active_rollup의 일간 사용자 집합을 병합해 계산
+       (재계산 일자 이전 29일의 롤업 행만 읽음)
 */
 
+{{
+    config(
+        materialized='incremental',
+        unique_key='date',
+        incremental_strategy='delete+insert'
+    )
+}}
+
+{% if is_incremental() %}
+    {% set start_date = incremental_lookback_start('date') %}
+{% endif %}
+
 WITH daily_users AS (
     SELECT
         activity_date,
-        COUNT(DISTINCT user_id) AS dau,
-        COUNT(DISTINCT CASE WHEN user_type = 'new' THEN user_id END) AS new_users,
-        COUNT(DISTINCT CASE WHEN user_type = 'returning' THEN user_id END) AS returning_users,
-        COUNT(DISTINCT CASE WHEN platform = 'ios' THEN user_id END) AS dau_ios,
-        COUNT(DISTINCT CASE WHEN platform = 'android' THEN user_id END) AS dau_android,
-        COUNT(DISTINCT CASE WHEN platform = 'web' THEN user_id END) AS dau_web
+        COUNT(DISTINCT user_key) AS dau,
+        COUNT(DISTINCT CASE WHEN user_type = 'new' THEN user_key END) AS new_users,
+        COUNT(DISTINCT CASE WHEN user_type = 'returning' THEN user_key END) AS returning_users,
+        COUNT(DISTINCT CASE WHEN platform = 'ios' THEN user_key END) AS dau_ios,
+        COUNT(DISTINCT CASE WHEN platform = 'android' THEN user_key END) AS dau_android,
+        COUNT(DISTINCT CASE WHEN platform = 'web' THEN user_key END) AS dau_web
     FROM {{ ref('int_daily_active_users') }}
+    {% if is_incremental() %}
+    WHERE activity_date >= {{ start_date }}
+    {% endif %}
     GROUP BY 1
 ),
 
@@ -51,21 +69,31 @@ daily_transactions AS (
         ) AS success_rate
         
     FROM {{ ref('stg_transactions') }}
+    {% if is_incremental() %}
+    WHERE transaction_date >= {{ start_date }}
+    {% endif %}
     GROUP BY 1
 ),
 
--- 7일 / 30일 Rolling MAU
+-- 7일 / 30일 Rolling 활성 사용자: 일간 롤업(user_key 집합) 최대 30일치를 합집합으로 병합
 rolling_users AS (
     SELECT
         du.activity_date,
-        COUNT(DISTINCT all_users.user_id) AS wau_7d,
-        (SELECT COUNT(DISTINCT u2.user_id)
-         FROM {{ ref('int_daily_active_users') }} u2
-         WHERE u2.activity_date BETWEEN du.activity_date - INTERVAL '29 days' AND du.activity_date
-        ) AS mau_30d
-    FROM (SELECT DISTINCT activity_date FROM {{ ref('int_daily_active_users') }}) du
-    LEFT JOIN {{ ref('int_daily_active_users') }} all_users
-        ON all_users.activity_date BETWEEN du.activity_date - INTERVAL '6 days' AND du.activity_date
+        LEN(LIST_DISTINCT(FLATTEN(
+            LIST(r.active_users) FILTER (WHERE r.activity_date >= du.activity_date - INTERVAL '6 days')
+        ))) AS wau_7d,
+        LEN(LIST_DISTINCT(FLATTEN(LIST(r.active_users)))) AS mau_30d,
+        LEN(LIST_DISTINCT(FLATTEN(
+            LIST(r.senders) FILTER (WHERE r.activity_date >= du.activity_date - INTERVAL '6 days')
+        ))) AS weekly_active_senders
+    FROM (
+        SELECT DISTINCT activity_date FROM {{ ref('int_daily_active_users') }}
+        {% if is_incremental() %}
+        WHERE activity_date >= {{ start_date }}
+        {% endif %}
+    ) du
+    INNER JOIN {{ ref('int_daily_active_rollup') }} r
+        ON r.activity_date BETWEEN du.activity_date - INTERVAL '29 days' AND du.activity_date
     GROUP BY 1
 )
 
@@ -86,6 +114,7 @@ SELECT
     du.dau_web,
     ru.wau_7d,
     ru.mau_30d,
+    ru.weekly_active_senders,
     ROUND(du.dau * 100.0 / NULLIF(ru.mau_30d, 0), 2) AS stickiness_ratio,
     
     -- 거래 지표
@@ -3,8 +3,18 @@
   ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
   Tableau 매출 대시보드의 데이터 소스
   월별 ARPPU, 수수료 매출, 거래 유형별 분석
+  증분: 유니크 사용자 / 중앙값은 합산이 불가능하므로 월 단위로 통째로 다시 계산
+       (최신 월 + 월초 지연 도착 대비 직전 월만 transaction_month 단위로 교체)
 */
 
+{{
+    config(
+        materialized='incremental',
+        unique_key='transaction_month',
+        incremental_strategy='delete+insert'
+    )
+}}
+
 WITH monthly_revenue AS (
     SELECT
         transaction_month,
@@ -21,14 +31,17 @@ WITH monthly_revenue AS (
         SUM(CASE WHEN status = 'completed' THEN fee ELSE 0 END) AS fee_revenue,
         
         -- 유니크 사용자
-        COUNT(DISTINCT user_id) AS unique_users,
-        COUNT(DISTINCT CASE WHEN status = 'completed' AND fee > 0 THEN user_id END) AS paying_users,
+        COUNT(DISTINCT user_key) AS unique_users,
+        COUNT(DISTINCT CASE WHEN status = 'completed' AND fee > 0 THEN user_key END) AS paying_users,
         
         -- 평균
         AVG(CASE WHEN status = 'completed' THEN amount END) AS avg_amount,
         PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY CASE WHEN status = 'completed' THEN amount END) AS median_amount
         
     FROM {{ ref('stg_transactions') }}
+    {% if is_incremental() %}
+    WHERE transaction_month >= (SELECT CAST(MAX(transaction_month) - INTERVAL '1 month' AS DATE) FROM {{ this }})
+    {% endif %}
     GROUP BY 1, 2
 ),
 
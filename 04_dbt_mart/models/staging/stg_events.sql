@@ -2,13 +2,31 @@
   stg_events — 이벤트 로그 스테이징
   ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
   원본 events 테이블에서:
-  - 타임스탬프 파싱 및 KST 변환
+  - KST 변환 (events는 적재 시점에 TIMESTAMP / ENUM / typed prop_* 로 고정됨)
   - 봇/테스트 계정 제외
   - 필드명 표준화
+  - 정수 대리 키 (user_key / device_key / session_key / merchant_key, 적재 시 부여된 매핑 조인)
+    → 하위 모델의 조인과 COUNT(DISTINCT)는 문자열 ID 대신 정수 키로 계산
+
+  물리 테이블(증분)로 materialize하고 event_date_kst, event_name 순으로 정렬해 적재
+  → 하위 모델은 KST 변환 / SPLIT_PART를 다시 계산하지 않고, 일자·이벤트명 필터가 zone map으로 pruning됨
+  증분: 최근 lookback_days KST 일자만 원본에서 다시 읽어 event_date_kst 단위로 교체 (delete+insert)
 */
 
+{{
+    config(
+        materialized='incremental',
+        unique_key='event_date_kst',
+        incremental_strategy='delete+insert'
+    )
+}}
+
 WITH source AS (
     SELECT * FROM {{ source('raw', 'events') }}
+    {% if is_incremental() %}
+    -- KST 일자 경계를 UTC로 환산해 원본 event_timestamp에서 바로 필터 (원본 zone map 활용)
+    WHERE event_timestamp >= CAST({{ incremental_lookback_start('event_date_kst') }} AS TIMESTAMP) - INTERVAL '9 hours'
+    {% endif %}
 ),
 
 cleaned AS (
@@ -17,17 +35,20 @@ cleaned AS (
         event_name,
         
         -- 타임스탬프 처리
-        CAST(event_timestamp AS TIMESTAMP) AS event_timestamp_utc,
-        CAST(event_timestamp AS TIMESTAMP) + INTERVAL '9 hours' AS event_timestamp_kst,
-        CAST(DATE_TRUNC('day', CAST(event_timestamp AS TIMESTAMP) + INTERVAL '9 hours') AS DATE) AS event_date_kst,
-        EXTRACT(HOUR FROM CAST(event_timestamp AS TIMESTAMP) + INTERVAL '9 hours') AS event_hour_kst,
+        event_timestamp AS event_timestamp_utc,
+        event_timestamp + INTERVAL '9 hours' AS event_timestamp_kst,
+        CAST(DATE_TRUNC('day', event_timestamp + INTERVAL '9 hours') AS DATE) AS event_date_kst,
+        EXTRACT(HOUR FROM event_timestamp + INTERVAL '9 hours') AS event_hour_kst,
         
-        CAST(received_at AS TIMESTAMP) AS received_at,
+        received_at,
         
         -- 사용자/세션 정보
-        user_id,
-        session_id,
-        device_id,
+        s.user_id,
+        uk.user_key,
+        s.session_id,
+        sk.session_key,
+        s.device_id,
+        dk.device_key,
         platform,
         app_version,
         os_version,
@@ -37,22 +58,28 @@ cleaned AS (
         SPLIT_PART(event_name, '_', 1) AS event_domain,
         
         -- 주요 이벤트 속성 (flatten)
-        TRY_CAST(prop_amount AS BIGINT) AS amount,
+        prop_amount AS amount,
         prop_screen_name AS screen_name,
         prop_merchant_id AS merchant_id,
+        mk.merchant_key,
         prop_merchant_category AS merchant_category,
         prop_error_code AS error_code,
         prop_signup_method AS signup_method,
         prop_transfer_type AS transfer_type,
-        TRY_CAST(prop_fee AS BIGINT) AS fee,
-        TRY_CAST(prop_latency_ms AS INTEGER) AS latency_ms
+        prop_fee AS fee,
+        prop_latency_ms AS latency_ms
         
-    FROM source
+    FROM source s
+    LEFT JOIN {{ source('raw', 'user_keys') }} uk ON s.user_id = uk.user_id
+    LEFT JOIN {{ source('raw', 'session_keys') }} sk ON s.session_id = sk.session_id
+    LEFT JOIN {{ source('raw', 'device_keys') }} dk ON s.device_id = dk.device_id
+    LEFT JOIN {{ source('raw', 'merchant_keys') }} mk ON s.prop_merchant_id = mk.merchant_id
     WHERE
         -- 테스트 계정 제외
-        user_id NOT LIKE 'usr_test%'
+        s.user_id NOT LIKE 'usr_test%'
         -- null event_name 제외
         AND event_name IS NOT NULL
 )
 
 SELECT * FROM cleaned
+ORDER BY event_date_kst, event_name
@@ -5,6 +5,7 @@
   - 금액 표준화 (음수 방지)
   - 상태 코드 매핑
   - 거래일자 파생
+  - 정수 대리 키 (user_key / merchant_key)
 */
 
 WITH source AS (
@@ -14,7 +15,8 @@ WITH source AS (
 cleaned AS (
     SELECT
         transaction_id,
-        user_id,
+        s.user_id,
+        uk.user_key,
         transaction_type,
         
         -- 금액 표준화
@@ -37,17 +39,17 @@ cleaned AS (
         bank_name,
         
         -- 시간
-        CAST(created_at AS TIMESTAMP) AS created_at,
-        CAST(DATE_TRUNC('day', CAST(created_at AS TIMESTAMP)) AS DATE) AS transaction_date,
-        CAST(DATE_TRUNC('month', CAST(created_at AS TIMESTAMP)) AS DATE) AS transaction_month,
-        EXTRACT(HOUR FROM CAST(created_at AS TIMESTAMP)) AS transaction_hour,
-        EXTRACT(DOW FROM CAST(created_at AS TIMESTAMP)) AS transaction_dow,
-        CAST(completed_at AS TIMESTAMP) AS completed_at,
+        created_at,
+        CAST(DATE_TRUNC('day', created_at) AS DATE) AS transaction_date,
+        CAST(DATE_TRUNC('month', created_at) AS DATE) AS transaction_month,
+        EXTRACT(HOUR FROM created_at) AS transaction_hour,
+        EXTRACT(DOW FROM created_at) AS transaction_dow,
+        completed_at,
         
         -- 처리 시간 (초)
         CASE
             WHEN completed_at IS NOT NULL 
-            THEN EXTRACT(EPOCH FROM CAST(completed_at AS TIMESTAMP) - CAST(created_at AS TIMESTAMP))
+            THEN EXTRACT(EPOCH FROM completed_at - created_at)
             ELSE NULL
         END AS processing_seconds,
         
@@ -55,13 +57,16 @@ cleaned AS (
         error_code,
         
         -- 가맹점 정보 (QR 결제)
-        merchant_id,
+        s.merchant_id,
+        mk.merchant_key,
         merchant_category
         
-    FROM source
+    FROM source s
+    LEFT JOIN {{ source('raw', 'user_keys') }} uk ON s.user_id = uk.user_id
+    LEFT JOIN {{ source('raw', 'merchant_keys') }} mk ON s.merchant_id = mk.merchant_id
     WHERE
         amount > 0
-        AND user_id IS NOT NULL
+        AND s.user_id IS NOT NULL
 )
 
 SELECT * FROM cleaned
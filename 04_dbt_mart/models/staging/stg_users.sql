@@ -1,6 +1,7 @@
 /*
   stg_users — 사용자 데이터 스테이징
   ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+  정수 대리 키 (user_key / device_key) 포함
 */
 
 WITH source AS (
@@ -8,8 +9,10 @@ WITH source AS (
 )
 
 SELECT
-    user_id,
-    device_id,
+    s.user_id,
+    uk.user_key,
+    s.device_id,
+    dk.device_key,
     platform,
     device_model,
     CAST(signup_date AS DATE) AS signup_date,
@@ -20,5 +23,7 @@ SELECT
     -- 가입 경과일 (현재 기준)
     CURRENT_DATE - CAST(signup_date AS DATE) AS days_since_signup
 
-FROM source
-WHERE user_id NOT LIKE 'usr_test%'
+FROM source s
+LEFT JOIN {{ source('raw', 'user_keys') }} uk ON s.user_id = uk.user_id
+LEFT JOIN {{ source('raw', 'device_keys') }} dk ON s.device_id = dk.device_id
+WHERE s.user_id NOT LIKE 'usr_test%'
@@ -1,91 +1,129 @@
 /*
   가입→첫송금 전환 퍼널 분석
   ━━━━━━━━━━━━━━━━━━━━━━━━━━
-  6단계 퍼널의 단계별 전환율과 이탈률을 분석
+  6단계 퍼널의 단계별 전환율과 이탈률, 단계 간 소요 시간을 분석
+
+  순서형 퍼널 (04_dbt_mart/macros/window_funnel.sql, 06_tableau_dashboard/funnel_engine.py와 같은 규칙):
+    - k단계 = (k-1)단계 도달 시각 이후의 첫 k단계 이벤트 (순서가 어긋난 이벤트는 전환 아님)
+    - 가입 시작 후 7일(KPI-02 전환 윈도) 안에 도달한 단계만 인정
+    - 퍼널 이벤트만 한 번 걸러 user_funnel에 두고 ①~③이 재사용 (events 스캔 1회)
 */
 
--- ① 전체 퍼널 전환율
-WITH user_funnel AS (
+-- ⓪ 사용자별 단계 도달 시각 (단계마다 ASOF JOIN: 이전 단계 이후 가장 가까운 이벤트)
+CREATE OR REPLACE TEMP TABLE user_funnel AS
+WITH funnel_events AS (
     SELECT
         user_id,
-        MAX(CASE WHEN event_name = 'auth_signup_started' THEN 1 ELSE 0 END) AS step1,
-        MAX(CASE WHEN event_name = 'auth_signup_submitted' THEN 1 ELSE 0 END) AS step2,
-        MAX(CASE WHEN event_name = 'auth_signup_completed' THEN 1 ELSE 0 END) AS step3,
-        MAX(CASE WHEN event_name = 'auth_identity_verified' THEN 1 ELSE 0 END) AS step4,
-        MAX(CASE WHEN event_name = 'payment_transfer_started' THEN 1 ELSE 0 END) AS step5,
-        MAX(CASE WHEN event_name = 'payment_transfer_completed' THEN 1 ELSE 0 END) AS step6
+        platform,
+        event_timestamp AS event_ts,
+        CASE event_name
+            WHEN 'auth_signup_started' THEN 1
+            WHEN 'auth_signup_submitted' THEN 2
+            WHEN 'auth_signup_completed' THEN 3
+            WHEN 'auth_identity_verified' THEN 4
+            WHEN 'payment_transfer_started' THEN 5
+            WHEN 'payment_transfer_completed' THEN 6
+        END AS step
     FROM events
     WHERE event_name IN (
         'auth_signup_started', 'auth_signup_submitted', 'auth_signup_completed',
         'auth_identity_verified', 'payment_transfer_started', 'payment_transfer_completed'
     )
+),
+
+step_1 AS (
+    SELECT
+        user_id,
+        ARG_MIN(platform, event_ts) AS platform,  -- 퍼널 시작 플랫폼
+        MIN(event_ts) AS step_1_at
+    FROM funnel_events
+    WHERE step = 1
     GROUP BY 1
+),
+
+step_2 AS (
+    SELECT p.*, CASE WHEN e.event_ts >= p.step_1_at AND e.event_ts <= p.step_1_at + INTERVAL '7 days' THEN e.event_ts END AS step_2_at
+    FROM step_1 p
+    ASOF LEFT JOIN (SELECT user_id, event_ts FROM funnel_events WHERE step = 2) e
+        ON p.user_id = e.user_id AND e.event_ts >= p.step_1_at
+),
+
+step_3 AS (
+    SELECT p.*, CASE WHEN e.event_ts >= p.step_2_at AND e.event_ts <= p.step_1_at + INTERVAL '7 days' THEN e.event_ts END AS step_3_at
+    FROM step_2 p
+    ASOF LEFT JOIN (SELECT user_id, event_ts FROM funnel_events WHERE step = 3) e
+        ON p.user_id = e.user_id AND e.event_ts >= p.step_2_at
+),
+
+step_4 AS (
+    SELECT p.*, CASE WHEN e.event_ts >= p.step_3_at AND e.event_ts <= p.step_1_at + INTERVAL '7 days' THEN e.event_ts END AS step_4_at
+    FROM step_3 p
+    ASOF LEFT JOIN (SELECT user_id, event_ts FROM funnel_events WHERE step = 4) e
+        ON p.user_id = e.user_id AND e.event_ts >= p.step_3_at
+),
+
+step_5 AS (
+    SELECT p.*, CASE WHEN e.event_ts >= p.step_4_at AND e.event_ts <= p.step_1_at + INTERVAL '7 days' THEN e.event_ts END AS step_5_at
+    FROM step_4 p
+    ASOF LEFT JOIN (SELECT user_id, event_ts FROM funnel_events WHERE step = 5) e
+        ON p.user_id = e.user_id AND e.event_ts >= p.step_4_at
+),
+
+step_6 AS (
+    SELECT p.*, CASE WHEN e.event_ts >= p.step_5_at AND e.event_ts <= p.step_1_at + INTERVAL '7 days' THEN e.event_ts END AS step_6_at
+    FROM step_5 p
+    ASOF LEFT JOIN (SELECT user_id, event_ts FROM funnel_events WHERE step = 6) e
+        ON p.user_id = e.user_id AND e.event_ts >= p.step_5_at
+)
+
+SELECT * FROM step_6;
+
+
+-- ① 전체 퍼널 전환율
+WITH totals AS (
+    SELECT
+        COUNT(step_1_at) AS s1, COUNT(step_2_at) AS s2, COUNT(step_3_at) AS s3,
+        COUNT(step_4_at) AS s4, COUNT(step_5_at) AS s5, COUNT(step_6_at) AS s6
+    FROM user_funnel
 )
 
 SELECT
     'Step 1: 가입 시작' AS funnel_step,
-    SUM(step1) AS users,
-    ROUND(SUM(step1) * 100.0 / SUM(step1), 1) AS pct_from_start,
+    s1 AS users,
+    100.0 AS pct_from_start,
     100.0 AS pct_from_prev
-FROM user_funnel
+FROM totals
 UNION ALL
-SELECT
-    'Step 2: 정보 제출',
-    SUM(step2),
-    ROUND(SUM(step2) * 100.0 / SUM(step1), 1),
-    ROUND(SUM(step2) * 100.0 / SUM(step1), 1)
-FROM user_funnel
+SELECT 'Step 2: 정보 제출', s2, ROUND(s2 * 100.0 / s1, 1), ROUND(s2 * 100.0 / s1, 1) FROM totals
 UNION ALL
-SELECT
-    'Step 3: 가입 완료',
-    SUM(step3),
-    ROUND(SUM(step3) * 100.0 / SUM(step1), 1),
-    ROUND(SUM(step3) * 100.0 / SUM(step2), 1)
-FROM user_funnel
+SELECT 'Step 3: 가입 완료', s3, ROUND(s3 * 100.0 / s1, 1), ROUND(s3 * 100.0 / s2, 1) FROM totals
 UNION ALL
-SELECT
-    'Step 4: 본인인증',
-    SUM(step4),
-    ROUND(SUM(step4) * 100.0 / SUM(step1), 1),
-    ROUND(SUM(step4) * 100.0 / SUM(step3), 1)
-FROM user_funnel
+SELECT 'Step 4: 본인인증', s4, ROUND(s4 * 100.0 / s1, 1), ROUND(s4 * 100.0 / s3, 1) FROM totals
 UNION ALL
-SELECT
-    'Step 5: 첫 송금 시도',
-    SUM(step5),
-    ROUND(SUM(step5) * 100.0 / SUM(step1), 1),
-    ROUND(SUM(step5) * 100.0 / SUM(step4), 1)
-FROM user_funnel
+SELECT 'Step 5: 첫 송금 시도', s5, ROUND(s5 * 100.0 / s1, 1), ROUND(s5 * 100.0 / s4, 1) FROM totals
 UNION ALL
-SELECT
-    'Step 6: 첫 송금 완료',
-    SUM(step6),
-    ROUND(SUM(step6) * 100.0 / SUM(step1), 1),
-    ROUND(SUM(step6) * 100.0 / SUM(step5), 1)
-FROM user_funnel;
+SELECT 'Step 6: 첫 송금 완료', s6, ROUND(s6 * 100.0 / s1, 1), ROUND(s6 * 100.0 / s5, 1) FROM totals;
 
 
--- ② 플랫폼별 퍼널 비교
-WITH user_funnel_platform AS (
-    SELECT
-        user_id,
-        platform,
-        MAX(CASE WHEN event_name = 'auth_signup_started' THEN 1 ELSE 0 END) AS started,
-        MAX(CASE WHEN event_name = 'auth_signup_completed' THEN 1 ELSE 0 END) AS completed,
-        MAX(CASE WHEN event_name = 'payment_transfer_completed' THEN 1 ELSE 0 END) AS transferred
-    FROM events
-    WHERE event_name IN (
-        'auth_signup_started', 'auth_signup_completed', 'payment_transfer_completed'
-    )
-    GROUP BY 1, 2
-)
+-- ② 플랫폼별 퍼널 비교 (퍼널 시작 플랫폼 기준)
 SELECT
     platform,
-    SUM(started) AS signup_started,
-    SUM(completed) AS signup_completed,
-    SUM(transferred) AS first_transfer,
-    ROUND(SUM(completed) * 100.0 / NULLIF(SUM(started), 0), 1) AS signup_rate,
-    ROUND(SUM(transferred) * 100.0 / NULLIF(SUM(started), 0), 1) AS full_conversion_rate
-FROM user_funnel_platform
+    COUNT(step_1_at) AS signup_started,
+    COUNT(step_3_at) AS signup_completed,
+    COUNT(step_6_at) AS first_transfer,
+    ROUND(COUNT(step_3_at) * 100.0 / NULLIF(COUNT(step_1_at), 0), 1) AS signup_rate,
+    ROUND(COUNT(step_6_at) * 100.0 / NULLIF(COUNT(step_1_at), 0), 1) AS full_conversion_rate
+FROM user_funnel
 GROUP BY 1
 ORDER BY full_conversion_rate DESC;
+
+
+-- ③ 단계 간 소요 시간 (이전 단계 → 이 단계, 분)
+SELECT
+    ROUND(MEDIAN(EXTRACT(EPOCH FROM step_2_at - step_1_at) / 60), 1) AS median_min_step_2,
+    ROUND(MEDIAN(EXTRACT(EPOCH FROM step_3_at - step_2_at) / 60), 1) AS median_min_step_3,
+    ROUND(MEDIAN(EXTRACT(EPOCH FROM step_4_at - step_3_at) / 60), 1) AS median_min_step_4,
+    ROUND(MEDIAN(EXTRACT(EPOCH FROM step_5_at - step_4_at) / 60), 1) AS median_min_step_5,
+    ROUND(MEDIAN(EXTRACT(EPOCH FROM step_6_at - step_5_at) / 60), 1) AS median_min_step_6,
+    ROUND(QUANTILE_CONT(EXTRACT(EPOCH FROM step_6_at - step_1_at) / 3600, 0.9), 1) AS p90_hours_to_first_transfer
+FROM user_funnel;
@@ -5,12 +5,18 @@
   
   사용법:
     duckdb data/quickpay.duckdb < 05_sql_queries/daily_active_users.sql
+
+  롤링 지표(②~④)는 load_to_db.py가 적재 시 갱신하는 daily_active_rollup을 병합해 계산
+  (일자 × platform × app_version별 사용자 키(user_key) 집합 → 합집합 크기 = 정확한 고유 사용자 수)
+
+  일자는 모두 KST 기준 (dbt stg_events의 event_date_kst와 동일) — daily_active_rollup은
+  dbt int_daily_active_rollup과 같은 정의라 WAU / MAU가 mart_daily_kpi와 일치
 */
 
 -- ① 일간 DAU + 신규/복귀 구분
 WITH daily_logins AS (
     SELECT
-        CAST(event_timestamp AS DATE) AS login_date,
+        CAST(event_timestamp + INTERVAL 9 HOUR AS DATE) AS login_date,  -- KST 일자
         user_id,
         platform
     FROM events
@@ -41,40 +47,38 @@ GROUP BY 1
 ORDER BY 1;
 
 
--- ② 7일 Rolling WAU
+-- ② 7일 / 30일 Rolling 활성 사용자 + North Star (Weekly Active Senders)
+--    daily_active_rollup(일자 × 플랫폼 × 앱 버전별 사용자 키(user_key) 집합)을 최대 30일치만 병합
+WITH days AS (
+    SELECT DISTINCT activity_date FROM daily_active_rollup
+)
 SELECT
-    login_date,
-    dau,
-    SUM(dau) OVER (ORDER BY login_date ROWS BETWEEN 6 PRECEDING AND CURRENT ROW) AS wau_7d_sum,
-    AVG(dau) OVER (ORDER BY login_date ROWS BETWEEN 6 PRECEDING AND CURRENT ROW) AS wau_7d_avg
-FROM (
-    SELECT
-        CAST(event_timestamp AS DATE) AS login_date,
-        COUNT(DISTINCT user_id) AS dau
-    FROM events
-    WHERE event_name = 'auth_login_completed'
-    GROUP BY 1
-) daily
-ORDER BY login_date;
+    d.activity_date AS login_date,
+    LEN(LIST_DISTINCT(FLATTEN(LIST(r.active_users) FILTER (WHERE r.activity_date = d.activity_date)))) AS dau,
+    LEN(LIST_DISTINCT(FLATTEN(LIST(r.active_users) FILTER (WHERE r.activity_date > d.activity_date - 7)))) AS wau_7d,
+    LEN(LIST_DISTINCT(FLATTEN(LIST(r.active_users)))) AS mau_30d,
+    LEN(LIST_DISTINCT(FLATTEN(LIST(r.senders) FILTER (WHERE r.activity_date > d.activity_date - 7)))) AS weekly_active_senders
+FROM days d
+JOIN daily_active_rollup r ON r.activity_date BETWEEN d.activity_date - 29 AND d.activity_date
+GROUP BY 1
+ORDER BY 1;
 
 
--- ③ DAU/MAU Stickiness Ratio
-WITH monthly_active AS (
+-- ③ DAU/MAU Stickiness Ratio (월간 MAU도 롤업 병합)
+WITH daily_active AS (
     SELECT
-        DATE_TRUNC('month', CAST(event_timestamp AS DATE)) AS month,
-        COUNT(DISTINCT user_id) AS mau
-    FROM events
-    WHERE event_name = 'auth_login_completed'
-    GROUP BY 1
+        activity_date AS dt,
+        DATE_TRUNC('month', activity_date) AS month,
+        LEN(LIST_DISTINCT(FLATTEN(LIST(active_users)))) AS dau
+    FROM daily_active_rollup
+    GROUP BY 1, 2
 ),
-daily_active AS (
+monthly_active AS (
     SELECT
-        CAST(event_timestamp AS DATE) AS dt,
-        DATE_TRUNC('month', CAST(event_timestamp AS DATE)) AS month,
-        COUNT(DISTINCT user_id) AS dau
-    FROM events
-    WHERE event_name = 'auth_login_completed'
-    GROUP BY 1, 2
+        DATE_TRUNC('month', activity_date) AS month,
+        LEN(LIST_DISTINCT(FLATTEN(LIST(active_users)))) AS mau
+    FROM daily_active_rollup
+    GROUP BY 1
 )
 SELECT
     da.dt,
@@ -83,4 +87,16 @@ SELECT
     ROUND(da.dau * 100.0 / ma.mau, 2) AS stickiness_pct
 FROM daily_active da
 JOIN monthly_active ma ON da.month = ma.month
+WHERE da.dau > 0
 ORDER BY da.dt;
+
+
+-- ④ 앱 버전별 7일 활성 사용자 (최근 일자 기준, 세그먼트도 같은 롤업에서 병합)
+SELECT
+    app_version,
+    LEN(LIST_DISTINCT(FLATTEN(LIST(active_users)))) AS wau_7d,
+    LEN(LIST_DISTINCT(FLATTEN(LIST(senders)))) AS weekly_active_senders
+FROM daily_active_rollup
+WHERE activity_date > (SELECT MAX(activity_date) FROM daily_active_rollup) - 7
+GROUP BY 1
+ORDER BY wau_7d DESC;
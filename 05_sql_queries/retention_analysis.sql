@@ -3,81 +3,71 @@
   ━━━━━━━━━━━━━━━━━
   가입 주차별 코호트의 D1, D3, D7, D14, D30 리텐션율 계산
   → Tableau 히트맵 시각화에 사용
+
+  user_activity_bitmap (load_to_db.py가 적재 시 갱신):
+    사용자별 activity_bits의 N번째 비트 = 가입 후 N일째(KST 일자) 로그인 여부 (N < 64)
+    → dbt int_user_activity_bitmap과 같은 정의라 mart_retention과 같은 리텐션이 나옴
+    → events 조인 / COUNT(DISTINCT) 없이 사용자 수 규모의 입력에서 비트 연산으로 계산
+    → 코호트 크기는 활동 여부와 무관하게 해당 주차 가입자 전체
 */
 
 -- ① Classic Retention (N-Day)
-WITH user_signup AS (
+WITH cohorts AS (
     SELECT
-        user_id,
-        CAST(signup_date AS DATE) AS signup_date,
-        DATE_TRUNC('week', CAST(signup_date AS DATE))::DATE AS cohort_week
-    FROM users
-),
-
-user_activity AS (
-    SELECT DISTINCT
-        user_id,
-        CAST(event_timestamp AS DATE) AS activity_date
-    FROM events
-    WHERE event_name = 'auth_login_completed'
+        DATE_TRUNC('week', CAST(u.signup_date AS DATE))::DATE AS cohort_week,
+        COALESCE(b.activity_bits, 0) AS activity_bits
+    FROM users u
+    LEFT JOIN user_activity_bitmap b ON u.user_id = b.user_id
 ),
 
-cohort_activity AS (
+retained AS (
     SELECT
-        us.user_id,
-        us.cohort_week,
-        ua.activity_date,
-        ua.activity_date - us.signup_date AS days_since_signup
-    FROM user_signup us
-    INNER JOIN user_activity ua ON us.user_id = ua.user_id
+        cohort_week,
+        COUNT(*) AS cohort_size,
+        
+        -- D1 ~ D30 리텐션 (N번째 비트)
+        COUNT(*) FILTER (WHERE (activity_bits >> 1) & 1 = 1) AS d1_users,
+        COUNT(*) FILTER (WHERE (activity_bits >> 3) & 1 = 1) AS d3_users,
+        COUNT(*) FILTER (WHERE (activity_bits >> 7) & 1 = 1) AS d7_users,
+        COUNT(*) FILTER (WHERE (activity_bits >> 14) & 1 = 1) AS d14_users,
+        COUNT(*) FILTER (WHERE (activity_bits >> 30) & 1 = 1) AS d30_users
+    FROM cohorts
+    GROUP BY 1
 )
 
 SELECT
     cohort_week,
-    COUNT(DISTINCT user_id) AS cohort_size,
-    
-    -- D1 ~ D30 리텐션
-    COUNT(DISTINCT CASE WHEN days_since_signup = 1 THEN user_id END) AS d1_users,
-    COUNT(DISTINCT CASE WHEN days_since_signup = 3 THEN user_id END) AS d3_users,
-    COUNT(DISTINCT CASE WHEN days_since_signup = 7 THEN user_id END) AS d7_users,
-    COUNT(DISTINCT CASE WHEN days_since_signup = 14 THEN user_id END) AS d14_users,
-    COUNT(DISTINCT CASE WHEN days_since_signup = 30 THEN user_id END) AS d30_users,
-    
-    ROUND(COUNT(DISTINCT CASE WHEN days_since_signup = 1 THEN user_id END) * 100.0 
-          / COUNT(DISTINCT user_id), 2) AS d1_retention,
-    ROUND(COUNT(DISTINCT CASE WHEN days_since_signup = 3 THEN user_id END) * 100.0 
-          / COUNT(DISTINCT user_id), 2) AS d3_retention,
-    ROUND(COUNT(DISTINCT CASE WHEN days_since_signup = 7 THEN user_id END) * 100.0 
-          / COUNT(DISTINCT user_id), 2) AS d7_retention,
-    ROUND(COUNT(DISTINCT CASE WHEN days_since_signup = 14 THEN user_id END) * 100.0 
-          / COUNT(DISTINCT user_id), 2) AS d14_retention,
-    ROUND(COUNT(DISTINCT CASE WHEN days_since_signup = 30 THEN user_id END) * 100.0 
-          / COUNT(DISTINCT user_id), 2) AS d30_retention
-
-FROM cohort_activity
-GROUP BY 1
+    cohort_size,
+    d1_users,
+    d3_users,
+    d7_users,
+    d14_users,
+    d30_users,
+    ROUND(d1_users * 100.0 / cohort_size, 2) AS d1_retention,
+    ROUND(d3_users * 100.0 / cohort_size, 2) AS d3_retention,
+    ROUND(d7_users * 100.0 / cohort_size, 2) AS d7_retention,
+    ROUND(d14_users * 100.0 / cohort_size, 2) AS d14_retention,
+    ROUND(d30_users * 100.0 / cohort_size, 2) AS d30_retention
+FROM retained
 ORDER BY 1;
 
 
--- ② 리텐션 커브 (Tableau용 long format)
-WITH user_signup AS (
-    SELECT user_id, CAST(signup_date AS DATE) AS signup_date,
-           DATE_TRUNC('week', CAST(signup_date AS DATE))::DATE AS cohort_week
-    FROM users
-),
-user_activity AS (
-    SELECT DISTINCT user_id, CAST(event_timestamp AS DATE) AS activity_date
-    FROM events WHERE event_name = 'auth_login_completed'
+-- ② 리텐션 커브 (Tableau용 long format) — day 0~30 비트를 펼쳐서 집계
+WITH cohorts AS (
+    SELECT
+        DATE_TRUNC('week', CAST(u.signup_date AS DATE))::DATE AS cohort_week,
+        COALESCE(b.activity_bits, 0) AS activity_bits
+    FROM users u
+    LEFT JOIN user_activity_bitmap b ON u.user_id = b.user_id
 ),
 cohort_daily AS (
     SELECT
-        us.cohort_week,
-        ua.activity_date - us.signup_date AS day_n,
-        COUNT(DISTINCT ua.user_id) AS active_users,
-        (SELECT COUNT(DISTINCT user_id) FROM user_signup WHERE cohort_week = us.cohort_week) AS cohort_size
-    FROM user_signup us
-    INNER JOIN user_activity ua ON us.user_id = ua.user_id
-    WHERE ua.activity_date - us.signup_date BETWEEN 0 AND 30
+        c.cohort_week,
+        d.day_n,
+        COUNT(*) FILTER (WHERE (c.activity_bits >> d.day_n) & 1 = 1) AS active_users,
+        COUNT(*) AS cohort_size
+    FROM cohorts c
+    CROSS JOIN range(0, 31) AS d(day_n)
     GROUP BY 1, 2
 )
 SELECT
@@ -87,4 +77,5 @@ SELECT
     cohort_size,
     ROUND(active_users * 100.0 / cohort_size, 2) AS retention_rate
 FROM cohort_daily
+WHERE active_users > 0
 ORDER BY cohort_week, day_n;
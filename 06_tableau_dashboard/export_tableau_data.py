@@ -1,35 +1,193 @@
 """
-Tableau용 CSV 데이터 내보내기
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Tableau용 데이터 내보내기 (CSV / Parquet)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 DuckDB에 적재된 데이터를 Tableau에서 바로 사용할 수 있는 형태로 내보냅니다.
-- daily_kpi.csv: 일간 KPI 요약
-- retention_cohort.csv: 코호트 리텐션 (히트맵용)
-- funnel_data.csv: 퍼널 전환 데이터
-- transaction_summary.csv: 거래 분석 요약
+- daily_kpi: 일간 KPI 요약
+- retention_cohort: 코호트 리텐션 (히트맵용)
+- funnel_data: 퍼널 전환 데이터
+- transaction_summary: 거래 분석 요약
+
+출력 형식:
+  - csv (기본): Tableau Public 수동 업로드용
+  - parquet: DuckDB COPY ... TO로 직접 기록 (pandas 변환 없음), zstd 압축,
+    EXPORT_SCHEMAS의 명시 타입으로 캐스팅 (HUGEINT 합계 → BIGINT 등 Tableau가 읽는 타입)
+
+실행 구조:
+  - 로그인 / 퍼널 이벤트만 필요한 컬럼으로 걸러낸 공유 중간 테이블(memory.export_events)을
+    실행당 한 번 만들고, events를 읽는 내보내기들이 이를 재사용 (events 스캔 1회)
+  - 퍼널은 funnel_engine의 순서형 퍼널(단계 순서 + 전환 윈도, ASOF JOIN)로 계산
+  - 리텐션은 적재 시 갱신되는 user_activity_bitmap(사용자별 활동 비트셋)에서 계산
+  - 전체 daily_kpi는 query_cache(03_data_generation)로 캐시 → 적재(load_watermarks)가 바뀌기 전까지
+    다시 실행해도 KPI 집계를 반복하지 않음
+  - 서로 독립인 내보내기는 스레드 풀에서 DuckDB 커서별로 동시에 실행
+    (소요 시간 ≈ 가장 느린 내보내기 1개)
+
+증분 모드 (--incremental, daily_kpi):
+  - 이전 결과를 상태 DB(data/export_state.duckdb)의 date 키 테이블로 보관
+  - 마지막 실행 이후 새로 들어온 데이터의 최소 일자 - 지연 도착 여유(--lookback-days)부터만
+    다시 계산해 DELETE + INSERT로 병합 → 매일 실행 비용이 전체 이력이 아닌 신규 일자에 비례
+  - 여유 기간보다 더 늦게 도착한 과거 데이터는 반영되지 않으므로 필요 시 상태 DB 삭제 후 전체 재계산
 """
 
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from functools import partial
 from pathlib import Path
 
 import duckdb
 import pandas as pd
 
+from funnel_engine import window_funnel_sql, funnel_summary_sql
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "03_data_generation"))
+from query_cache import QueryCache  # noqa: E402
+
 DATA_DIR = Path(__file__).parent.parent / "data"
 EXPORT_DIR = Path(__file__).parent / "exports"
 DB_PATH = DATA_DIR / "quickpay.duckdb"
+STATE_DB_PATH = DATA_DIR / "export_state.duckdb"
+DEFAULT_LOOKBACK_DAYS = 2
 
+LOGIN_EVENT = "auth_login_completed"
+# 퍼널 단계 (이벤트명, 표시명)
+FUNNEL_STEPS = [
+    ("auth_signup_started", "Step 1: 가입 시작"),
+    ("auth_signup_submitted", "Step 2: 정보 제출"),
+    ("auth_signup_completed", "Step 3: 가입 완료"),
+    ("auth_identity_verified", "Step 4: 본인인증"),
+    ("payment_transfer_started", "Step 5: 첫 송금 시도"),
+    ("payment_transfer_completed", "Step 6: 첫 송금 완료"),
+]
+# 퍼널 전환 윈도 (1단계 이후 이 기간 안에 도달한 단계만 전환으로 인정, KPI-02 기준)
+FUNNEL_WINDOW = timedelta(days=7)
+# 공유 중간 테이블: quickpay DB는 읽기 전용으로 ATTACH하므로 메모리 카탈로그에 생성
+EVENT_BASE = "memory.main.export_events"
+# 증분 daily_kpi 상태 (상태 DB는 export_state로 ATTACH)
+KPI_STATE_TABLE = "export_state.main.daily_kpi"
+KPI_WATERMARK_TABLE = "export_state.main.export_watermarks"
+# daily_kpi 원천 테이블 → 신규 데이터 판별용 타임스탬프 컬럼
+KPI_SOURCES = {"events": "event_timestamp", "transactions": "created_at"}
+# 전체 daily_kpi 결과 캐시 (load_watermarks 버전 기준 → 다음 적재 전까지 재실행 시 재사용)
+QUERY_CACHE = QueryCache()
 
-def export_daily_kpi(con: duckdb.DuckDBPyConnection):
-    """일간 KPI 마트 데이터 내보내기"""
-    query = """
+# Parquet 추출 파일의 컬럼 타입 (내보내기 쿼리의 컬럼 순서와 동일)
+EXPORT_SCHEMAS = {
+    "daily_kpi": {
+        "date": "DATE", "day_name": "VARCHAR",
+        "dau": "INTEGER", "dau_ios": "INTEGER", "dau_android": "INTEGER", "dau_web": "INTEGER",
+        "total_transactions": "INTEGER", "completed_transactions": "INTEGER",
+        "gmv": "BIGINT", "transfer_gmv": "BIGINT", "qr_payment_gmv": "BIGINT", "fee_revenue": "BIGINT",
+        "transfer_count": "INTEGER", "qr_payment_count": "INTEGER",
+        "success_rate": "DOUBLE", "gmv_per_dau": "DOUBLE",
+    },
+    "retention_cohort": {
+        "cohort_week": "DATE", "day_n": "INTEGER", "active_users": "INTEGER",
+        "cohort_size": "INTEGER", "retention_rate": "DOUBLE",
+    },
+    "funnel_data": {
+        "step_order": "INTEGER", "step_name": "VARCHAR", "users": "INTEGER",
+        "pct_from_start": "DOUBLE", "pct_from_prev": "DOUBLE", "median_minutes_from_prev": "DOUBLE",
+    },
+    "transaction_summary": {
+        "month": "DATE", "transaction_type": "VARCHAR", "status": "VARCHAR",
+        "bank_name": "VARCHAR", "merchant_category": "VARCHAR",
+        "hour": "TINYINT", "day_of_week": "TINYINT",
+        "txn_count": "INTEGER", "total_amount": "BIGINT", "total_fee": "BIGINT",
+        "avg_amount": "DOUBLE", "unique_users": "INTEGER",
+    },
+}
+
+
+def _sql_list(values) -> str:
+    return ", ".join(f"'{v}'" for v in values)
+
+
+def connect(incremental: bool = False) -> duckdb.DuckDBPyConnection:
+    """
+    인메모리 연결에 quickpay DB를 읽기 전용으로 ATTACH (중간 테이블은 memory 카탈로그에 기록)
+
+    incremental이면 증분 상태 DB도 export_state로 ATTACH합니다 (쓰기 가능).
+    """
+    con = duckdb.connect()
+    con.execute(f"ATTACH '{DB_PATH}' AS quickpay (READ_ONLY)")
+    if incremental:
+        con.execute(f"ATTACH '{STATE_DB_PATH}' AS export_state")
+    con.execute("USE quickpay")
+    return con
+
+
+def export_cursor(con: duckdb.DuckDBPyConnection) -> duckdb.DuckDBPyConnection:
+    """내보내기 1건용 커서 (커서는 기본 카탈로그를 상속하지 않으므로 다시 USE)"""
+    cursor = con.cursor()
+    cursor.execute("USE quickpay")
+    return cursor
+
+
+def write_export(con: duckdb.DuckDBPyConnection, name: str, query: str, fmt: str,
+                 note: str = "") -> tuple[str, int, str]:
+    """
+    내보내기 쿼리 결과를 <name>.<fmt>로 저장하고 (파일명, 행 수, 비고) 반환
+
+    parquet은 COPY ... TO로 DuckDB에서 바로 기록하므로 결과가 pandas로 올라오지 않습니다.
+    워커 스레드에서 실행되므로 출력하지 않고, 결과는 main()이 완료 순서대로 출력합니다.
+    """
+    path = EXPORT_DIR / f"{name}.{fmt}"
+    if fmt == "parquet":
+        columns = ",\n        ".join(
+            f"CAST({column} AS {sql_type}) AS {column}" for column, sql_type in EXPORT_SCHEMAS[name].items()
+        )
+        rows = con.execute(f"""
+            COPY (
+                SELECT
+                    {columns}
+                FROM ({query})
+            ) TO '{path}' (FORMAT PARQUET, COMPRESSION ZSTD)
+        """).fetchone()[0]
+    else:
+        df = con.execute(query).fetchdf()
+        df.to_csv(path, index=False)
+        rows = len(df)
+    return path.name, rows, note
+
+
+def build_event_base(con: duckdb.DuckDBPyConnection) -> int:
+    """
+    로그인 / 퍼널 이벤트만 (user_key, event_name, platform, event_timestamp, event_date)로 걸러낸 공유 중간 테이블 생성
+
+    user_id는 적재 시 부여된 정수 대리 키(user_keys)로 바꿔 두므로 DAU / 퍼널의 COUNT(DISTINCT)·조인이 정수로 계산됩니다.
+    """
+    event_names = [LOGIN_EVENT] + [name for name, _ in FUNNEL_STEPS]
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {EVENT_BASE} AS
+        SELECT
+            k.user_key,
+            e.event_name,
+            e.platform,
+            e.event_timestamp,
+            CAST(e.event_timestamp AS DATE) AS event_date
+        FROM events e
+        JOIN user_keys k ON e.user_id = k.user_id
+        WHERE e.event_name IN ({_sql_list(event_names)})
+    """)
+    return con.execute(f"SELECT COUNT(*) FROM {EVENT_BASE}").fetchone()[0]
+
+
+def daily_kpi_query(since: date | None = None) -> str:
+    """일간 KPI 쿼리 (since가 있으면 해당 일자 이후만 계산)"""
+    event_filter = f"AND event_date >= DATE '{since}'" if since else ""
+    txn_filter = f"WHERE created_at >= TIMESTAMP '{since}'" if since else ""
+    return f"""
     WITH daily_users AS (
         SELECT
-            CAST(event_timestamp AS DATE) AS dt,
-            COUNT(DISTINCT user_id) AS dau,
-            COUNT(DISTINCT CASE WHEN platform = 'ios' THEN user_id END) AS dau_ios,
-            COUNT(DISTINCT CASE WHEN platform = 'android' THEN user_id END) AS dau_android,
-            COUNT(DISTINCT CASE WHEN platform = 'web' THEN user_id END) AS dau_web
-        FROM events
-        WHERE event_name = 'auth_login_completed'
+            event_date AS dt,
+            COUNT(DISTINCT user_key) AS dau,
+            COUNT(DISTINCT CASE WHEN platform = 'ios' THEN user_key END) AS dau_ios,
+            COUNT(DISTINCT CASE WHEN platform = 'android' THEN user_key END) AS dau_android,
+            COUNT(DISTINCT CASE WHEN platform = 'web' THEN user_key END) AS dau_web
+        FROM {EVENT_BASE}
+        WHERE event_name = '{LOGIN_EVENT}' {event_filter}
         GROUP BY 1
     ),
     daily_txn AS (
@@ -45,6 +203,7 @@ def export_daily_kpi(con: duckdb.DuckDBPyConnection):
             COUNT(CASE WHEN transaction_type = 'qr_payment' AND status = 'completed' THEN 1 END) AS qr_count,
             ROUND(COUNT(CASE WHEN status = 'completed' THEN 1 END) * 100.0 / COUNT(*), 2) AS success_rate
         FROM transactions
+        {txn_filter}
         GROUP BY 1
     )
     SELECT
@@ -68,109 +227,147 @@ def export_daily_kpi(con: duckdb.DuckDBPyConnection):
     LEFT JOIN daily_txn dt ON du.dt = dt.dt
     ORDER BY du.dt
     """
-    df = con.execute(query).fetchdf()
-    df.to_csv(EXPORT_DIR / "daily_kpi.csv", index=False)
-    print(f"   ✅ daily_kpi.csv: {len(df)}행")
-    return df
 
 
-def export_retention_cohort(con: duckdb.DuckDBPyConnection):
-    """코호트 리텐션 데이터 내보내기 (히트맵용)"""
+def export_daily_kpi(con: duckdb.DuckDBPyConnection, fmt: str = "csv") -> tuple[str, int, str]:
+    """
+    일간 KPI 마트 데이터 내보내기
+
+    결과는 QUERY_CACHE에 보관되므로 마지막 적재 이후 다시 실행하면 집계 없이 캐시된 결과를 씁니다.
+    """
+    con.register("cached_daily_kpi", QUERY_CACHE.fetch(con, daily_kpi_query()))
+    try:
+        return write_export(con, "daily_kpi", "SELECT * FROM cached_daily_kpi", fmt)
+    finally:
+        con.unregister("cached_daily_kpi")
+
+
+def _ensure_kpi_state(con: duckdb.DuckDBPyConnection):
+    columns = ",\n            ".join(f"{column} {sql_type}" for column, sql_type in EXPORT_SCHEMAS["daily_kpi"].items())
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {KPI_STATE_TABLE} (
+            {columns},
+            PRIMARY KEY (date)
+        )
+    """)
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {KPI_WATERMARK_TABLE} (
+            table_name VARCHAR PRIMARY KEY,
+            watermark TIMESTAMP,
+            updated_at TIMESTAMP
+        )
+    """)
+
+
+def _recompute_since(con: duckdb.DuckDBPyConnection, lookback_days: int) -> date | None:
+    """
+    다시 계산할 시작 일자
+
+    원천별로 이전 워터마크 이후 신규 행의 최소 타임스탬프를 구하고 lookback만큼 앞당깁니다.
+    워터마크가 없으면(첫 실행) date.min → 전체 계산, 신규 행이 없으면 None.
+    """
+    watermarks = dict(con.execute(f"SELECT table_name, watermark FROM {KPI_WATERMARK_TABLE}").fetchall())
+    if any(watermarks.get(table) is None for table in KPI_SOURCES):
+        return date.min
+    new_minimums = [
+        con.execute(f"SELECT MIN({column}) FROM {table} WHERE {column} > ?", [watermarks[table]]).fetchone()[0]
+        for table, column in KPI_SOURCES.items()
+    ]
+    new_minimums = [ts for ts in new_minimums if ts is not None]
+    if not new_minimums:
+        return None
+    return min(new_minimums).date() - timedelta(days=lookback_days)
+
+
+def export_daily_kpi_incremental(con: duckdb.DuckDBPyConnection, fmt: str = "csv",
+                                 lookback_days: int = DEFAULT_LOOKBACK_DAYS) -> tuple[str, int, str]:
+    """일간 KPI 증분 내보내기: 변경된 일자만 다시 계산해 상태 테이블에 병합한 뒤 전체를 내보냄"""
+    _ensure_kpi_state(con)
+    # 계산 전에 원천 최대 타임스탬프를 고정 (다음 실행의 워터마크)
+    highs = {
+        table: con.execute(f"SELECT MAX({column}) FROM {table}").fetchone()[0]
+        for table, column in KPI_SOURCES.items()
+    }
+    since = _recompute_since(con, lookback_days)
+    
+    if since is None:
+        note = "신규 데이터 없음 → 상태 테이블 그대로 내보내기"
+    else:
+        con.begin()
+        if since == date.min:
+            con.execute(f"DELETE FROM {KPI_STATE_TABLE}")
+            rows = con.execute(f"INSERT INTO {KPI_STATE_TABLE} {daily_kpi_query()}").fetchone()[0]
+        else:
+            con.execute(f"DELETE FROM {KPI_STATE_TABLE} WHERE date >= ?", [since])
+            rows = con.execute(f"INSERT INTO {KPI_STATE_TABLE} {daily_kpi_query(since)}").fetchone()[0]
+        for table, high in highs.items():
+            con.execute(f"INSERT OR REPLACE INTO {KPI_WATERMARK_TABLE} VALUES (?, ?, ?)",
+                        [table, high, datetime.now()])
+        con.commit()
+        scope = "전체" if since == date.min else f"{since} 이후"
+        note = f"{scope} {rows}일 재계산 → 상태 테이블 병합"
+    
+    return write_export(con, "daily_kpi", f"SELECT * FROM {KPI_STATE_TABLE} ORDER BY date", fmt, note)
+
+
+def export_retention_cohort(con: duckdb.DuckDBPyConnection, fmt: str = "csv") -> tuple[str, int, str]:
+    """
+    코호트 리텐션 데이터 내보내기 (히트맵용)
+
+    적재 시 갱신되는 user_activity_bitmap(bit N = 가입 후 N일째(KST) 로그인)에서 비트 연산으로 계산
+    → events 조인 없이 사용자 수 × 31일 규모의 입력만 집계
+    """
     query = """
-    WITH user_signup AS (
-        SELECT user_id, CAST(signup_date AS DATE) AS signup_date,
-               DATE_TRUNC('week', CAST(signup_date AS DATE))::DATE AS cohort_week
-        FROM users
-    ),
-    user_activity AS (
-        SELECT DISTINCT user_id, CAST(event_timestamp AS DATE) AS activity_date
-        FROM events WHERE event_name = 'auth_login_completed'
+    WITH cohorts AS (
+        SELECT
+            DATE_TRUNC('week', CAST(u.signup_date AS DATE))::DATE AS cohort_week,
+            COALESCE(b.activity_bits, 0) AS activity_bits
+        FROM users u
+        LEFT JOIN user_activity_bitmap b ON u.user_id = b.user_id
     ),
     cohort_daily AS (
         SELECT
-            us.cohort_week,
-            ua.activity_date - us.signup_date AS day_n,
-            COUNT(DISTINCT ua.user_id) AS active_users
-        FROM user_signup us
-        INNER JOIN user_activity ua ON us.user_id = ua.user_id
-        WHERE ua.activity_date - us.signup_date BETWEEN 0 AND 30
+            c.cohort_week,
+            d.day_n,
+            COUNT(*) FILTER (WHERE (c.activity_bits >> d.day_n) & 1 = 1) AS active_users,
+            COUNT(*) AS cohort_size
+        FROM cohorts c
+        CROSS JOIN range(0, 31) AS d(day_n)
         GROUP BY 1, 2
-    ),
-    cohort_sizes AS (
-        SELECT cohort_week, COUNT(DISTINCT user_id) AS cohort_size
-        FROM user_signup GROUP BY 1
     )
     SELECT
-        cd.cohort_week,
-        cd.day_n,
-        cd.active_users,
-        cs.cohort_size,
-        ROUND(cd.active_users * 100.0 / cs.cohort_size, 2) AS retention_rate
-    FROM cohort_daily cd
-    JOIN cohort_sizes cs ON cd.cohort_week = cs.cohort_week
-    ORDER BY cd.cohort_week, cd.day_n
+        cohort_week,
+        day_n,
+        active_users,
+        cohort_size,
+        ROUND(active_users * 100.0 / cohort_size, 2) AS retention_rate
+    FROM cohort_daily
+    WHERE active_users > 0
+    ORDER BY cohort_week, day_n
     """
-    df = con.execute(query).fetchdf()
-    df.to_csv(EXPORT_DIR / "retention_cohort.csv", index=False)
-    print(f"   ✅ retention_cohort.csv: {len(df)}행")
-    return df
+    return write_export(con, "retention_cohort", query, fmt)
 
 
-def export_funnel_data(con: duckdb.DuckDBPyConnection):
-    """퍼널 전환 데이터 내보내기"""
-    query = """
-    WITH user_funnel AS (
-        SELECT
-            user_id,
-            MAX(CASE WHEN event_name = 'auth_signup_started' THEN 1 ELSE 0 END) AS step1,
-            MAX(CASE WHEN event_name = 'auth_signup_submitted' THEN 1 ELSE 0 END) AS step2,
-            MAX(CASE WHEN event_name = 'auth_signup_completed' THEN 1 ELSE 0 END) AS step3,
-            MAX(CASE WHEN event_name = 'auth_identity_verified' THEN 1 ELSE 0 END) AS step4,
-            MAX(CASE WHEN event_name = 'payment_transfer_started' THEN 1 ELSE 0 END) AS step5,
-            MAX(CASE WHEN event_name = 'payment_transfer_completed' THEN 1 ELSE 0 END) AS step6
-        FROM events
-        WHERE event_name IN (
-            'auth_signup_started', 'auth_signup_submitted', 'auth_signup_completed',
-            'auth_identity_verified', 'payment_transfer_started', 'payment_transfer_completed'
-        )
-        GROUP BY 1
-    ),
-    totals AS (
-        SELECT SUM(step1) AS s1, SUM(step2) AS s2, SUM(step3) AS s3,
-               SUM(step4) AS s4, SUM(step5) AS s5, SUM(step6) AS s6
-        FROM user_funnel
+def export_funnel_data(con: duckdb.DuckDBPyConnection, fmt: str = "csv") -> tuple[str, int, str]:
+    """퍼널 전환 데이터 내보내기 (순서형 퍼널: 단계별 도달 + 단계 간 소요 시간)"""
+    user_funnel = window_funnel_sql(
+        EVENT_BASE, [name for name, _ in FUNNEL_STEPS], FUNNEL_WINDOW, user_col="user_key"
     )
-    SELECT 1 AS step_order, 'Step 1: 가입 시작' AS step_name, s1 AS users,
-           100.0 AS pct_from_start, 100.0 AS pct_from_prev FROM totals
-    UNION ALL
-    SELECT 2, 'Step 2: 정보 제출', s2, ROUND(s2*100.0/s1,1), ROUND(s2*100.0/s1,1) FROM totals
-    UNION ALL
-    SELECT 3, 'Step 3: 가입 완료', s3, ROUND(s3*100.0/s1,1), ROUND(s3*100.0/s2,1) FROM totals
-    UNION ALL
-    SELECT 4, 'Step 4: 본인인증', s4, ROUND(s4*100.0/s1,1), ROUND(s4*100.0/s3,1) FROM totals
-    UNION ALL
-    SELECT 5, 'Step 5: 첫 송금 시도', s5, ROUND(s5*100.0/s1,1), ROUND(s5*100.0/s4,1) FROM totals
-    UNION ALL
-    SELECT 6, 'Step 6: 첫 송금 완료', s6, ROUND(s6*100.0/s1,1), ROUND(s6*100.0/s5,1) FROM totals
-    ORDER BY step_order
-    """
-    df = con.execute(query).fetchdf()
-    df.to_csv(EXPORT_DIR / "funnel_data.csv", index=False)
-    print(f"   ✅ funnel_data.csv: {len(df)}행")
-    return df
+    query = funnel_summary_sql(user_funnel, [label for _, label in FUNNEL_STEPS])
+    return write_export(con, "funnel_data", query, fmt)
 
 
-def export_transaction_summary(con: duckdb.DuckDBPyConnection):
+def export_transaction_summary(con: duckdb.DuckDBPyConnection, fmt: str = "csv") -> tuple[str, int, str]:
     """거래 분석 요약 데이터 내보내기"""
     query = """
     SELECT
-        DATE_TRUNC('month', CAST(created_at AS TIMESTAMP))::DATE AS month,
+        DATE_TRUNC('month', created_at)::DATE AS month,
         transaction_type,
         status,
         bank_name,
         merchant_category,
-        EXTRACT(HOUR FROM CAST(created_at AS TIMESTAMP)) AS hour,
-        EXTRACT(DOW FROM CAST(created_at AS TIMESTAMP)) AS day_of_week,
+        EXTRACT(HOUR FROM created_at) AS hour,
+        EXTRACT(DOW FROM created_at) AS day_of_week,
         COUNT(*) AS txn_count,
         SUM(amount) AS total_amount,
         SUM(fee) AS total_fee,
@@ -180,32 +377,70 @@ def export_transaction_summary(con: duckdb.DuckDBPyConnection):
     GROUP BY 1, 2, 3, 4, 5, 6, 7
     ORDER BY 1, 2
     """
-    df = con.execute(query).fetchdf()
-    df.to_csv(EXPORT_DIR / "transaction_summary.csv", index=False)
-    print(f"   ✅ transaction_summary.csv: {len(df)}행")
-    return df
+    return write_export(con, "transaction_summary", query, fmt)
+
+
+EXPORTS = [export_daily_kpi, export_retention_cohort, export_funnel_data, export_transaction_summary]
+
 
+def run_export(con: duckdb.DuckDBPyConnection, export, fmt: str):
+    """내보내기 1건을 전용 커서에서 실행"""
+    cursor = export_cursor(con)
+    try:
+        return export(cursor, fmt)
+    finally:
+        cursor.close()
 
-def main():
+
+def main(fmt: str = "csv", incremental: bool = False, lookback_days: int = DEFAULT_LOOKBACK_DAYS):
     EXPORT_DIR.mkdir(parents=True, exist_ok=True)
     
-    print("📊 Tableau용 CSV 데이터 내보내기 시작...")
+    print(f"📊 Tableau용 {fmt.upper()} 데이터 내보내기 시작...")
     print(f"   DB: {DB_PATH}")
     print(f"   출력: {EXPORT_DIR}/\n")
     
-    con = duckdb.connect(str(DB_PATH), read_only=True)
+    con = connect(incremental)
+    
+    base_rows = build_event_base(con)
+    print(f"   🔗 공유 이벤트 베이스 (로그인 + 퍼널): {base_rows:,}행\n")
     
-    export_daily_kpi(con)
-    export_retention_cohort(con)
-    export_funnel_data(con)
-    export_transaction_summary(con)
+    exports = list(EXPORTS)
+    if incremental:
+        exports[exports.index(export_daily_kpi)] = partial(export_daily_kpi_incremental, lookback_days=lookback_days)
+    
+    # 내보내기끼리는 의존성이 없으므로 커서별로 동시에 실행 (출력은 메인 스레드에서 완료 순서대로)
+    with ThreadPoolExecutor(max_workers=len(exports)) as pool:
+        futures = [pool.submit(run_export, con, export, fmt) for export in exports]
+        for future in as_completed(futures):
+            name, rows, note = future.result()
+            print(f"   ✅ {name}: {rows}행" + (f" ({note})" if note else ""))
     
     con.close()
+    if QUERY_CACHE.hits or QUERY_CACHE.misses:
+        print(f"   🗄️  daily_kpi 결과 캐시: {QUERY_CACHE.summary()}")
     
     print("\n✅ Tableau용 데이터 내보내기 완료!")
-    print("📌 다음 단계: Tableau Public Desktop에서 CSV를 열어 대시보드를 만드세요.")
+    print(f"📌 다음 단계: Tableau Desktop에서 {fmt.upper()}를 열어 대시보드를 만드세요.")
     print("   → 상세 가이드: 06_tableau_dashboard/dashboard_design.md")
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Tableau용 데이터 내보내기")
+    parser.add_argument(
+        "--format", choices=["csv", "parquet"], default="csv",
+        help="출력 형식 (parquet: COPY TO 직접 기록, zstd 압축 + 명시 타입)",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="daily_kpi를 변경된 일자만 다시 계산해 상태 DB(data/export_state.duckdb)에 병합",
+    )
+    parser.add_argument(
+        "--lookback-days", type=int, default=DEFAULT_LOOKBACK_DAYS,
+        help="증분 모드에서 지연 도착 데이터를 위해 추가로 다시 계산할 일수",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(fmt=args.format, incremental=args.incremental, lookback_days=args.lookback_days)
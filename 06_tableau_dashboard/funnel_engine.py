@@ -0,0 +1,108 @@
+"""
+순서형 퍼널 엔진 (window_funnel)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+순서가 있는 단계 목록 + 전환 윈도로 사용자별 퍼널 도달 시각을 계산하는 DuckDB SQL을 만듭니다.
+dbt 쪽 04_dbt_mart/macros/window_funnel.sql과 같은 규칙입니다.
+
+규칙:
+  - 1단계: 사용자의 첫 1단계 이벤트 시각
+  - k단계: (k-1)단계 도달 시각 이후(같은 시각 포함) 첫 k단계 이벤트 시각
+  - 1단계 시각 + 윈도를 넘긴 단계와 그 이후 단계는 미도달 (NULL)
+  → 순서를 건너뛰거나 거꾸로 발생한 이벤트는 전환으로 세지 않음
+
+실행 구조:
+  - 이전 단계가 NULL인 행은 ASOF JOIN이 임의의 이벤트와 짝지을 수 있으므로 CASE에서 다시 확인
+  - 원천은 단계 이벤트만 한 번 걸러 funnel_events로 두고, 단계마다 ASOF JOIN으로
+    "(user_id 같고) 이전 단계 시각 이후 가장 가까운 이벤트"를 찾음
+    → 사용자별 타임스탬프 정렬 위에서 한 번씩 전진하는 병합이므로 단계 수가 늘어도
+      원천 전체 스캔은 1회, 퍼널을 추가해도 같은 걸러진 베이스를 재사용
+"""
+
+from datetime import timedelta
+
+DEFAULT_WINDOW = timedelta(days=7)
+
+
+def _interval(window: timedelta) -> str:
+    return f"INTERVAL '{int(window.total_seconds())} seconds'"
+
+
+def window_funnel_sql(
+    source: str,
+    steps: list[str],
+    window: timedelta = DEFAULT_WINDOW,
+    user_col: str = "user_id",
+    ts_col: str = "event_timestamp",
+    event_col: str = "event_name",
+) -> str:
+    """
+    사용자별 단계 도달 시각 쿼리
+
+    결과 컬럼: user_col, step_1_at ... step_N_at (미도달 NULL), funnel_depth (도달한 마지막 단계)
+    """
+    cases = " ".join(f"WHEN '{name}' THEN {i}" for i, name in enumerate(steps, start=1))
+    names = ", ".join(f"'{name}'" for name in steps)
+    ctes = [
+        f"""funnel_events AS (
+        SELECT {user_col}, {ts_col} AS event_ts, CASE {event_col} {cases} END AS step
+        FROM {source}
+        WHERE {event_col} IN ({names})
+    )""",
+        f"""step_1 AS (
+        SELECT {user_col}, MIN(event_ts) AS step_1_at
+        FROM funnel_events
+        WHERE step = 1
+        GROUP BY 1
+    )""",
+    ]
+    for i in range(2, len(steps) + 1):
+        ctes.append(f"""step_{i} AS (
+        SELECT
+            p.*,
+            CASE
+                WHEN e.event_ts >= p.step_{i - 1}_at AND e.event_ts <= p.step_1_at + {_interval(window)}
+                THEN e.event_ts
+            END AS step_{i}_at
+        FROM step_{i - 1} p
+        ASOF LEFT JOIN (SELECT {user_col}, event_ts FROM funnel_events WHERE step = {i}) e
+            ON p.{user_col} = e.{user_col} AND e.event_ts >= p.step_{i - 1}_at
+    )""")
+    depth = " + ".join(f"(step_{i}_at IS NOT NULL)::INTEGER" for i in range(1, len(steps) + 1))
+    with_clause = ",\n    ".join(ctes)
+    return f"""
+    WITH {with_clause}
+    SELECT *, {depth} AS funnel_depth
+    FROM step_{len(steps)}
+    """
+
+
+def funnel_summary_sql(user_funnel: str, labels: list[str]) -> str:
+    """
+    window_funnel_sql 결과(또는 같은 컬럼의 테이블) → 단계별 도달 / 전환율 / 단계 간 소요 시간
+
+    결과 컬럼: step_order, step_name, users, pct_from_start, pct_from_prev,
+              median_minutes_from_prev (이전 단계 → 이 단계 소요 시간 중앙값, 1단계는 NULL)
+    """
+    n = len(labels)
+    reach = ", ".join(f"COUNT(step_{i}_at) AS s{i}" for i in range(1, n + 1))
+    latency = ", ".join(
+        f"MEDIAN(EXTRACT(EPOCH FROM step_{i}_at - step_{i - 1}_at) / 60) AS m{i}" for i in range(2, n + 1)
+    )
+    rows = [
+        f"SELECT 1 AS step_order, '{labels[0]}' AS step_name, s1 AS users, "
+        f"100.0 AS pct_from_start, 100.0 AS pct_from_prev, NULL::DOUBLE AS median_minutes_from_prev FROM totals"
+    ]
+    for i in range(2, n + 1):
+        rows.append(
+            f"SELECT {i}, '{labels[i - 1]}', s{i}, ROUND(s{i}*100.0/s1,1), ROUND(s{i}*100.0/s{i - 1},1), "
+            f"ROUND(m{i},1) FROM totals"
+        )
+    union = "\n    UNION ALL\n    ".join(rows)
+    return f"""
+    WITH totals AS (
+        SELECT {reach}, {latency}
+        FROM ({user_funnel})
+    )
+    {union}
+    ORDER BY step_order
+    """
@@ -3,22 +3,89 @@ QuickPay 데이터 품질 검증 실행기
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 DuckDB 데이터에 대해 품질 검증 규칙을 실행하고 결과를 리포트합니다.
 Great Expectations 없이도 독립 실행 가능한 경량 버전입니다.
+
+규칙 출처:
+  - great_expectations/expectations/*_suite.json → AggregateCheck로 컴파일 (GE 런타임 불필요)
+    (expectation의 meta.severity로 기본 severity, meta.check_name으로 검증명(리포트 키)을 재정의)
+  - define_quality_checks()의 추가 규칙 (null 비율, 교차 테이블, 볼륨 이상 탐지)
+
+실행 계획:
+  - AggregateCheck (null / 유일성 / 도메인 / 범위 / null 비율): 테이블별로 묶어
+    하나의 집계 SELECT로 융합 → 규칙 수와 무관하게 테이블당 1회 스캔
+  - QualityCheck (교차 테이블, 이상 탐지 등): 기존처럼 개별 쿼리로 실행
+  - 서로 독립인 실행 단위는 스레드 풀에서 DuckDB 커서(connection.cursor())별로 동시에 실행
+    (--parallelism으로 동시 실행 수 제한, --timeout 초과 시 해당 쿼리만 interrupt)
+
+근사 모드 (--approx, 사용 중단):
+  - 유일성 / 고유값 비율 규칙을 스케치로 먼저 선별하는 모드는 안전하게 달성할 수 없어 제거했습니다
+    (스케치 오차 폭 미만의 소량 중복을 놓치므로 critical 유일성 규칙은 선별할 수 없고,
+     남는 대상은 warning 고유값 비율 규칙 하나뿐이라 선별로 아낄 비용이 없음)
+  - 모든 규칙은 항상 정확히(COUNT(DISTINCT)) 검증합니다. 기존 스크립트 호환을 위해 플래그는 받되 무시합니다.
+
+증분 모드 (--incremental):
+  - events / transactions의 단일 테이블 규칙은 마지막 성공 워터마크 시각부터의 행만 검증 (경계 시각 포함)
+    (워터마크는 reports/quality_state.json에 저장, critical 실패가 없을 때만 전진)
+  - 유일성은 신규 구간 내부 중복 + 이전에 통과한 키의 bloom filter(reports/seen_keys_*.npz)로
+    과거 이력과의 중복을 판별하고, bloom 양성 후보만 이력 테이블에서 정확히 재확인
+  - 교차 테이블 / 볼륨 이상 탐지 / 행 수 등 테이블 전체 성질은 기존처럼 전체 대상
+
+결과 캐시:
+  - 볼륨 이상 탐지의 일자별 이벤트 수는 query_cache(03_data_generation)로 캐시
+    → 키는 정규화 SQL + load_watermarks 버전이라 다음 적재 전까지는 DAG의 6시간 주기 검사와 결과 공유
+  - 캐시 파일: data/query_cache/*.parquet (LRU 축출)
+
+위반 샘플:
+  - 위반 건수는 SQL COUNT로만 계산하고, 위반 행은 reservoir 샘플(SAMPLE_ROWS행)만 가져옴
+    → 데이터가 얼마나 깨졌든 메모리 사용량 일정
+  - 샘플은 reports/violation_samples_<실행시각>.parquet (check_name, sample_row JSON)에 저장하고
+    JSON 리포트의 각 결과에서 파일명 / 샘플 행 수로 참조
+
+사용법:
+  python 07_data_quality/run_quality_checks.py
+  python 07_data_quality/run_quality_checks.py --parallelism 8 --timeout 300
+  python 07_data_quality/run_quality_checks.py --incremental
 """
 
+import argparse
 import json
+import math
+import sys
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
 import duckdb
-import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "03_data_generation"))
+from query_cache import QueryCache  # noqa: E402
 
 DATA_DIR = Path(__file__).parent.parent / "data"
 DB_PATH = DATA_DIR / "quickpay.duckdb"
 REPORT_DIR = Path(__file__).parent / "reports"
+DEFAULT_PARALLELISM = 4
+# 검증별로 보관하는 위반 행 샘플 수 (reservoir sampling)
+SAMPLE_ROWS = 20
+# 일자별 이벤트 수: 볼륨 이상 탐지(이 스크립트 + dag_data_quality.check_event_volume)가 결과 캐시로 공유
+DAILY_EVENT_VOLUME_QUERY = """
+    SELECT CAST(event_timestamp AS DATE) AS dt, COUNT(*) AS cnt
+    FROM events
+    GROUP BY 1
+"""
+QUERY_CACHE = QueryCache()
 
 
 class QualityCheck:
-    """데이터 품질 검증 규칙"""
+    """
+    데이터 품질 검증 규칙
+
+    query는 위반 행을 반환하는 쿼리입니다 (0행이면 통과).
+    위반 건수는 SQL에서 COUNT로 계산하고, 위반 행은 reservoir 샘플만 가져옵니다.
+    """
     
     def __init__(self, name: str, query: str, expectation: str, severity: str = "warning"):
         self.name = name
@@ -27,146 +94,511 @@ class QualityCheck:
         self.severity = severity  # "critical" or "warning"
         self.passed = None
         self.details = None
+        self.violation_count = None
+        self.samples = []  # 위반 행 샘플 (JSON 문자열, 최대 SAMPLE_ROWS개)
+    
+    def record(self, violations) -> bool:
+        """위반 건수를 검증 결과로 기록"""
+        violations = int(violations or 0)
+        self.violation_count = violations
+        self.passed = violations == 0
+        self.details = "No violations found" if self.passed else f"{violations} violations found"
+        return self.passed
+    
+    def collect_samples(self, con: duckdb.DuckDBPyConnection, rows_query: str):
+        """위반 행 쿼리에서 reservoir 샘플 SAMPLE_ROWS행만 JSON으로 가져옴 (메모리 상한 고정)"""
+        self.samples = [row for (row,) in con.execute(f"""
+            SELECT CAST(to_json(v) AS VARCHAR)
+            FROM ({rows_query}) AS v
+            USING SAMPLE reservoir({SAMPLE_ROWS} ROWS) REPEATABLE (42)
+        """).fetchall()]
     
     def run(self, con: duckdb.DuckDBPyConnection) -> bool:
         try:
-            result = con.execute(self.query).fetchdf()
-            if len(result) == 0:
-                self.passed = True
-                self.details = "No violations found"
-            else:
-                self.passed = False
-                self.details = f"{len(result)} violations found"
-                self.violations = result
+            self.record(con.execute(f"SELECT COUNT(*) FROM ({self.query}) AS v").fetchone()[0])
+            if not self.passed:
+                self.collect_samples(con, self.query)
             return self.passed
         except Exception as e:
-            self.passed = False
-            self.details = f"Error: {str(e)}"
+            return self.fail(e)
+    
+    def fail(self, error: Exception) -> bool:
+        self.passed = False
+        self.details = f"Error: {str(error)}"
+        return False
+
+
+class AggregateCheck(QualityCheck):
+    """
+    테이블 단일 스캔 집계식으로 표현되는 검증 규칙
+
+    violation_expr는 위반 건수를 반환하는 집계식입니다 (0이면 통과).
+    같은 테이블의 AggregateCheck들은 plan_checks()에서 하나의 SELECT로 융합됩니다.
+    rows_query는 위반 행 조회 쿼리 템플릿({source} 치환)으로, 실패 시 샘플 수집에만 사용합니다.
+    """
+    
+    def __init__(self, name: str, table: str, violation_expr: str, expectation: str,
+                 severity: str = "warning", scoped: bool = True, unique_key: str | None = None,
+                 rows_query: str | None = None):
+        super().__init__(
+            name=name,
+            query=f"SELECT {violation_expr} AS violations FROM {table}",
+            expectation=expectation,
+            severity=severity,
+        )
+        self.table = table
+        self.source = table
+        self.violation_expr = violation_expr
+        self.scoped = scoped          # False: 행 수 등 테이블 전체 성질 (증분 모드에서도 전체 대상)
+        self.unique_key = unique_key  # 유일성 규칙의 키 컬럼 (증분 모드의 이력 중복 판별용)
+        self.rows_query = rows_query    # 행 수 / 비율처럼 행 단위 위반이 없는 규칙은 None
+    
+    def scope(self, source: str):
+        """검증 대상을 테이블 대신 부분 집합(서브쿼리)으로 제한"""
+        self.source = source
+        self.query = f"SELECT {self.violation_expr} AS violations FROM {source}"
+    
+    def collect_samples(self, con: duckdb.DuckDBPyConnection, rows_query: str | None = None):
+        if self.rows_query is not None:
+            super().collect_samples(con, self.rows_query.replace("{source}", self.source))
+    
+    def run(self, con: duckdb.DuckDBPyConnection) -> bool:
+        try:
+            if not self.record(con.execute(self.query).fetchone()[0]):
+                self.collect_samples(con)
+            return self.passed
+        except Exception as e:
+            return self.fail(e)
+
+
+class CachedQualityCheck(QualityCheck):
+    """
+    원천 집계(cached_query) 결과를 쿼리 결과 캐시에서 가져와 그 위에서 검증하는 규칙
+
+    query는 캐시된 결과를 {cached} 이름으로 참조합니다.
+    적재 이후 처음 실행될 때만 원천을 스캔하고, 같은 데이터 버전에서는 캐시된 Parquet만 읽습니다.
+    """
+    
+    def __init__(self, name: str, cached_query: str, query: str, expectation: str,
+                 severity: str = "warning", sources: list[str] | None = None, cache: QueryCache | None = None):
+        super().__init__(name=name, query=query.replace("{cached}", f"cached_{name}"),
+                         expectation=expectation, severity=severity)
+        self.cached_query = cached_query
+        self.sources = sources
+        self.cache = cache or QUERY_CACHE
+    
+    def run(self, con: duckdb.DuckDBPyConnection) -> bool:
+        try:
+            con.register(f"cached_{self.name}", self.cache.fetch(con, self.cached_query, self.sources))
+        except Exception as e:
+            return self.fail(e)
+        try:
+            return super().run(con)
+        finally:
+            con.unregister(f"cached_{self.name}")
+
+
+class FusedScan:
+    """같은 테이블(같은 검증 대상)의 AggregateCheck들을 하나의 집계 SELECT로 실행"""
+    
+    def __init__(self, checks: list[AggregateCheck]):
+        self.table = checks[0].table
+        self.checks = checks
+        columns = ",\n    ".join(f"{c.violation_expr} AS c{i}" for i, c in enumerate(checks))
+        self.query = f"SELECT\n    {columns}\nFROM {checks[0].source}"
+    
+    def run(self, con: duckdb.DuckDBPyConnection):
+        try:
+            row = con.execute(self.query).fetchone()
+        except duckdb.InterruptException as e:
+            # 타임아웃으로 중단된 경우 개별 재실행하지 않음
+            for check in self.checks:
+                check.fail(e)
+            return
+        except Exception:
+            # 식 하나가 잘못되면 전체 스캔이 실패하므로, 규칙별 개별 실행으로 오류 위치를 좁힘
+            for check in self.checks:
+                check.run(con)
+            return
+        for check, violations in zip(self.checks, row):
+            if not check.record(violations):
+                check.collect_samples(con)
+
+
+def step_checks(step) -> list[QualityCheck]:
+    """실행 단위(FusedScan 또는 QualityCheck)에 포함된 검증 규칙 목록"""
+    return step.checks if isinstance(step, FusedScan) else [step]
+
+
+def run_step(con: duckdb.DuckDBPyConnection, step, timeout: float | None = None):
+    """
+    실행 단위 하나를 전용 커서에서 실행
+
+    DuckDB 커서는 같은 DB를 공유하는 독립 연결이라 스레드별로 하나씩 사용합니다.
+    timeout(초)이 지나면 해당 커서의 쿼리만 interrupt하고 결과를 타임아웃으로 기록합니다.
+    """
+    cursor = con.cursor()
+    timed_out = threading.Event()
+    
+    def _interrupt():
+        timed_out.set()
+        cursor.interrupt()
+    
+    timer = threading.Timer(timeout, _interrupt) if timeout else None
+    try:
+        if timer:
+            timer.start()
+        step.run(cursor)
+    finally:
+        if timer:
+            timer.cancel()
+        cursor.close()
+    
+    if timed_out.is_set():
+        for check in step_checks(step):
+            check.passed = False
+            check.details = f"Timeout: exceeded {timeout:g}s"
+
+
+def plan_checks(checks: list[QualityCheck]) -> list:
+    """실행 계획: AggregateCheck는 검증 대상(테이블/증분 구간)별 FusedScan으로 묶고, 나머지는 개별 실행"""
+    by_source = defaultdict(list)
+    plan = []
+    for check in checks:
+        if isinstance(check, AggregateCheck):
+            if check.source not in by_source:
+                plan.append(check.source)  # 첫 등장 위치에 스캔 배치
+            by_source[check.source].append(check)
+        else:
+            plan.append(check)
+    return [FusedScan(by_source[step]) if isinstance(step, str) else step for step in plan]
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 증분 검증 (워터마크 + seen-key bloom filter)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 테이블 → (워터마크 컬럼, 유일 키 컬럼)
+INCREMENTAL_TABLES = {
+    "events": ("event_timestamp", "event_id"),
+    "transactions": ("created_at", "transaction_id"),
+}
+BLOOM_ERROR_RATE = 0.01
+BLOOM_MIN_CAPACITY = 1_000_000
+HASH_BATCH_ROWS = 1_000_000
+
+
+class SeenKeyFilter:
+    """
+    이전 검증을 통과한 키의 bloom filter
+
+    키 해시는 DuckDB hash()로 SQL에서 계산하고, 비트 위치는 double hashing
+    (h1 + i·h2)으로 파생합니다. 양성은 "중복일 수도 있음"이므로 호출 측에서
+    이력 테이블로 재확인하고, 음성은 확실히 처음 보는 키입니다.
+    """
+    
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.n_bits = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self.bits = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+        self.count = 0
+    
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        hashes = hashes.astype(np.uint64)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        i = np.arange(self.n_hashes, dtype=np.uint64)
+        return (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.n_bits)
+    
+    def add(self, hashes: np.ndarray):
+        pos = self._positions(hashes).ravel()
+        np.bitwise_or.at(self.bits, pos >> np.uint64(3), np.left_shift(1, pos & np.uint64(7)).astype(np.uint8))
+        self.count += len(hashes)
+    
+    def might_contain(self, hashes: np.ndarray) -> np.ndarray:
+        pos = self._positions(hashes)
+        return ((self.bits[pos >> np.uint64(3)] >> (pos & np.uint64(7)).astype(np.uint8)) & 1).all(axis=1)
+    
+    def save(self, path: Path):
+        np.savez_compressed(path, bits=self.bits,
+                            meta=np.array([self.capacity, self.n_bits, self.n_hashes, self.count]))
+    
+    @classmethod
+    def load(cls, path: Path) -> "SeenKeyFilter":
+        data = np.load(path)
+        capacity, n_bits, n_hashes, count = (int(v) for v in data["meta"])
+        bloom = cls.__new__(cls)
+        bloom.capacity, bloom.n_bits, bloom.n_hashes, bloom.count = capacity, n_bits, n_hashes, count
+        bloom.bits = data["bits"]
+        return bloom
+
+
+def _hash_batches(con: duckdb.DuckDBPyConnection, query: str):
+    """첫 컬럼이 hash(key)인 쿼리 결과를 배치(pyarrow RecordBatch) 단위로 반환 — 메모리 상한 유지"""
+    yield from con.execute(query).fetch_record_batch(HASH_BATCH_ROWS)
+
+
+def _ts_literal(value) -> str:
+    return f"TIMESTAMP '{value}'"
+
+
+class IncrementalScope:
+    """증분 검증 상태 관리 (reports/quality_state.json + 테이블별 seen-key bloom filter)"""
+    
+    def __init__(self, report_dir: Path):
+        self.report_dir = report_dir
+        self.state_path = report_dir / "quality_state.json"
+        self.state = {}
+        if self.state_path.exists():
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+        # hash() 값은 DuckDB 버전 간에 보장되지 않으므로 버전이 바뀌면 처음부터 다시 검증
+        if self.state.get("duckdb_version") != duckdb.__version__:
+            self.state = {"duckdb_version": duckdb.__version__, "tables": {}}
+        self.ranges = {}   # 테이블 → (하한 워터마크 | None, 상한, 신규 행 수)
+        self.filters = {}  # 테이블 → SeenKeyFilter | None
+    
+    def _filter_path(self, table: str) -> Path:
+        return self.report_dir / f"seen_keys_{table}.npz"
+    
+    def _slice(self, table: str) -> str:
+        column, _ = INCREMENTAL_TABLES[table]
+        low, high, _ = self.ranges[table]
+        condition = f"{column} <= {_ts_literal(high)}"
+        if low is not None:
+            # 워터마크와 같은 시각에 늦게 도착한 행도 포함 (이미 검증한 경계 행은 다시 봐도 무해)
+            condition += f" AND {column} >= {_ts_literal(low)}"
+        return condition
+    
+    def prepare(self, con: duckdb.DuckDBPyConnection, checks: list[QualityCheck]):
+        """테이블별 검증 구간(워터마크 시각 ~ 현재 최대) 확정 후 단일 테이블 규칙을 해당 구간으로 제한"""
+        for table, (column, _) in INCREMENTAL_TABLES.items():
+            high = con.execute(f"SELECT MAX({column}) FROM {table}").fetchone()[0]
+            if high is None:
+                continue
+            entry = self.state["tables"].get(table)
+            filter_path = self._filter_path(table)
+            if entry and filter_path.exists():
+                low = entry["watermark"]
+                self.filters[table] = SeenKeyFilter.load(filter_path)
+            else:
+                low = None  # 첫 실행 (또는 상태 유실) → 전체 검증 후 bloom filter 생성
+                self.filters[table] = None
+            self.ranges[table] = (low, str(high), 0)
+            rows = con.execute(f"SELECT COUNT(*) FROM {table} WHERE {self._slice(table)}").fetchone()[0]
+            self.ranges[table] = (low, str(high), rows)
+        
+        for check in checks:
+            if isinstance(check, AggregateCheck) and check.scoped and check.table in self.ranges:
+                check.scope(f"(SELECT * FROM {check.table} WHERE {self._slice(check.table)}) AS {check.table}")
+    
+    def check_history_duplicates(self, con: duckdb.DuckDBPyConnection, checks: list[QualityCheck]):
+        """유일성 규칙: 신규 구간 키 중 이전에 통과한 키와 겹치는 건수를 위반에 추가"""
+        for check in checks:
+            if not isinstance(check, AggregateCheck) or check.violation_count is None:
+                continue
+            if check.table not in self.ranges or check.unique_key != INCREMENTAL_TABLES[check.table][1]:
+                continue
+            bloom = self.filters[check.table]
+            low = self.ranges[check.table][0]
+            if bloom is None or low is None:
+                continue  # 비교할 이력 없음 (전체 구간을 이미 GROUP BY로 검증)
+            
+            key = check.unique_key
+            candidates = []
+            for batch in _hash_batches(
+                con, f"SELECT hash({key}), {key} FROM {check.table} WHERE {self._slice(check.table)}"
+            ):
+                maybe = bloom.might_contain(batch.column(0).to_numpy())
+                if maybe.any():
+                    candidates.extend(np.asarray(batch.column(1).to_pylist(), dtype=object)[maybe].tolist())
+            if not candidates:
+                continue
+            
+            # bloom 양성 후보만 이력 구간에서 정확히 확인 (false positive 제거)
+            # 워터마크 시각의 경계 행은 신규 구간에 포함되어 GROUP BY로 검증되므로 이력은 워터마크 미만만 비교
+            column, _ = INCREMENTAL_TABLES[check.table]
+            duplicates = con.execute(f"""
+                SELECT COUNT(*) FROM {check.table}
+                WHERE {column} < {_ts_literal(low)}
+                  AND {key} IN (SELECT UNNEST(?::VARCHAR[]))
+            """, [candidates]).fetchone()[0]
+            check.record(check.violation_count + duplicates)
+    
+    def commit(self, con: duckdb.DuckDBPyConnection, checks: list[QualityCheck]) -> bool:
+        """critical 실패가 없으면 신규 구간 키를 bloom filter에 추가하고 워터마크 전진"""
+        if any(not c.passed and c.severity == "critical" for c in checks):
             return False
+        for table, (low, high, rows) in self.ranges.items():
+            column, key = INCREMENTAL_TABLES[table]
+            bloom = self.filters[table]
+            if bloom is not None and rows == 0:
+                continue  # 신규 데이터 없음 → 상태 그대로
+            if bloom is None or bloom.count + rows > bloom.capacity:
+                # 첫 실행 또는 용량 초과 → 현재까지의 전체 키로 재생성
+                total = con.execute(
+                    f"SELECT COUNT(*) FROM {table} WHERE {column} <= {_ts_literal(high)}"
+                ).fetchone()[0]
+                bloom = SeenKeyFilter(max(BLOOM_MIN_CAPACITY, 2 * total))
+                condition = f"{column} <= {_ts_literal(high)}"
+            else:
+                condition = self._slice(table)
+            for batch in _hash_batches(con, f"SELECT hash({key}) FROM {table} WHERE {condition}"):
+                bloom.add(batch.column(0).to_numpy())
+            bloom.save(self._filter_path(table))
+            self.state["tables"][table] = {
+                "watermark": high,
+                "rows_checked": rows,
+                "key_filter": self._filter_path(table).name,
+                "updated_at": datetime.now().isoformat(),
+            }
+        with open(self.state_path, "w") as f:
+            json.dump(self.state, f, indent=2)
+        return True
+    
+    def summary(self) -> dict:
+        return {
+            table: {"from": low, "to": high, "rows": rows}
+            for table, (low, high, rows) in self.ranges.items()
+        }
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# Great Expectations 스위트 컴파일
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# great_expectations/expectations/<table>_suite.json의 expectation을 AggregateCheck로 변환합니다.
+# GE 런타임 없이 같은 규칙을 DuckDB 집계식으로 실행하며, 같은 테이블 규칙은 FusedScan으로 융합됩니다.
+GE_SUITE_DIR = Path(__file__).parent / "great_expectations" / "expectations"
+CHECK_PREFIXES = {"transactions": "txn"}  # 검증명 접두어 (기본: 테이블명)
+
+# expectation_type → (검증명 접미어, 기본 severity)
+EXPECTATION_RULES = {
+    "expect_table_row_count_to_be_between": ("row_count", "warning"),
+    "expect_column_values_to_not_be_null": ("not_null_{column}", "critical"),
+    "expect_column_values_to_be_unique": ("unique_{column}", "critical"),
+    "expect_column_values_to_be_in_set": ("valid_{column}", "critical"),
+    "expect_column_values_to_be_between": ("range_{column}", "critical"),
+    "expect_column_values_to_match_regex": ("format_{column}", "warning"),
+    "expect_column_proportion_of_unique_values_to_be_between": ("unique_ratio_{column}", "warning"),
+    "expect_column_pair_values_a_to_be_greater_than_b": ("{column_A}_gte_{column_B}", "warning"),
+}
+
+
+def _sql_literal(value) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def _out_of_range(expr: str, kwargs: dict) -> str:
+    """min_value / max_value (strict_min / strict_max) 위반 조건"""
+    conditions = []
+    if kwargs.get("min_value") is not None:
+        op = "<=" if kwargs.get("strict_min") else "<"
+        conditions.append(f"{expr} {op} {_sql_literal(kwargs['min_value'])}")
+    if kwargs.get("max_value") is not None:
+        op = ">=" if kwargs.get("strict_max") else ">"
+        conditions.append(f"{expr} {op} {_sql_literal(kwargs['max_value'])}")
+    return " OR ".join(conditions) or "FALSE"
+
+
+def compile_expectation(table: str, expectation: dict) -> AggregateCheck | None:
+    """GE expectation 1개 → AggregateCheck (지원하지 않는 타입은 None)"""
+    exp_type = expectation["expectation_type"]
+    kwargs = expectation.get("kwargs", {})
+    meta = expectation.get("meta", {})
+    if exp_type not in EXPECTATION_RULES:
+        return None
+    suffix, severity = EXPECTATION_RULES[exp_type]
+    column = kwargs.get("column")
+    rows_query = None
+    
+    if exp_type == "expect_table_row_count_to_be_between":
+        violation = f"CASE WHEN {_out_of_range('COUNT(*)', kwargs)} THEN 1 ELSE 0 END"
+        description = f"row count should be between {kwargs.get('min_value')} and {kwargs.get('max_value')}"
+    elif exp_type == "expect_column_proportion_of_unique_values_to_be_between":
+        ratio = f"COUNT(DISTINCT {column}) * 1.0 / NULLIF(COUNT({column}), 0)"
+        violation = f"CASE WHEN {_out_of_range(ratio, kwargs)} THEN 1 ELSE 0 END"
+        description = (f"{column} unique ratio should be between "
+                       f"{kwargs.get('min_value')} and {kwargs.get('max_value')}")
+    elif exp_type == "expect_column_values_to_be_unique":
+        violation = f"COUNT({column}) - COUNT(DISTINCT {column})"
+        rows_query = (f"SELECT {column}, COUNT(*) AS occurrences FROM {{source}} "
+                      f"WHERE {column} IS NOT NULL GROUP BY 1 HAVING COUNT(*) > 1")
+        description = f"{column} should be unique"
+    else:
+        # 행 단위(map) expectation: 위반 조건 → 위반 행 수
+        if exp_type == "expect_column_values_to_not_be_null":
+            condition = f"{column} IS NULL"
+            description = f"{column} should never be NULL"
+        elif exp_type == "expect_column_values_to_be_in_set":
+            values = ", ".join(_sql_literal(v) for v in kwargs["value_set"])
+            condition = f"{column} NOT IN ({values})"
+            description = f"{column} should be in the valid set"
+        elif exp_type == "expect_column_values_to_be_between":
+            condition = _out_of_range(column, kwargs)
+            description = f"{column} should be between {kwargs.get('min_value')} and {kwargs.get('max_value')}"
+        elif exp_type == "expect_column_values_to_match_regex":
+            condition = f"NOT regexp_matches({column}, {_sql_literal(kwargs['regex'])})"
+            description = f"{column} should match {kwargs['regex']}"
+        else:  # expect_column_pair_values_a_to_be_greater_than_b
+            op = ">=" if kwargs.get("or_equal") else ">"
+            condition = f"NOT ({kwargs['column_A']} {op} {kwargs['column_B']})"
+            description = f"{kwargs['column_A']} should always be {op} {kwargs['column_B']}"
+        
+        violation = f"COUNT(*) FILTER (WHERE {condition})"
+        rows_query = f"SELECT * FROM {{source}} WHERE {condition}"
+        if kwargs.get("mostly") is not None:
+            # mostly: 위반 비율이 (1 - mostly) 이하면 통과
+            violation = (f"CASE WHEN {violation} > (1 - {kwargs['mostly']}) * COUNT(*) "
+                         f"THEN {violation} ELSE 0 END")
+            description += f" (mostly {kwargs['mostly']})"
+    
+    prefix = CHECK_PREFIXES.get(table, table)
+    return AggregateCheck(
+        name=meta.get("check_name", f"{prefix}_{suffix.format(**kwargs)}"),
+        table=table,
+        violation_expr=violation,
+        expectation=description,
+        severity=meta.get("severity", severity),
+        # 행 수 / 고유값 비율은 테이블 전체의 성질이므로 증분 모드에서도 전체 대상
+        scoped=exp_type not in ("expect_table_row_count_to_be_between",
+                                "expect_column_proportion_of_unique_values_to_be_between"),
+        unique_key=column if exp_type == "expect_column_values_to_be_unique" else None,
+        rows_query=rows_query,
+    )
+
+
+def compile_ge_suites(suite_dir: Path = GE_SUITE_DIR) -> list[AggregateCheck]:
+    """<table>_suite.json 파일들을 읽어 AggregateCheck 목록으로 컴파일"""
+    checks = []
+    for suite_path in sorted(suite_dir.glob("*_suite.json")):
+        table = suite_path.stem.removesuffix("_suite")
+        with open(suite_path, encoding="utf-8") as f:
+            suite = json.load(f)
+        for expectation in suite["expectations"]:
+            check = compile_expectation(table, expectation)
+            if check is None:
+                print(f"   ⚠️  {suite_path.name}: 지원하지 않는 expectation 건너뜀 "
+                      f"({expectation['expectation_type']})")
+                continue
+            checks.append(check)
+    return checks
 
 
 def define_quality_checks() -> list[QualityCheck]:
-    """품질 검증 규칙 정의"""
-    return [
+    """품질 검증 규칙 정의 (GE 스위트 컴파일 결과 + 스위트로 표현되지 않는 규칙)"""
+    return compile_ge_suites() + [
         # ━━━ Events 테이블 ━━━
-        QualityCheck(
-            name="events_not_null_event_id",
-            query="SELECT * FROM events WHERE event_id IS NULL LIMIT 10",
-            expectation="event_id should never be NULL",
-            severity="critical"
-        ),
-        QualityCheck(
-            name="events_unique_event_id",
-            query="""
-                SELECT event_id, COUNT(*) AS cnt 
-                FROM events 
-                GROUP BY 1 HAVING COUNT(*) > 1 
-                LIMIT 10
-            """,
-            expectation="event_id should be unique (no duplicates)",
-            severity="critical"
-        ),
-        QualityCheck(
-            name="events_valid_event_name",
-            query="""
-                SELECT DISTINCT event_name 
-                FROM events 
-                WHERE event_name NOT IN (
-                    'auth_signup_started', 'auth_signup_submitted', 'auth_signup_completed',
-                    'auth_login_attempted', 'auth_login_completed', 'auth_identity_verified',
-                    'payment_transfer_started', 'payment_transfer_amount_entered',
-                    'payment_transfer_confirmed', 'payment_transfer_completed', 'payment_transfer_failed',
-                    'payment_charge_completed', 'payment_withdraw_completed',
-                    'payment_qr_scanned', 'payment_qr_completed',
-                    'product_list_viewed', 'product_detail_viewed', 'product_compared',
-                    'product_applied', 'product_application_completed',
-                    'screen_viewed', 'screen_exited', 'screen_tab_clicked',
-                    'screen_banner_clicked', 'screen_search_performed',
-                    'system_error_occurred', 'system_push_received', 'system_push_clicked'
-                )
-            """,
-            expectation="event_name should be in the defined taxonomy",
-            severity="critical"
-        ),
-        QualityCheck(
-            name="events_valid_platform",
-            query="SELECT DISTINCT platform FROM events WHERE platform NOT IN ('ios', 'android', 'web')",
-            expectation="platform should be ios, android, or web",
-            severity="warning"
-        ),
-        QualityCheck(
-            name="events_not_null_timestamp",
-            query="SELECT * FROM events WHERE event_timestamp IS NULL LIMIT 10",
-            expectation="event_timestamp should never be NULL",
-            severity="critical"
-        ),
-        QualityCheck(
+        AggregateCheck(
             name="events_null_rate_user_id",
-            query="""
-                SELECT 
-                    ROUND(SUM(CASE WHEN user_id IS NULL THEN 1 ELSE 0 END) * 100.0 / COUNT(*), 2) AS null_pct
-                FROM events
-                HAVING null_pct > 5
-            """,
+            table="events",
+            violation_expr="""CASE WHEN
+                    COUNT(*) FILTER (WHERE user_id IS NULL) * 100.0 / NULLIF(COUNT(*), 0) > 5
+                THEN 1 ELSE 0 END""",
             expectation="user_id null rate should be less than 5%",
-            severity="warning"
-        ),
-        
-        # ━━━ Transactions 테이블 ━━━
-        QualityCheck(
-            name="txn_not_null_transaction_id",
-            query="SELECT * FROM transactions WHERE transaction_id IS NULL LIMIT 10",
-            expectation="transaction_id should never be NULL",
-            severity="critical"
-        ),
-        QualityCheck(
-            name="txn_unique_transaction_id",
-            query="""
-                SELECT transaction_id, COUNT(*) AS cnt 
-                FROM transactions 
-                GROUP BY 1 HAVING COUNT(*) > 1 
-                LIMIT 10
-            """,
-            expectation="transaction_id should be unique",
-            severity="critical"
-        ),
-        QualityCheck(
-            name="txn_positive_amount",
-            query="SELECT * FROM transactions WHERE amount <= 0 LIMIT 10",
-            expectation="amount should be positive",
-            severity="critical"
-        ),
-        QualityCheck(
-            name="txn_non_negative_fee",
-            query="SELECT * FROM transactions WHERE fee < 0 LIMIT 10",
-            expectation="fee should be non-negative",
-            severity="critical"
-        ),
-        QualityCheck(
-            name="txn_valid_status",
-            query="""
-                SELECT DISTINCT status 
-                FROM transactions 
-                WHERE status NOT IN ('completed', 'failed', 'pending', 'cancelled')
-            """,
-            expectation="status should be in the valid set",
-            severity="critical"
-        ),
-        QualityCheck(
-            name="txn_valid_type",
-            query="""
-                SELECT DISTINCT transaction_type 
-                FROM transactions 
-                WHERE transaction_type NOT IN ('transfer', 'qr_payment', 'charge', 'withdraw')
-            """,
-            expectation="transaction_type should be in the valid set",
-            severity="warning"
-        ),
-        QualityCheck(
-            name="txn_amount_gte_fee",
-            query="SELECT * FROM transactions WHERE amount < fee LIMIT 10",
-            expectation="amount should always be >= fee",
-            severity="warning"
+            severity="warning",
+            rows_query="SELECT * FROM {source} WHERE user_id IS NULL",
         ),
         
         # ━━━ Cross-table 정합성 ━━━
@@ -177,51 +609,97 @@ def define_quality_checks() -> list[QualityCheck]:
                 FROM transactions t 
                 LEFT JOIN users u ON t.user_id = u.user_id 
                 WHERE u.user_id IS NULL
-                LIMIT 10
             """,
             expectation="All transaction user_ids should exist in users table",
             severity="warning"
         ),
         
         # ━━━ 볼륨 이상 탐지 ━━━
-        QualityCheck(
+        CachedQualityCheck(
             name="events_daily_volume_anomaly",
+            cached_query=DAILY_EVENT_VOLUME_QUERY,
             query="""
-                WITH daily AS (
-                    SELECT CAST(event_timestamp AS DATE) AS dt, COUNT(*) AS cnt
-                    FROM events GROUP BY 1
-                ),
-                stats AS (
-                    SELECT AVG(cnt) AS mean_cnt, STDDEV(cnt) AS std_cnt FROM daily
+                WITH stats AS (
+                    SELECT AVG(cnt) AS mean_cnt, STDDEV(cnt) AS std_cnt FROM {cached}
                 )
                 SELECT d.dt, d.cnt, s.mean_cnt, 
                        ROUND((d.cnt - s.mean_cnt) / NULLIF(s.std_cnt, 0), 2) AS zscore
-                FROM daily d CROSS JOIN stats s
+                FROM {cached} d CROSS JOIN stats s
                 WHERE ABS((d.cnt - s.mean_cnt) / NULLIF(s.std_cnt, 0)) > 3
             """,
+            sources=["events"],
             expectation="Daily event volume should not deviate more than 3 std from mean",
             severity="warning"
         ),
     ]
 
 
-def run_quality_checks():
-    """모든 품질 검증 실행"""
+def write_violation_samples(path: Path, checks: list[QualityCheck]) -> int:
+    """검증별 위반 샘플을 하나의 Parquet 파일(check_name, sample_row)로 저장 — 저장한 행 수 반환"""
+    names = [check.name for check in checks for _ in check.samples]
+    if not names:
+        return 0
+    table = pa.table({
+        "check_name": pa.array(names).dictionary_encode(),
+        "sample_row": pa.array([row for check in checks for row in check.samples], pa.string()),
+    })
+    pq.write_table(table, path, compression="zstd")
+    return len(names)
+
+
+def run_quality_checks(parallelism: int = DEFAULT_PARALLELISM, timeout: float | None = None,
+                       incremental: bool = False):
+    """
+    모든 품질 검증 실행
+
+    parallelism: 동시 실행 쿼리 수, timeout: 쿼리당 제한 시간(초),
+    incremental: 마지막 성공 워터마크 이후 데이터만 검증
+    """
     REPORT_DIR.mkdir(parents=True, exist_ok=True)
     
     con = duckdb.connect(str(DB_PATH), read_only=True)
     checks = define_quality_checks()
     
+    scope = None
+    if incremental:
+        scope = IncrementalScope(REPORT_DIR)
+        scope.prepare(con, checks)
+    plan = plan_checks(checks)
+    
     print("🔍 QuickPay 데이터 품질 검증 시작")
     print(f"   DB: {DB_PATH}")
-    print(f"   검증 규칙: {len(checks)}개\n")
+    print(f"   검증 규칙: {len(checks)}개 → 쿼리 {len(plan)}회 (병렬 {parallelism}"
+          f"{f', 타임아웃 {timeout:g}s' if timeout else ''})")
+    for step in plan:
+        if isinstance(step, FusedScan):
+            scoped = " (신규 구간)" if step.checks[0].source != step.table else ""
+            print(f"   🔗 {step.table}{scoped}: {len(step.checks)}개 규칙 → 1회 스캔")
+    if scope:
+        for table, (low, high, rows) in scope.ranges.items():
+            since = f"{low} 이후" if low else "전체"
+            print(f"   ⏱️  {table}: {since} ~ {high} ({rows:,}건 검증)")
+    print()
+    
+    # 실행 단위끼리는 의존성이 없으므로 동시에 실행 (결과는 각 check 객체에 기록)
+    with ThreadPoolExecutor(max_workers=max(1, parallelism)) as pool:
+        for future in [pool.submit(run_step, con, step, timeout) for step in plan]:
+            future.result()
+    
+    if scope:
+        scope.check_history_duplicates(con, checks)
+    if QUERY_CACHE.hits or QUERY_CACHE.misses:
+        print(f"   🗄️  결과 캐시: {QUERY_CACHE.summary()}")
+    
+    run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    samples_path = REPORT_DIR / f"violation_samples_{run_id}.parquet"
+    samples_written = write_violation_samples(samples_path, checks)
     
     results = []
     passed_count = 0
     failed_count = 0
     
     for check in checks:
-        success = check.run(con)
+        success = check.passed
         status_icon = "✅" if success else ("🔴" if check.severity == "critical" else "🟡")
         print(f"   {status_icon} {check.name}: {check.details}")
         
@@ -230,15 +708,21 @@ def run_quality_checks():
         else:
             failed_count += 1
         
-        results.append({
+        result = {
             "check_name": check.name,
             "expectation": check.expectation,
             "severity": check.severity,
             "passed": success,
             "details": check.details,
+            "violation_count": check.violation_count,
             "run_at": datetime.now().isoformat(),
-        })
+        }
+        if check.samples:
+            result["samples"] = {"file": samples_path.name, "rows": len(check.samples)}
+        results.append(result)
     
+    if scope:
+        committed = scope.commit(con, checks)
     con.close()
     
     # 결과 요약
@@ -257,18 +741,52 @@ def run_quality_checks():
         "quality_score": round(passed_count / total * 100, 1),
         "results": results,
     }
+    if scope:
+        report["scope"] = scope.summary()
+        print(f"   워터마크: {'전진 ✅' if committed else '유지 (critical 실패) ⚠️'}")
+    
+    if samples_written:
+        report["samples_file"] = samples_path.name
     
-    report_path = REPORT_DIR / f"quality_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    report_path = REPORT_DIR / f"quality_report_{run_id}.json"
     with open(report_path, "w") as f:
         json.dump(report, f, indent=2, ensure_ascii=False)
     
     print(f"\n📁 리포트 저장: {report_path}")
+    if samples_written:
+        print(f"   위반 샘플: {samples_path} ({samples_written}행)")
     
     return report
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="QuickPay 데이터 품질 검증")
+    parser.add_argument(
+        "--parallelism", type=int, default=DEFAULT_PARALLELISM,
+        help="동시에 실행할 검증 쿼리 수 (1이면 순차 실행)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=None,
+        help="검증 쿼리당 제한 시간(초). 초과 시 해당 검증은 실패로 기록",
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="마지막 성공 워터마크 이후 행만 검증 (상태: reports/quality_state.json)",
+    )
+    parser.add_argument(
+        "--approx", action="store_true",
+        help="(사용 중단, 무시됨) 스케치 선별은 critical 유일성 규칙의 소량 중복을 놓칠 수 있어 제거 — 모든 규칙을 정확히 검증",
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    report = run_quality_checks()
+    args = parse_args()
+    if args.approx:
+        print("ℹ️  --approx는 사용 중단되어 무시됩니다 (모든 규칙을 정확히 검증)\n")
+    report = run_quality_checks(
+        parallelism=args.parallelism, timeout=args.timeout, incremental=args.incremental,
+    )
     
     # 실패한 검증이 있으면 Slack 알림 발송 (옵션)
     if report["failed"] > 0:
@@ -50,13 +50,13 @@ con = duckdb.connect('data/quickpay.duckdb', read_only=True)
 
 # 최신 이벤트 시각 확인
 latest = con.execute('''
-    SELECT MAX(CAST(event_timestamp AS TIMESTAMP)) as latest_event
+    SELECT MAX(event_timestamp) as latest_event
     FROM events
 ''').fetchone()[0]
 
 # 최신 거래 시각 확인
 latest_txn = con.execute('''
-    SELECT MAX(CAST(created_at AS TIMESTAMP)) as latest_txn
+    SELECT MAX(created_at) as latest_txn
     FROM transactions
 ''').fetchone()[0]
 
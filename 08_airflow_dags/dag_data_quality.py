@@ -3,6 +3,9 @@ Airflow DAG: 데이터 품질 검증 파이프라인
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 매 6시간마다 데이터 품질을 점검하고 이상 시 알림을 발송합니다.
 BranchPythonOperator를 활용한 조건부 알림 로직 포함.
+
+이벤트 볼륨 체크의 일자별 집계는 query_cache(03_data_generation)로 캐시되어
+적재가 없는 6시간 주기 실행과 run_quality_checks의 볼륨 이상 탐지가 같은 결과를 재사용합니다.
 """
 
 from datetime import datetime, timedelta
@@ -37,21 +40,23 @@ check_event_volume = BashOperator(
     bash_command="""
         cd /opt/airflow/dags/fintech-dataops-portfolio
         python -c "
+import sys
 import duckdb
-from datetime import datetime, timedelta
+
+sys.path[:0] = ['03_data_generation', '07_data_quality']
+from query_cache import QueryCache
+from run_quality_checks import DAILY_EVENT_VOLUME_QUERY
 
 con = duckdb.connect('data/quickpay.duckdb', read_only=True)
 
-# 최근 24시간 이벤트 수
+# 일자별 이벤트 수: run_quality_checks와 같은 쿼리 → 다음 적재 전까지는 캐시된 결과 재사용
+cache = QueryCache()
+daily_counts = cache.fetch(con, DAILY_EVENT_VOLUME_QUERY, sources=['events'])
+print(f'Query cache: {cache.summary()}')
+
+# 최근 일자 이벤트 수
 result = con.execute('''
-    WITH daily_counts AS (
-        SELECT 
-            CAST(event_timestamp AS DATE) AS dt,
-            COUNT(*) AS cnt
-        FROM events
-        GROUP BY 1
-    ),
-    stats AS (
+    WITH stats AS (
         SELECT AVG(cnt) AS mean_cnt, STDDEV(cnt) AS std_cnt 
         FROM daily_counts
     )
@@ -168,7 +173,7 @@ run_full_quality_checks = BashOperator(
     task_id="run_full_quality_checks",
     bash_command="""
         cd /opt/airflow/dags/fintech-dataops-portfolio
-        python 07_data_quality/run_quality_checks.py 2>&1
+        python 07_data_quality/run_quality_checks.py --incremental --parallelism 8 --timeout 600 2>&1
     """,
     dag=dag,
 )
@@ -1,7 +1,7 @@
 """
 Airflow DAG: Tableau 데이터 갱신 파이프라인
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-일간 지표 파이프라인 완료 후 Tableau용 CSV를 갱신하고
+일간 지표 파이프라인 완료 후 Tableau용 Parquet 추출 파일을 갱신하고
 Tableau Server/Online의 Extract를 리프레시합니다.
 (Tableau Public 사용 시에는 수동 업로드가 필요합니다)
 """
@@ -43,62 +43,80 @@ wait_for_daily_metrics = ExternalTaskSensor(
     dag=dag,
 )
 
-# ━━━ Task 2: Tableau CSV 내보내기 ━━━
+# ━━━ Task 2: Tableau 추출 파일 내보내기 (Parquet, COPY TO 직접 기록) ━━━
+# task_id는 실행 이력 유지를 위해 기존 이름 그대로 사용
 export_csv = BashOperator(
     task_id="export_tableau_csv",
     bash_command="""
         cd /opt/airflow/dags/fintech-dataops-portfolio
-        python 06_tableau_dashboard/export_tableau_data.py 2>&1
+        python 06_tableau_dashboard/export_tableau_data.py --format parquet --incremental 2>&1
         
-        # 파일 크기 및 행 수 검증
-        for f in 06_tableau_dashboard/exports/*.csv; do
-            rows=$(wc -l < "$f")
+        # 파일 크기 출력 (행 수 검증은 validate_tableau_data에서 Parquet 메타데이터로 수행)
+        for f in 06_tableau_dashboard/exports/*.parquet; do
             size=$(du -h "$f" | cut -f1)
-            echo "📁 $(basename $f): ${rows} rows, ${size}"
-            
-            if [ "$rows" -lt 2 ]; then
-                echo "❌ ERROR: $f has no data rows!"
-                exit 1
-            fi
+            echo "📁 $(basename $f): ${size}"
         done
         
-        echo "✅ All Tableau CSV files exported successfully"
+        echo "✅ All Tableau extracts exported successfully"
     """,
     dag=dag,
 )
 
 # ━━━ Task 3: 데이터 검증 (Tableau 공급 데이터 정합성) ━━━
+def _parquet_stats(path):
+    """Parquet footer만 읽어 (행 수, {컬럼: (min, max)}) 반환 — 데이터 페이지는 읽지 않음"""
+    import pyarrow.parquet as pq
+    
+    metadata = pq.ParquetFile(path).metadata
+    stats = {}
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        for j in range(row_group.num_columns):
+            column = row_group.column(j)
+            if column.statistics is None or not column.statistics.has_min_max:
+                continue
+            low, high = column.statistics.min, column.statistics.max
+            if column.path_in_schema in stats:
+                prev_low, prev_high = stats[column.path_in_schema]
+                low, high = min(low, prev_low), max(high, prev_high)
+            stats[column.path_in_schema] = (low, high)
+    return metadata.num_rows, stats
+
+
 def _validate_tableau_data(**kwargs):
-    """Tableau CSV의 기본 정합성 검증"""
-    import pandas as pd
+    """Tableau 추출 파일(Parquet)의 기본 정합성 검증 — footer의 행 수 / 컬럼 min·max 통계 사용"""
     from pathlib import Path
     
+    import pyarrow.parquet as pq
+    
     export_dir = Path("/opt/airflow/dags/fintech-dataops-portfolio/06_tableau_dashboard/exports")
     
-    # daily_kpi.csv 검증
-    daily = pd.read_csv(export_dir / "daily_kpi.csv")
-    assert len(daily) > 0, "daily_kpi.csv is empty"
-    assert daily["dau"].min() > 0, "DAU has zero or negative values"
-    assert daily["gmv"].min() >= 0, "GMV has negative values"
-    print(f"✅ daily_kpi.csv: {len(daily)} rows, DAU range [{daily['dau'].min()}, {daily['dau'].max()}]")
+    # daily_kpi 검증
+    rows, stats = _parquet_stats(export_dir / "daily_kpi.parquet")
+    assert rows > 0, "daily_kpi.parquet is empty"
+    assert stats["dau"][0] > 0, "DAU has zero or negative values"
+    assert stats["gmv"][0] >= 0, "GMV has negative values"
+    print(f"✅ daily_kpi.parquet: {rows} rows, DAU range [{stats['dau'][0]}, {stats['dau'][1]}]")
     
-    # retention_cohort.csv 검증
-    retention = pd.read_csv(export_dir / "retention_cohort.csv")
-    assert len(retention) > 0, "retention_cohort.csv is empty"
-    assert retention["retention_rate"].max() <= 100, "Retention rate exceeds 100%"
-    print(f"✅ retention_cohort.csv: {len(retention)} rows")
+    # retention_cohort 검증
+    rows, stats = _parquet_stats(export_dir / "retention_cohort.parquet")
+    assert rows > 0, "retention_cohort.parquet is empty"
+    assert stats["retention_rate"][1] <= 100, "Retention rate exceeds 100%"
+    print(f"✅ retention_cohort.parquet: {rows} rows")
     
-    # funnel_data.csv 검증
-    funnel = pd.read_csv(export_dir / "funnel_data.csv")
+    # funnel_data 검증 (6행뿐이라 footer 통계 대신 전체를 읽어 1단계 행을 직접 확인)
+    funnel = pq.read_table(export_dir / "funnel_data.parquet", columns=["step_order", "pct_from_start"]).to_pylist()
     assert len(funnel) == 6, f"funnel should have 6 steps, got {len(funnel)}"
-    assert funnel.iloc[0]["pct_from_start"] == 100.0, "First funnel step should be 100%"
-    print(f"✅ funnel_data.csv: {len(funnel)} steps")
+    first_step = [row for row in funnel if row["step_order"] == 1]
+    assert len(first_step) == 1, "funnel should have exactly one step_order == 1 row"
+    assert first_step[0]["pct_from_start"] == 100.0, "First funnel step should be 100%"
+    print(f"✅ funnel_data.parquet: {len(funnel)} steps")
     
-    # transaction_summary.csv 검증
-    txn = pd.read_csv(export_dir / "transaction_summary.csv")
-    assert len(txn) > 0, "transaction_summary.csv is empty"
-    assert txn["total_amount"].min() >= 0, "Negative total_amount found"
-    print(f"✅ transaction_summary.csv: {len(txn)} rows")
+    # transaction_summary 검증
+    rows, stats = _parquet_stats(export_dir / "transaction_summary.parquet")
+    assert rows > 0, "transaction_summary.parquet is empty"
+    assert stats["total_amount"][0] >= 0, "Negative total_amount found"
+    print(f"✅ transaction_summary.parquet: {rows} rows")
     
     print("\n✅ All Tableau data validation passed!")
 
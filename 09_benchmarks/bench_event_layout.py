@@ -0,0 +1,156 @@
+"""
+events 물리 정렬(클러스터링) 벤치마크
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+적재 순서(이벤트 시각순, 기존 로더)와 load_to_db.py의 클러스터링 순서((일자, event_name, user_id))로
+같은 events를 저장했을 때, 단일 이벤트 / 단일 일자 필터 쿼리의 실행 시간과 읽어야 하는 행 그룹 수를 비교합니다.
+
+측정 방식:
+  - quickpay.duckdb를 읽기 전용으로 ATTACH하고 임시 DuckDB 파일에 두 가지 순서로 events를 저장 (측정 제외)
+  - 행 그룹(ROW_GROUP_SIZE행)별 event_name / event_timestamp min·max를 구해, 쿼리 필터와 범위가 겹치는
+    행 그룹 수 = zone map으로 건너뛰지 못하고 읽어야 하는 행 그룹 수로 집계
+  - 쿼리별로 --repeat회 실행한 최솟값 사용, 두 순서의 결과가 같은지 확인
+
+사용법:
+  python 09_benchmarks/bench_event_layout.py
+  python 09_benchmarks/bench_event_layout.py --repeat 5
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "03_data_generation"))
+from load_to_db import TABLES  # noqa: E402
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DB_PATH = DATA_DIR / "quickpay.duckdb"
+ROW_GROUP_SIZE = 122_880  # DuckDB 기본 행 그룹 크기
+
+# 비교할 물리 순서: 테이블명 → ORDER BY
+LAYOUTS = {
+    "events_arrival": "event_timestamp",
+    "events_clustered": TABLES["events"]["cluster"],
+}
+
+FUNNEL_EVENTS = [
+    "auth_signup_started", "auth_signup_submitted", "auth_signup_completed",
+    "auth_identity_verified", "payment_transfer_started", "payment_transfer_completed",
+]
+DAY_FILTER = "event_timestamp >= TIMESTAMP '{day}' AND event_timestamp < TIMESTAMP '{day}' + INTERVAL 1 DAY"
+
+# 쿼리명 → (SQL 템플릿, 필터 이벤트명 목록(None이면 전체), 단일 일자 필터 여부)
+QUERIES = {
+    "로그인 DAU (단일 이벤트)": ("""
+        SELECT CAST(event_timestamp AS DATE) AS dt, COUNT(DISTINCT user_id) AS dau
+        FROM {table}
+        WHERE event_name = 'auth_login_completed'
+        GROUP BY 1
+    """, ["auth_login_completed"], False),
+    "송금 완료 (단일 이벤트 · 단일 일자)": (f"""
+        SELECT COUNT(*) AS transfers, COUNT(DISTINCT user_id) AS senders
+        FROM {{table}}
+        WHERE event_name = 'payment_transfer_completed' AND {DAY_FILTER}
+    """, ["payment_transfer_completed"], True),
+    "이벤트별 건수 (단일 일자)": (f"""
+        SELECT event_name, COUNT(*) AS events
+        FROM {{table}}
+        WHERE {DAY_FILTER}
+        GROUP BY 1
+    """, None, True),
+    "퍼널 이벤트 사용자 수 (6종)": (f"""
+        SELECT event_name, COUNT(DISTINCT user_id) AS users
+        FROM {{table}}
+        WHERE event_name IN ({", ".join(f"'{name}'" for name in FUNNEL_EVENTS)})
+        GROUP BY 1
+    """, FUNNEL_EVENTS, False),
+}
+
+
+def row_groups_to_read(con: duckdb.DuckDBPyConnection, table: str, names: list[str] | None, day: str | None) -> tuple[int, int]:
+    """
+    필터 범위와 min/max가 겹치는 행 그룹 수, 전체 행 그룹 수
+
+    event_name은 ENUM이라 zone map이 문자열이 아닌 ENUM 코드 기준이므로 코드로 비교합니다.
+    """
+    conditions = []
+    if names:
+        codes = dict(con.execute(f"SELECT DISTINCT CAST(event_name AS VARCHAR), enum_code(event_name) FROM {table}").fetchall())
+        conditions.append(
+            "(" + " OR ".join(f"{codes[name]} BETWEEN min_name AND max_name" for name in names if name in codes) + ")"
+        )
+    if day:
+        conditions.append(f"max_ts >= TIMESTAMP '{day}' AND min_ts < TIMESTAMP '{day}' + INTERVAL 1 DAY")
+    return con.execute(f"""
+        WITH zone_map AS (
+            SELECT
+                rowid // {ROW_GROUP_SIZE} AS row_group,
+                MIN(enum_code(event_name)) AS min_name,
+                MAX(enum_code(event_name)) AS max_name,
+                MIN(event_timestamp) AS min_ts,
+                MAX(event_timestamp) AS max_ts
+            FROM {table}
+            GROUP BY 1
+        )
+        SELECT COUNT(*) FILTER (WHERE {" AND ".join(conditions) or "true"}), COUNT(*)
+        FROM zone_map
+    """).fetchone()
+
+
+def timed(con: duckdb.DuckDBPyConnection, sql: str, repeat: int) -> tuple[float, list]:
+    """쿼리를 repeat회 실행 → (최소 소요 시간(초), 정렬된 결과)"""
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = con.execute(sql).fetchall()
+        elapsed.append(time.perf_counter() - start)
+    return min(elapsed), sorted(rows, key=str)
+
+
+def main(repeat: int = 3):
+    print("⏱️  events 물리 정렬 벤치마크")
+    print(f"   DB: {DB_PATH} (반복 {repeat}회, 최솟값)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        con = duckdb.connect(str(Path(tmp) / "layout.duckdb"))
+        con.execute("SET enable_progress_bar = false")
+        con.execute(f"ATTACH '{DB_PATH}' AS quickpay (READ_ONLY)")
+        for table, order_by in LAYOUTS.items():
+            con.execute(f"CREATE TABLE {table} AS SELECT * FROM quickpay.events ORDER BY {order_by}")
+        con.execute("CHECKPOINT")
+        events = con.execute("SELECT COUNT(*) FROM events_clustered").fetchone()[0]
+        day = str(con.execute("SELECT MAX(CAST(event_timestamp AS DATE)) - 1 FROM events_clustered").fetchone()[0])
+        print(f"   입력: events {events:,}행, 단일 일자 필터 {day}")
+
+        totals = dict.fromkeys(LAYOUTS, 0.0)
+        mismatches = []
+        for label, (template, names, single_day) in QUERIES.items():
+            print(f"\n🔎 {label}")
+            results = {}
+            for table in LAYOUTS:
+                seconds, results[table] = timed(con, template.format(table=table, day=day), repeat)
+                read, total = row_groups_to_read(con, table, names, day if single_day else None)
+                totals[table] += seconds
+                print(f"   {table:<18} 행 그룹 {read:>4}/{total:<4} {seconds * 1000:>10.1f} ms")
+            if len({str(rows) for rows in results.values()}) > 1:
+                mismatches.append(label)
+        con.close()
+
+    arrival, clustered = totals["events_arrival"], totals["events_clustered"]
+    print(f"\n{'='*50}")
+    print(f"   속도: {arrival / clustered:.1f}x ({arrival * 1000:.1f} ms → {clustered * 1000:.1f} ms)")
+    print(f"   쿼리 결과: {'✅ 동일' if not mismatches else '❌ 불일치 ' + ', '.join(mismatches)}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="events 물리 정렬 벤치마크")
+    parser.add_argument("--repeat", type=int, default=3, help="쿼리별 반복 실행 횟수 (최솟값 사용)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(repeat=args.repeat)
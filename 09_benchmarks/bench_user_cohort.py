@@ -0,0 +1,221 @@
+"""
+int_user_cohort 재설계 벤치마크
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+기존 코호트 파이프라인(사용자 × 활동일 grain의 int_user_cohort → mart_retention에서 사용자별 MAX 재집계)과
+재설계 파이프라인(int_user_activity_bitmap → 사용자당 1행 int_user_cohort → mart_retention)의
+중간 테이블 행 수와 실행 시간을 비교하고, 두 mart_retention 결과가 같은지 확인합니다.
+
+측정 방식:
+  - quickpay.duckdb를 읽기 전용으로 ATTACH하고 인메모리 DB에 stg_events / stg_users를 먼저 생성 (측정 제외)
+  - 재설계 모델은 04_dbt_mart/models의 SQL을 읽어 ref / source를 테이블명으로 치환해 전체 빌드로 실행
+    (dbt 없이 실행하기 위한 최소 렌더링: config 블록 제거, is_incremental()은 항상 false)
+  - 기존 모델은 재설계 이전 SQL을 LEGACY_* 상수로 보관
+  - 단계별로 --repeat회 실행한 최솟값 사용
+
+사용법:
+  python 09_benchmarks/bench_user_cohort.py
+  python 09_benchmarks/bench_user_cohort.py --repeat 5
+"""
+
+import argparse
+import re
+import time
+from pathlib import Path
+
+import duckdb
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+DB_PATH = DATA_DIR / "quickpay.duckdb"
+MODEL_DIR = Path(__file__).parent.parent / "04_dbt_mart" / "models"
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# 기존 모델 (재설계 이전)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# int_user_cohort: 사용자 × 활동일마다 1행 (GROUP BY에 activity_date / days_since_signup 포함)
+LEGACY_INT_USER_COHORT = """
+WITH user_base AS (
+    SELECT
+        user_id,
+        signup_date,
+        signup_week,
+        signup_month,
+        platform
+    FROM stg_users
+),
+
+user_activity AS (
+    SELECT DISTINCT
+        user_id,
+        event_date_kst AS activity_date
+    FROM stg_events
+    WHERE event_name = 'auth_login_completed'
+),
+
+cohort_activity AS (
+    SELECT
+        ub.user_id,
+        ub.signup_date,
+        ub.signup_week,
+        ub.signup_month,
+        ub.platform,
+        ua.activity_date,
+        ua.activity_date - ub.signup_date AS days_since_signup
+    FROM user_base ub
+    LEFT JOIN user_activity ua ON ub.user_id = ua.user_id
+)
+
+SELECT
+    user_id,
+    signup_date,
+    signup_week,
+    signup_month,
+    platform,
+    activity_date,
+    days_since_signup,
+    
+    -- N-Day 리텐션 플래그
+    MAX(CASE WHEN days_since_signup = 1 THEN 1 ELSE 0 END) AS retained_d1,
+    MAX(CASE WHEN days_since_signup = 3 THEN 1 ELSE 0 END) AS retained_d3,
+    MAX(CASE WHEN days_since_signup = 7 THEN 1 ELSE 0 END) AS retained_d7,
+    MAX(CASE WHEN days_since_signup = 14 THEN 1 ELSE 0 END) AS retained_d14,
+    MAX(CASE WHEN days_since_signup = 30 THEN 1 ELSE 0 END) AS retained_d30
+
+FROM cohort_activity
+GROUP BY 1, 2, 3, 4, 5, 6, 7
+"""
+
+# mart_retention: 사용자별 MAX로 다시 접은 뒤 코호트 집계
+LEGACY_MART_RETENTION = """
+WITH cohort_base AS (
+    SELECT
+        signup_week,
+        signup_month,
+        platform,
+        user_id
+    FROM stg_users
+),
+
+cohort_retention AS (
+    SELECT
+        uc.signup_week,
+        uc.signup_month,
+        uc.platform,
+        uc.user_id,
+        MAX(uc.retained_d1) AS retained_d1,
+        MAX(uc.retained_d3) AS retained_d3,
+        MAX(uc.retained_d7) AS retained_d7,
+        MAX(uc.retained_d14) AS retained_d14,
+        MAX(uc.retained_d30) AS retained_d30
+    FROM legacy_int_user_cohort uc
+    GROUP BY 1, 2, 3, 4
+)
+
+SELECT
+    signup_week,
+    signup_month,
+    platform,
+    
+    -- 코호트 크기
+    COUNT(DISTINCT user_id) AS cohort_size,
+    
+    -- 리텐션 인원
+    SUM(retained_d1) AS retained_d1_users,
+    SUM(retained_d3) AS retained_d3_users,
+    SUM(retained_d7) AS retained_d7_users,
+    SUM(retained_d14) AS retained_d14_users,
+    SUM(retained_d30) AS retained_d30_users,
+    
+    -- 리텐션율
+    ROUND(SUM(retained_d1) * 100.0 / NULLIF(COUNT(DISTINCT user_id), 0), 2) AS retention_d1,
+    ROUND(SUM(retained_d3) * 100.0 / NULLIF(COUNT(DISTINCT user_id), 0), 2) AS retention_d3,
+    ROUND(SUM(retained_d7) * 100.0 / NULLIF(COUNT(DISTINCT user_id), 0), 2) AS retention_d7,
+    ROUND(SUM(retained_d14) * 100.0 / NULLIF(COUNT(DISTINCT user_id), 0), 2) AS retention_d14,
+    ROUND(SUM(retained_d30) * 100.0 / NULLIF(COUNT(DISTINCT user_id), 0), 2) AS retention_d30
+
+FROM cohort_retention
+GROUP BY 1, 2, 3
+ORDER BY signup_week, platform
+"""
+
+LEGACY_STEPS = [
+    ("legacy_int_user_cohort", LEGACY_INT_USER_COHORT),
+    ("legacy_mart_retention", LEGACY_MART_RETENTION),
+]
+# 재설계 파이프라인 (dbt 모델 파일 그대로)
+REDESIGN_MODELS = ["int_user_activity_bitmap", "int_user_cohort", "mart_retention"]
+STAGING_MODELS = ["stg_events", "stg_users"]
+
+
+def render_model(name: str) -> str:
+    """dbt 모델 SQL → 실행 가능한 SQL (전체 빌드 기준 최소 렌더링)"""
+    sql = next(MODEL_DIR.rglob(f"{name}.sql")).read_text(encoding="utf-8")
+    sql = re.sub(r"\{\{\s*config\(.*?\)\s*\}\}", "", sql, flags=re.S)
+    incremental_branch = r"\{%\s*if is_incremental\(\)\s*%\}(?:(?!\{%\s*endif).)*?"
+    sql = re.sub(incremental_branch + r"\{%\s*else\s*%\}(.*?)\{%\s*endif\s*%\}", r"\1", sql, flags=re.S)
+    sql = re.sub(r"\{%\s*if is_incremental\(\)\s*%\}.*?\{%\s*endif\s*%\}", "", sql, flags=re.S)
+    sql = re.sub(r"\{\{\s*ref\('(\w+)'\)\s*\}\}", r"\1", sql)
+    sql = re.sub(r"\{\{\s*source\('raw',\s*'(\w+)'\)\s*\}\}", r"quickpay.\1", sql)
+    return sql
+
+
+def build(con: duckdb.DuckDBPyConnection, name: str, sql: str, repeat: int) -> tuple[float, int]:
+    """CREATE OR REPLACE TABLE을 repeat회 실행 → (최소 소요 시간(초), 행 수)"""
+    elapsed = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        con.execute(f"CREATE OR REPLACE TABLE {name} AS {sql}")
+        elapsed.append(time.perf_counter() - start)
+    return min(elapsed), con.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+
+
+def run_pipeline(con: duckdb.DuckDBPyConnection, label: str, steps: list[tuple[str, str]], repeat: int) -> float:
+    print(f"\n{label}")
+    total = 0.0
+    for name, sql in steps:
+        seconds, rows = build(con, name, sql, repeat)
+        total += seconds
+        print(f"   {name:<28} {rows:>12,}행 {seconds * 1000:>10.1f} ms")
+    print(f"   {'합계':<28} {'':>13} {total * 1000:>10.1f} ms")
+    return total
+
+
+def main(repeat: int = 3):
+    print("⏱️  int_user_cohort 재설계 벤치마크")
+    print(f"   DB: {DB_PATH} (반복 {repeat}회, 최솟값)")
+    
+    con = duckdb.connect()
+    con.execute("SET enable_progress_bar = false")
+    con.execute(f"ATTACH '{DB_PATH}' AS quickpay (READ_ONLY)")
+    for name in STAGING_MODELS:
+        con.execute(f"CREATE TABLE {name} AS {render_model(name)}")
+    events = con.execute("SELECT COUNT(*) FROM stg_events").fetchone()[0]
+    users = con.execute("SELECT COUNT(*) FROM stg_users").fetchone()[0]
+    print(f"   입력: stg_events {events:,}행, stg_users {users:,}행")
+    
+    legacy = run_pipeline(con, "📦 기존 (사용자 × 활동일 grain)", LEGACY_STEPS, repeat)
+    redesign = run_pipeline(
+        con, "🧮 재설계 (활동 비트셋 → 사용자당 1행)",
+        [(name, render_model(name)) for name in REDESIGN_MODELS], repeat,
+    )
+    
+    diff = con.execute("""
+        SELECT
+            (SELECT COUNT(*) FROM (SELECT * FROM legacy_mart_retention EXCEPT SELECT * FROM mart_retention))
+          + (SELECT COUNT(*) FROM (SELECT * FROM mart_retention EXCEPT SELECT * FROM legacy_mart_retention))
+    """).fetchone()[0]
+    con.close()
+    
+    print(f"\n{'='*50}")
+    print(f"   속도: {legacy / redesign:.1f}x ({legacy * 1000:.1f} ms → {redesign * 1000:.1f} ms)")
+    print(f"   mart_retention 결과: {'✅ 동일' if diff == 0 else f'❌ {diff}행 불일치'}")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="int_user_cohort 재설계 벤치마크")
+    parser.add_argument("--repeat", type=int, default=3, help="단계별 반복 실행 횟수 (최솟값 사용)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(repeat=args.repeat)